@@ -0,0 +1,49 @@
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from agenda.scheduling.profiling import PROFILERS, profiled
+
+
+class ProfiledCommand(BaseCommand):
+    """A command that `--profile` runs under agenda.scheduling.profiling.
+
+    Subclasses implement run() where they would handle().
+    """
+
+    # The system checks import the whole URLconf, and with it DRF and the
+    # schema generator, none of which drafting the schedule needs. They
+    # have run by then anyway: start.sh migrates, which runs them, before
+    # the API serves.
+    requires_system_checks: list[str] = []
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--profile",
+            nargs="?",
+            const="",
+            metavar="PREFIX",
+            help=(
+                "Profile the run, writing PREFIX.json with per-stage timings and query "
+                "counts, and PREFIX.collapsed or PREFIX.pstats "
+                "(default PREFIX: the command and the time, in the working directory)."
+            ),
+        )
+        parser.add_argument(
+            "--profiler",
+            choices=PROFILERS,
+            default=PROFILERS[0],
+            help="sampling: collapsed stacks, for speedscope; cprofile: exact, and slower.",
+        )
+
+    def handle(self, *args, **options):
+        prefix = options["profile"]
+        if prefix is None:
+            return self.run(**options)
+        name = self.__module__.rpartition(".")[2]
+        prefix = prefix or f"{name}-{timezone.now():%Y%m%dT%H%M%S}"
+        with profiled(prefix, options["profiler"], label=name):
+            self.run(**options)
+        self.stdout.write(f"Profile written to {prefix}.json")
+
+    def run(self, **options):
+        raise NotImplementedError("subclasses of ProfiledCommand must provide a run() method")
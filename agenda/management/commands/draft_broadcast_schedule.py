@@ -1,14 +1,13 @@
 import logging
 
-from django.core.management.base import BaseCommand
-
+from agenda.management.base import ProfiledCommand
 from agenda.scheduling.draft import draft_broadcast_schedule
 
 
-class Command(BaseCommand):
+class Command(ProfiledCommand):
     help = "Place weekly slots and then fill remaining airtime with the jukebox"
 
-    def handle(self, *args, **options):
+    def run(self, **options):
         if 1 < int(options["verbosity"]):
             logging.basicConfig(level=logging.INFO)
         draft_broadcast_schedule()
@@ -1,13 +1,12 @@
-from django.core.management.base import BaseCommand
-
+from agenda.management.base import ProfiledCommand
 from agenda.scheduling.jukebox import fill_agenda_with_jukebox
 
 
-class Command(BaseCommand):
+class Command(ProfiledCommand):
     args = ""
     help = "Fill empty airtime with jukebox fillers through the end of the open broadcast week"
 
-    def handle(self, *args, **options):
+    def run(self, **options):
         if 1 < int(options["verbosity"]):
             import logging
 
@@ -1,13 +1,12 @@
-from django.core.management.base import BaseCommand
-
+from agenda.management.base import ProfiledCommand
 from agenda.scheduling.weekly_slots import fill_next_weeks_agenda
 
 
-class Command(BaseCommand):
+class Command(ProfiledCommand):
     args = ""
     help = "Schedule videos according to predefined WeeklySlot criteria"
 
-    def handle(self, *args, **options):
+    def run(self, **options):
         if 1 < int(options["verbosity"]):
             import logging
 
@@ -0,0 +1,186 @@
+"""What the schedule said would air, against what the as-run log says did.
+
+One query does the whole comparison. An as-run entry's time on air is
+`played_at` plus `out_ms - in_ms`, as a range, and it accounts for a
+schedule item when the ranges overlap (`&&`, answered by the GiST index
+on Scheduleitem.airtime) and both name the same video -- or, for live and
+other items without one, the same programme name. From that:
+
+* missed: a scheduled item nothing accounts for;
+* late: the first play accounting for it started more than TOLERANCE
+  after the item was due;
+* truncated: the plays accounting for it, counting only the part of each
+  inside the item's airtime, add up to more than TOLERANCE less than the
+  item's duration;
+* unscheduled: a play that accounts for no scheduled item.
+
+An item that starts late has lost that much of its airtime, so one more
+than TOLERANCE late is truncated too, and is reported twice.
+"""
+
+from dataclasses import dataclass
+from datetime import date, datetime, time, timedelta
+from zoneinfo import ZoneInfo
+
+from django.db import connection
+
+# Days, in the reports, are broadcast days.
+TZ = ZoneInfo("Europe/Oslo")
+
+# Playout starts items a frame or two either side of the second it is
+# given, and logs in whole milliseconds; differences under this are noise.
+TOLERANCE = timedelta(seconds=5)
+
+# A play is looked for this far before the window, so that one running
+# across its start is still seen. Longer than anything is scheduled for.
+LONGEST_PLAY = timedelta(days=1)
+
+# The most one report covers, so that a mistyped year costs a second
+# rather than a scan of the whole log.
+LONGEST_WINDOW = timedelta(days=366)
+
+KINDS = ("missed", "late", "truncated", "unscheduled")
+
+RECONCILE = """
+WITH played AS (
+    SELECT
+        id,
+        video_id,
+        program_name,
+        played_at,
+        tstzrange(
+            played_at,
+            -- An entry still open has no out point. It ran until the next
+            -- one began, or is still running.
+            coalesce(
+                played_at + make_interval(secs => (out_ms - in_ms) / 1000.0),
+                lead(played_at) OVER (ORDER BY played_at, id),
+                greatest(now(), played_at)
+            ),
+            '[)'
+        ) AS span
+    FROM fk_asrun
+    WHERE playout = %(playout)s
+      AND played_at >= %(start)s::timestamptz - %(longest)s::interval
+      -- And past it, so the last entry inside it has a next one.
+      AND played_at < %(end)s::timestamptz + %(longest)s::interval
+),
+window_plays AS (
+    SELECT * FROM played WHERE span && tstzrange(%(start)s, %(end)s, '[)')
+),
+matches AS (
+    SELECT
+        item.id AS item_id,
+        play.id AS play_id,
+        play.span,
+        -- A play running past either end of the item airs none of it there.
+        play.span * item.airtime AS within
+    FROM window_plays play
+    JOIN fk_scheduleitem item
+      ON item.airtime && play.span
+     AND (
+        item.video_id = play.video_id
+        OR (item.video_id IS NULL AND play.video_id IS NULL
+            AND item.default_name = play.program_name)
+     )
+),
+items AS (
+    SELECT
+        item.id,
+        item.video_id,
+        coalesce(video.name, item.default_name) AS name,
+        lower(item.airtime) AS due,
+        upper(item.airtime) AS until,
+        min(lower(match.span)) AS started,
+        max(upper(match.span)) AS ended,
+        sum(upper(match.within) - lower(match.within)) AS aired
+    FROM fk_scheduleitem item
+    LEFT JOIN fk_video video ON video.id = item.video_id
+    LEFT JOIN matches match ON match.item_id = item.id
+    WHERE item.airtime && tstzrange(%(start)s, %(end)s, '[)')
+    GROUP BY item.id, video.name
+)
+SELECT * FROM (
+    SELECT
+        'missed' AS kind,
+        id AS scheduleitem_id,
+        NULL::integer AS asrun_id,
+        video_id,
+        name,
+        due AS scheduled_start,
+        until AS scheduled_end,
+        NULL::timestamptz AS played_start,
+        NULL::timestamptz AS played_end
+    FROM items WHERE started IS NULL
+    UNION ALL
+    SELECT 'late', id, NULL, video_id, name, due, until, started, ended
+    FROM items WHERE started > due + %(tolerance)s::interval
+    UNION ALL
+    SELECT 'truncated', id, NULL, video_id, name, due, until, started, ended
+    FROM items WHERE aired < (until - due) - %(tolerance)s::interval
+    UNION ALL
+    SELECT
+        'unscheduled', NULL, play.id, play.video_id,
+        coalesce(video.name, play.program_name), NULL, NULL, lower(play.span), upper(play.span)
+    FROM window_plays play
+    LEFT JOIN fk_video video ON video.id = play.video_id
+    WHERE NOT EXISTS (SELECT FROM matches WHERE matches.play_id = play.id)
+) AS found
+ORDER BY coalesce(scheduled_start, played_start), kind
+"""
+
+
+@dataclass(frozen=True)
+class Discrepancy:
+    kind: str
+    scheduleitem_id: int | None
+    asrun_id: int | None
+    video_id: int | None
+    # The video's name; failing that, the item's default name or the
+    # entry's programme name.
+    name: str
+    scheduled_start: datetime | None
+    scheduled_end: datetime | None
+    played_start: datetime | None
+    played_end: datetime | None
+
+
+@dataclass(frozen=True)
+class Reconciliation:
+    start: datetime
+    end: datetime
+    playout: str
+    discrepancies: list[Discrepancy]
+
+    @property
+    def counts(self) -> dict[str, int]:
+        counts = dict.fromkeys(KINDS, 0)
+        for discrepancy in self.discrepancies:
+            counts[discrepancy.kind] += 1
+        return counts
+
+
+def reconcile(start: datetime, end: datetime, playout: str = "main") -> Reconciliation:
+    """Compare the schedule with the as-run log of `playout` over [start, end)."""
+    with connection.cursor() as cursor:
+        cursor.execute(
+            RECONCILE,
+            {
+                "start": start,
+                "end": end,
+                "playout": playout,
+                "longest": LONGEST_PLAY,
+                "tolerance": TOLERANCE,
+            },
+        )
+        rows = cursor.fetchall()
+    return Reconciliation(start, end, playout, [Discrepancy(*row) for row in rows])
+
+
+def reconcile_days(first: date, last: date, playout: str = "main") -> Reconciliation:
+    """reconcile() over whole days, from the start of `first` to the end of `last`."""
+    return reconcile(
+        datetime.combine(first, time.min, tzinfo=TZ),
+        datetime.combine(last + timedelta(days=1), time.min, tzinfo=TZ),
+        playout,
+    )
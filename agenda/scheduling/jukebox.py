@@ -16,6 +16,7 @@ from dataclasses import dataclass
 from django.utils import timezone
 
 from agenda.scheduling.policy import scheduling_horizon
+from agenda.scheduling.profiling import step
 from agenda.scheduling.selection import (
     ScheduleContext,
     Selector,
@@ -31,6 +32,7 @@ logger = logging.getLogger(__name__)
 MINIMUM_GAP = datetime.timedelta(seconds=300)
 
 
+@step("fill_agenda_with_jukebox")
 def fill_agenda_with_jukebox(
     start: datetime.datetime | None = None,
     days: float | None = None,
@@ -53,16 +55,20 @@ def fill_agenda_with_jukebox(
     # of Video.objects.fillers() on purpose: that queryset answers "may
     # this be aired as filler", which is a question about accountability
     # rather than about whether a given planner can use the video.
-    candidates = list(Video.objects.fillers().exclude(duration__lte=datetime.timedelta(0)))
+    with step("candidate fetch"):
+        candidates = list(Video.objects.fillers().exclude(duration__lte=datetime.timedelta(0)))
 
     # The context seeds from everything already on the air in the
     # window -- weekly-slot programming included -- so an organization
     # the slots favor starts the day with its filler weight down.
-    context = ScheduleContext.from_schedule(start, end)
+    with step("context seeding"):
+        context = ScheduleContext.from_schedule(start, end)
     selector = WeightedSelector(candidates, context, default_rules(now=start), rng=rng)
 
-    placements = items_for_gap(start, end, candidates, selector=selector)
-    return save_placements(placements)
+    with step("selection"):
+        placements = items_for_gap(start, end, candidates, selector=selector)
+    with step("persistence"):
+        return save_placements(placements)
 
 
 def save_placements(placements: list["Placement"]) -> list["Placement"]:
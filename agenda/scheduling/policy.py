@@ -21,9 +21,14 @@ deliberate programming never does. The weekly-slot filler and the
 schedule API both apply it from here.
 """
 
+import operator
+from collections.abc import Collection, Sequence
 from datetime import date, datetime, time, timedelta
+from functools import reduce
 from zoneinfo import ZoneInfo
 
+from django.db.backends.postgresql.psycopg_any import DateTimeTZRange
+from django.db.models import Q
 from django.utils import timezone
 
 from fk.models import Scheduleitem
@@ -130,6 +135,54 @@ def airtime_conflicts(
     return blocking, displaceable
 
 
+def batch_airtime_conflicts(
+    placements: Sequence[tuple[datetime, datetime]],
+    vacating: Collection[int] = (),
+) -> list[tuple[list[Scheduleitem], list[Scheduleitem]]]:
+    """airtime_conflicts(for_update=True) for many placements at once.
+
+    One locked query finds everything that overlaps any of the placements
+    -- an OR of their airtimes, each answered from the GiST index, so a
+    batch spread over a week reads and locks only what it actually meets,
+    not everything in between -- and each placement's conflicts are picked
+    out of that in memory. A batch costs one query and one set of row
+    locks however many items it places. `vacating` names items the caller
+    is moving or removing in the same transaction: where they stand now is
+    about to be free, so they conflict with nothing.
+
+    Returns one (blocking, displaceable) pair per placement, in order.
+    Placements are not checked against one another -- they are not rows
+    yet, and the caller knows which of them it means to keep.
+    """
+    windows = [(start, end) for start, end in placements if start < end]
+    if not windows:
+        return [([], []) for _ in placements]
+    overlapping_any = reduce(
+        operator.or_,
+        (Q(airtime__overlap=DateTimeTZRange(start, end, "[)")) for start, end in windows),
+    )
+    items = list(
+        Scheduleitem.objects.filter(overlapping_any)
+        .exclude(pk__in=vacating)
+        .order_by("starttime")
+        .select_for_update()
+    )
+    conflicts = []
+    for start, end in placements:
+        # The half-open test overlapping() asks of the airtime column; a
+        # zero-length item or placement occupies nothing and meets nothing.
+        hits = [
+            item for item in items if start < end and item.starttime < end and start < item.endtime
+        ]
+        conflicts.append(
+            (
+                [item for item in hits if not is_displaceable(item)],
+                [item for item in hits if is_displaceable(item)],
+            )
+        )
+    return conflicts
+
+
 def displace(fillers: list[Scheduleitem]) -> None:
     """Delete jukebox fillers that a placement is scheduling over. The
     nightly jukebox repacks whatever slivers this leaves behind."""
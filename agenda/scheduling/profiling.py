@@ -0,0 +1,186 @@
+"""Where a schedule draft spends its time: stage timings and a profile.
+
+The drafting code marks its stages with step() -- slot placement, the
+jukebox's candidate fetch, context seeding, selection and persistence.
+A step always tags the queries run inside for fkweb.slow_queries; inside
+profiled() it is timed as well, with the queries it ran counted, and
+without one that is all it costs.
+
+profiled() is what the agenda commands' `--profile` (see
+agenda.management.base) runs them in. Besides the stages it profiles the
+whole run, either way:
+
+* "sampling" (the default) looks at the running stack every few
+  milliseconds from a thread of its own and writes what it saw as
+  collapsed stacks (`PREFIX.collapsed`), one line per stack with the
+  number of samples it was seen in. speedscope (https://speedscope.app)
+  opens it as a flame graph, as does flamegraph.pl. A jukebox fill takes
+  some ten per cent longer.
+* "cprofile" writes cProfile's exact call counts and times
+  (`PREFIX.pstats`), for `python -m pstats` or snakeviz. A jukebox
+  fill, many small calls, takes nearly twice as long.
+
+Either way `PREFIX.json` sums the run up: how long it took, how many
+queries it ran, and each stage's calls, seconds and queries.
+"""
+
+import cProfile
+import json
+import os
+import sys
+import threading
+import time
+from collections import Counter
+from collections.abc import Iterator
+from contextlib import contextmanager
+from contextvars import ContextVar
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Self
+
+from django.db import connection
+from django.utils import timezone
+
+from fkweb.slow_queries import stage
+
+PROFILERS = ("sampling", "cprofile")
+
+# How often the sampling profiler looks, in seconds.
+SAMPLE_INTERVAL = 0.005
+
+
+@dataclass
+class StageTotals:
+    calls: int = 0
+    seconds: float = 0.0
+    queries: int = 0
+
+
+@dataclass
+class Profile:
+    queries: int = 0
+    stages: dict[str, StageTotals] = field(default_factory=dict)
+    # The steps open now, outermost first.
+    open_steps: list[str] = field(default_factory=list)
+
+    def count_query(self, execute, sql, params, many, context):
+        self.queries += 1
+        return execute(sql, params, many, context)
+
+
+_profile: ContextVar[Profile | None] = ContextVar("scheduling_profile", default=None)
+
+
+@contextmanager
+def step(name: str) -> Iterator[None]:
+    """Mark a stage of the draft: tagged for slow queries, timed when profiled.
+
+    Also a decorator. A step inside another is recorded under both names,
+    as "outer > inner"; one entered again and again adds up.
+    """
+    with stage(name):
+        profile = _profile.get()
+        if profile is None:
+            yield
+            return
+        profile.open_steps.append(name)
+        # Listed in the order they were first entered.
+        totals = profile.stages.setdefault(" > ".join(profile.open_steps), StageTotals())
+        queries = profile.queries
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            totals.calls += 1
+            totals.seconds += time.perf_counter() - started
+            totals.queries += profile.queries - queries
+            profile.open_steps.pop()
+
+
+class Sampler:
+    """Counts the stacks the current thread is seen running, from another thread."""
+
+    def __init__(self, interval: float = SAMPLE_INTERVAL) -> None:
+        self.interval = interval
+        self.stacks: Counter[str] = Counter()
+        self._target = threading.get_ident()
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="sampler", daemon=True)
+
+    def __enter__(self) -> Self:
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self._stop.set()
+        self._thread.join()
+
+    def _run(self) -> None:
+        while not self._stop.wait(self.interval):
+            frame = sys._current_frames().get(self._target)
+            names = []
+            while frame is not None:
+                code = frame.f_code
+                names.append(
+                    f"{code.co_qualname} ({_short(code.co_filename)}:{code.co_firstlineno})"
+                )
+                frame = frame.f_back
+            # Root first, each frame's name without the separators.
+            self.stacks[";".join(name.replace(";", ":") for name in reversed(names))] += 1
+
+    def write(self, path: Path) -> None:
+        with path.open("w") as output:
+            for stack, count in self.stacks.most_common():
+                output.write(f"{stack} {count}\n")
+
+
+def _short(filename: str) -> str:
+    # Our own files relative to the project, the rest by their last part.
+    root = os.getcwd() + os.sep
+    if filename.startswith(root):
+        return filename[len(root) :]
+    return Path(filename).name
+
+
+@contextmanager
+def profiled(prefix: str, profiler: str = "sampling", label: str = "") -> Iterator[Profile]:
+    """Profile whatever runs inside, and write PREFIX.json and the profiler's file."""
+    profile = Profile()
+    token = _profile.set(profile)
+    started_at = timezone.now()
+    started = time.perf_counter()
+    running: cProfile.Profile | Sampler
+    if profiler == "cprofile":
+        running = cProfile.Profile()
+        output = Path(f"{prefix}.pstats")
+    else:
+        running = Sampler()
+        output = Path(f"{prefix}.collapsed")
+    try:
+        with connection.execute_wrapper(profile.count_query), running:
+            yield profile
+    finally:
+        seconds = time.perf_counter() - started
+        _profile.reset(token)
+        if isinstance(running, cProfile.Profile):
+            running.dump_stats(output)
+        else:
+            running.write(output)
+        summary = {
+            "command": label,
+            "started": started_at.isoformat(),
+            "seconds": round(seconds, 3),
+            "queries": profile.queries,
+            "profiler": profiler,
+            "profile": str(output),
+            "stages": [
+                {
+                    "stage": path,
+                    "calls": totals.calls,
+                    "seconds": round(totals.seconds, 3),
+                    "queries": totals.queries,
+                }
+                for path, totals in profile.stages.items()
+            ],
+        }
+        Path(f"{prefix}.json").write_text(json.dumps(summary, indent=2) + "\n")
@@ -29,11 +29,13 @@ from agenda.scheduling.policy import (
     freeze_boundary,
     scheduling_horizon,
 )
+from agenda.scheduling.profiling import step
 from fk.models import Scheduleitem, Video, WeeklySlot, WeeklySlotSource
 
 logger = logging.getLogger(__name__)
 
 
+@step("fill_next_weeks_agenda")
 def fill_next_weeks_agenda(now: datetime | None = None) -> None:
     now = now or timezone.now()
     horizon = scheduling_horizon(now)
@@ -50,7 +52,8 @@ def fill_next_weeks_agenda(now: datetime | None = None) -> None:
             logger.info("No source connected, so nothing to fill")
             continue
         for starttime in _occurrences(slot, now, horizon):
-            _fill_occurrence(slot, source, starttime, frozen_until)
+            with step("slot placement"):
+                _fill_occurrence(slot, source, starttime, frozen_until)
 
 
 def _occurrences(slot: WeeklySlot, now: datetime, horizon: datetime) -> Iterator[datetime]:
@@ -0,0 +1,88 @@
+"""
+`--profile` on the agenda commands: per-stage timings and query counts in
+a JSON summary, next to a sampled flame graph or a cProfile dump.
+"""
+
+import datetime
+import json
+import pstats
+from pathlib import Path
+from zoneinfo import ZoneInfo
+
+import pytest
+from django.core.management import call_command
+
+from agenda.scheduling import draft
+from fk.models import Organization, User, Video
+
+pytestmark = pytest.mark.django_db
+
+OSLO = ZoneInfo("Europe/Oslo")
+# Sunday noon; the horizon is two weeks and a day away, 342 fillers.
+NOW = datetime.datetime(2019, 6, 30, 12, tzinfo=OSLO)
+
+
+@pytest.fixture(autouse=True)
+def a_filler(monkeypatch: pytest.MonkeyPatch) -> None:
+    monkeypatch.setattr(draft.timezone, "now", lambda: NOW)
+    editor = User.objects.create(email="profiling-editor@example.test")
+    organization = Organization.objects.create(name="Profiled", fkmember=True, editor=editor)
+    Video.objects.create(
+        name="Profiled filler",
+        creator=editor,
+        organization=organization,
+        duration=datetime.timedelta(minutes=60),
+        proper_import=True,
+        is_filler=True,
+        has_tono_records=False,
+    )
+
+
+def test_the_summary_has_each_stage_with_its_queries(tmp_path: Path) -> None:
+    call_command("draft_broadcast_schedule", profile=str(tmp_path / "draft"))
+
+    summary = json.loads((tmp_path / "draft.json").read_text())
+    assert summary["command"] == "draft_broadcast_schedule"
+    assert summary["profiler"] == "sampling"
+    stages = {stage["stage"]: stage for stage in summary["stages"]}
+    assert list(stages) == [
+        "fill_next_weeks_agenda",
+        "fill_agenda_with_jukebox",
+        "fill_agenda_with_jukebox > candidate fetch",
+        "fill_agenda_with_jukebox > context seeding",
+        "fill_agenda_with_jukebox > selection",
+        "fill_agenda_with_jukebox > persistence",
+    ]
+    assert stages["fill_agenda_with_jukebox > candidate fetch"]["queries"] == 1
+    # An overlap check and an insert for each filler.
+    assert stages["fill_agenda_with_jukebox > persistence"]["queries"] == 2 * 342
+    assert summary["queries"] >= stages["fill_agenda_with_jukebox"]["queries"]
+    assert summary["seconds"] >= stages["fill_agenda_with_jukebox"]["seconds"]
+
+
+def test_the_samples_are_written_as_collapsed_stacks(tmp_path: Path) -> None:
+    call_command("fill_agenda_with_jukebox", profile=str(tmp_path / "jukebox"))
+
+    lines = (tmp_path / "jukebox.collapsed").read_text().splitlines()
+    assert lines
+    assert int(lines[0].rsplit(" ", 1)[1]) > 0
+    assert any("fill_agenda_with_jukebox (agenda/scheduling/jukebox.py:" in line for line in lines)
+
+
+def test_cprofile_writes_pstats(tmp_path: Path) -> None:
+    call_command("fill_agenda_with_jukebox", profile=str(tmp_path / "jukebox"), profiler="cprofile")
+
+    stats = pstats.Stats(str(tmp_path / "jukebox.pstats"))
+    assert any(name == "fill_agenda_with_jukebox" for _, _, name in stats.stats)  # type: ignore[attr-defined]
+    assert json.loads((tmp_path / "jukebox.json").read_text())["profile"].endswith(".pstats")
+
+
+def test_without_a_prefix_the_files_are_named_after_the_command(
+    tmp_path: Path, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    monkeypatch.chdir(tmp_path)
+
+    call_command("fill_next_weeks_agenda", "--profile")
+
+    (summary,) = tmp_path.glob("fill_next_weeks_agenda-*.json")
+    assert summary.with_suffix(".collapsed").exists()
@@ -0,0 +1,184 @@
+"""
+The schedule against the as-run log.
+
+Each kind of disagreement the report knows -- missed, late, truncated,
+unscheduled -- and the agreement it must stay quiet about, through the
+engine, the API and the admin page.
+"""
+
+from datetime import date, datetime, timedelta
+from zoneinfo import ZoneInfo
+
+import pytest
+from django.test import Client
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from agenda.reconciliation import reconcile_days
+from fk.models import AsRun, Organization, Scheduleitem, User, Video
+
+pytestmark = pytest.mark.django_db
+
+OSLO = ZoneInfo("Europe/Oslo")
+DAY = date(2015, 1, 1)
+EVENING = datetime(2015, 1, 1, 18, tzinfo=OSLO)
+
+
+@pytest.fixture
+def staff() -> User:
+    return User.objects.create(email="reconciliation-staff@example.test", is_superuser=True)
+
+
+@pytest.fixture
+def video(staff: User) -> Video:
+    organization = Organization.objects.create(name="Reconciled", editor=staff)
+    return Video.objects.create(name="Evening news", creator=staff, organization=organization)
+
+
+def scheduled(video: Video | None, start: datetime, minutes: int = 30, **fields) -> Scheduleitem:
+    return Scheduleitem.objects.create(
+        video=video,
+        starttime=start,
+        duration=timedelta(minutes=minutes),
+        schedulereason=Scheduleitem.REASON_ADMIN,
+        **fields,
+    )
+
+
+def played(video: Video | None, start: datetime, minutes: float = 30, **fields) -> AsRun:
+    return AsRun.objects.create(
+        video=video, played_at=start, out_ms=int(minutes * 60_000), **fields
+    )
+
+
+def kinds() -> list[str]:
+    return [found.kind for found in reconcile_days(DAY, DAY).discrepancies]
+
+
+def test_what_aired_as_scheduled_is_not_reported(video: Video) -> None:
+    scheduled(video, EVENING)
+    played(video, EVENING + timedelta(seconds=2))
+
+    assert kinds() == []
+
+
+def test_a_scheduled_item_that_never_aired_is_missed(video: Video) -> None:
+    item = scheduled(video, EVENING)
+
+    [missed] = reconcile_days(DAY, DAY).discrepancies
+
+    assert (missed.kind, missed.scheduleitem_id, missed.name) == ("missed", item.pk, video.name)
+
+
+def test_a_late_start_is_reported(video: Video) -> None:
+    scheduled(video, EVENING)
+    played(video, EVENING + timedelta(minutes=2), minutes=30)
+
+    # The two minutes it started late are two minutes of its airtime lost.
+    assert kinds() == ["late", "truncated"]
+
+
+def test_a_play_cut_short_is_truncated(video: Video) -> None:
+    scheduled(video, EVENING)
+    played(video, EVENING, minutes=20)
+
+    assert kinds() == ["truncated"]
+
+
+def test_a_play_overrunning_the_item_counts_only_its_part_inside(video: Video) -> None:
+    scheduled(video, EVENING)
+    played(video, EVENING, minutes=20)
+    # Restarted, and left running long past the item's end: five of its
+    # thirty minutes fill the item.
+    played(video, EVENING + timedelta(minutes=25), minutes=30)
+
+    assert kinds() == ["truncated"]
+
+
+def test_a_play_nothing_scheduled_is_unscheduled(video: Video) -> None:
+    scheduled(video, EVENING)
+    played(video, EVENING)
+    entry = played(None, EVENING + timedelta(hours=1), program_name="Breaking news")
+
+    [unscheduled] = reconcile_days(DAY, DAY).discrepancies
+
+    assert (unscheduled.kind, unscheduled.asrun_id) == ("unscheduled", entry.pk)
+    assert unscheduled.name == "Breaking news"
+
+
+def test_live_items_are_matched_by_name() -> None:
+    scheduled(None, EVENING, default_name="Live debate", is_live=True)
+    played(None, EVENING, program_name="Live debate")
+
+    assert kinds() == []
+
+
+def test_an_open_entry_runs_until_the_next_one(video: Video) -> None:
+    scheduled(video, EVENING)
+    AsRun.objects.create(video=video, played_at=EVENING, out_ms=None)
+    played(None, EVENING + timedelta(minutes=30), program_name="Ident", minutes=0.1)
+
+    assert kinds() == ["unscheduled"]
+
+
+def test_other_playouts_are_not_compared(video: Video) -> None:
+    scheduled(video, EVENING)
+    played(video, EVENING, playout="backup")
+
+    assert kinds() == ["missed"]
+
+
+def test_the_api_reports_to_staff(staff: User, video: Video) -> None:
+    scheduled(video, EVENING)
+    client = APIClient()
+    client.force_authenticate(user=staff)
+
+    response = client.get(
+        reverse("api-scheduling-reconciliation"), {"start": "2015-01-01", "end": "2015-01-01"}
+    )
+
+    assert response.status_code == status.HTTP_200_OK
+    assert response.json()["counts"] == {
+        "missed": 1,
+        "late": 0,
+        "truncated": 0,
+        "unscheduled": 0,
+    }
+    assert response.json()["discrepancies"][0]["scheduledStart"] == "2015-01-01T18:00:00+01:00"
+
+
+def test_the_api_is_staff_only(video: Video) -> None:
+    client = APIClient()
+    client.force_authenticate(user=User.objects.create(email="member@example.test"))
+
+    response = client.get(
+        reverse("api-scheduling-reconciliation"), {"start": "2015-01-01", "end": "2015-01-01"}
+    )
+
+    assert response.status_code == status.HTTP_403_FORBIDDEN
+
+
+def test_the_api_refuses_more_than_a_year(staff: User) -> None:
+    client = APIClient()
+    client.force_authenticate(user=staff)
+
+    response = client.get(
+        reverse("api-scheduling-reconciliation"), {"start": "2014-01-01", "end": "2015-06-01"}
+    )
+
+    assert response.status_code == status.HTTP_400_BAD_REQUEST
+    assert response.json()["errors"][0]["attr"] == "end"
+
+
+def test_the_admin_page_lists_the_discrepancies(staff: User, video: Video) -> None:
+    scheduled(video, EVENING)
+    client = Client()
+    client.force_login(staff)
+
+    response = client.get(
+        reverse("admin:fk_asrun_reconciliation"), {"start": "2015-01-01", "end": "2015-01-01"}
+    )
+
+    assert response.status_code == 200
+    assert "Missed: 1" in response.content.decode()
@@ -2,9 +2,11 @@
 Characterization tests for the XMLTV program guide feed.
 
 External EPG consumers parse this XML, so the contract is the parsed
-document: element names, attributes and text. Template whitespace is
-deliberately not part of it, which is why these tests assert on an
-ElementTree rather than on raw bytes.
+document: element names, attributes and text, which is what most of
+these tests assert on. One holds the bytes as well: the writer replaced
+a Django template, and its output is kept identical to what the template
+rendered, whitespace included, in case a consumer parses it with less
+care than an XML parser.
 """
 
 from datetime import datetime, time, timedelta
@@ -161,6 +163,74 @@ def test_upcoming_feed_spans_seven_days_from_today(video: Video) -> None:
     assert len(urls) == len(included)
 
 
+def test_the_feed_is_byte_for_byte_what_the_template_rendered(video: Video) -> None:
+    video.header = "Fish & <chips> for 'all' \"day\""
+    video.save()
+    schedule(video, datetime(2015, 1, 1, 12, tzinfo=OSLO))
+    schedule(
+        None,
+        datetime(2015, 1, 1, 13, tzinfo=OSLO),
+        default_name="Pause",
+        duration=timedelta(0),
+    )
+
+    response = Client().get(reverse("xmltv-feed", args=("2015", "01", "01")))
+
+    assert response.content.decode() == (
+        '<tv generator-info-name="fkweb.agenda.xmltv">\n'
+        '  <channel id="frikanalen.tv">\n'
+        "    \n"
+        "      <display-name>Frikanalen</display-name>\n"
+        "    \n"
+        "    <url>https://frikanalen.no</url>\n"
+        "  </channel>\n"
+        "  \n"
+        "    <programme\n"
+        '      channel="frikanalen.tv"\n'
+        '      start="20150101120000 +0100"\n'
+        '      stop="20150101130000 +0100">\n'
+        "    \n"
+        '      <title lang="no">Documentary</title>\n'
+        '      <desc lang="no">Fish &amp; &lt;chips&gt; for &#x27;all&#x27; &quot;day&quot;</desc>\n'
+        f"      <url>https://frikanalen.no/video/{video.id}/</url>\n"
+        '      <length units="seconds">3600</length>\n'
+        "    \n"
+        "    </programme>\n"
+        "  \n"
+        "    <programme\n"
+        '      channel="frikanalen.tv"\n'
+        '      start="20150101130000 +0100"\n'
+        '      stop="20150101130000 +0100">\n'
+        "    \n"
+        '      <title lang="no">Pause</title>\n'
+        '      <length units="seconds">0</length>\n'
+        "    \n"
+        "    </programme>\n"
+        "  \n"
+        "</tv>\n"
+    )
+
+
+def test_a_feed_is_one_query_however_long(video: Video, django_assert_num_queries) -> None:
+    for hour in range(24):
+        schedule(video, datetime(2015, 1, 1, hour, tzinfo=OSLO))
+
+    with django_assert_num_queries(1):
+        doc = fetch_feed(reverse("xmltv-feed", args=("2015", "01", "01")))
+
+    assert len(doc.findall("programme")) == 24
+
+
+def test_upcoming_feed_may_span_weeks(video: Video) -> None:
+    today = timezone.localdate()
+    schedule(video, datetime.combine(today + timedelta(days=20), time(12), tzinfo=OSLO))
+
+    doc = fetch_feed(reverse("xmltv-feed-upcoming") + "?days=21")
+
+    assert len(doc.findall("programme")) == 1
+    assert Client().get(reverse("xmltv-feed-upcoming") + "?days=32").status_code == 400
+
+
 def test_home_page_links_to_todays_feed() -> None:
     response = Client().get(reverse("xmltv-home"))
 
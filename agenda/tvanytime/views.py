@@ -21,6 +21,7 @@ from rest_framework.response import Response
 from rest_framework.views import APIView
 
 from fk.models import Scheduleitem
+from fkweb.slow_queries import stage
 
 from . import document
 
@@ -81,6 +82,7 @@ def _requested_days(request) -> int:
     return days
 
 
+@stage("TV-Anytime feed")
 def _render(request, start_date: date, days: int) -> Response:
     # The window is computed here rather than read back out of by_day() so
     # that the bounds published on the Schedule element are the same ones
@@ -3,11 +3,18 @@
 import datetime
 
 from django.conf import settings
+from django.http import HttpResponse, HttpResponseBadRequest
 from django.shortcuts import render
 from django.urls import reverse
 from django.utils import timezone
 
+from agenda import xmltv
 from fk.models import Scheduleitem
+from fkweb.slow_queries import stage
+
+DEFAULT_DAYS = 7
+# As for the TV-Anytime feed: past anything drafted, and one bounded scan.
+MAX_DAYS = 31
 
 
 def xmltv_home(request):
@@ -25,27 +32,36 @@ def xmltv_home(request):
     )
 
 
-def _xmltv(request, events):
-    """Program guide as XMLTV."""
-    return render(
-        request,
-        "agenda/xmltv.xml",
-        {
-            "channel_id": settings.CHANNEL_ID,
-            "channel_display_names": settings.CHANNEL_DISPLAY_NAMES,
-            "events": events,
-            "site_url": settings.SITE_URL,
-        },
-        content_type="application/xml",
-    )
+async def _xmltv(request, events):
+    """Program guide as XMLTV.
+
+    Written row by row, but handed over whole rather than streamed: the
+    page cache only keeps complete responses, and a week of programmes is
+    some tens of kilobytes.
+
+    The feeds are async views: they are polled by every EPG consumer on a
+    timer, and under ASGI (fkweb.asgi) the wait on the database costs no
+    thread. Under WSGI Django runs them in an event loop of their own,
+    for the same result as before.
+    """
+    with stage("XMLTV feed"):
+        rows = await xmltv.arows(events)
+    return HttpResponse(xmltv.write(rows), content_type="application/xml")
 
 
-def xmltv_upcoming(request):
-    events = Scheduleitem.objects.by_day(days=7).order_by("starttime")
-    return _xmltv(request, events)
+async def xmltv_upcoming(request):
+    """The coming week, or as many days as `?days=` asks for, up to MAX_DAYS."""
+    try:
+        days = int(request.GET.get("days", DEFAULT_DAYS))
+    except ValueError:
+        days = 0
+    if not 1 <= days <= MAX_DAYS:
+        return HttpResponseBadRequest(f"days must be a whole number from 1 to {MAX_DAYS}.")
+    events = Scheduleitem.objects.by_day(days=days).order_by("starttime")
+    return await _xmltv(request, events)
 
 
-def xmltv_date(request, year, month, day):
+async def xmltv_date(request, year, month, day):
     date = datetime.datetime(year=int(year), month=int(month), day=int(day), tzinfo=datetime.UTC)
     events = Scheduleitem.objects.by_day(date, days=1).order_by("starttime")
-    return _xmltv(request, events)
+    return await _xmltv(request, events)
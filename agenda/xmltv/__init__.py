@@ -0,0 +1,11 @@
+"""Frikanalen's schedule as XMLTV.
+
+A flat list of programme slots, kept for the consumers that have used it
+since long before the TV-Anytime feed existed.
+
+`document.rows` (or `document.arows`, from async code) reads schedule
+items and `document.write` turns them into the XML; `agenda.views`
+serves it.
+"""
+
+from .document import arows, rows, write  # noqa: F401
@@ -0,0 +1,48 @@
+"""Token authentication that remembers who a token belongs to.
+
+The ingest service and the playout tooling call the API many times a
+minute, each time with the same token, and TokenAuthentication answers
+every one of those calls with the same Token-and-User join. This keeps
+the answer in the cache for TOKEN_AUTH_CACHE_SECONDS instead.
+
+Anything that could change the answer drops it, once the change has
+committed: the token being deleted, and the user being saved -- which
+covers deactivation, User.anonymize and a change of privileges. A
+logout drops the token used to make it. The short lifetime is what
+bounds anything that slips past those, such as a queryset update().
+"""
+
+from hashlib import sha256
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from rest_framework.authentication import TokenAuthentication
+from rest_framework.authtoken.models import Token
+
+
+def _cache_key(key: str) -> str:
+    # Hashed so the credential itself never lands in the cache, where
+    # anything able to list keys could read it.
+    return "api.auth.token." + sha256(key.encode()).hexdigest()
+
+
+def forget_tokens(*keys: str) -> None:
+    """Drop the cached owners of these tokens once the transaction commits."""
+    if keys:
+        transaction.on_commit(lambda: cache.delete_many([_cache_key(key) for key in keys]))
+
+
+def forget_tokens_of(user) -> None:
+    forget_tokens(*Token.objects.filter(user_id=user.pk).values_list("key", flat=True))
+
+
+class CachingTokenAuthentication(TokenAuthentication):
+    def authenticate_credentials(self, key):
+        if not settings.TOKEN_AUTH_CACHE_SECONDS:
+            return super().authenticate_credentials(key)
+        cached = cache.get(_cache_key(key))
+        if cached is None:
+            cached = super().authenticate_credentials(key)
+            cache.set(_cache_key(key), cached, settings.TOKEN_AUTH_CACHE_SECONDS)
+        return cached
@@ -0,0 +1,109 @@
+"""Which organizations a user belongs to, looked up once per request.
+
+Every permission question in api.auth.permissions comes down to "is this
+user a member or the editor of that organization", and a request that
+touches many objects -- a page of program images, a batch of schedule
+edits -- used to ask the database once per object. The answer cannot
+change halfway through a request in any way a request should notice, so
+membership() loads it once, as two sets of organization ids, and every
+check after the first is a set lookup.
+
+Optionally the snapshot also outlives the request, in the cache, when
+MEMBERSHIP_CACHE_SECONDS is set. Entries are keyed by user and by a
+generation that any change to membership replaces, so an edit is seen
+by the next request rather than when the entry expires. Leave it off
+unless the cache is shared between processes: with the local-memory
+fallback, a worker never hears about a change made in another, and a
+removed member would keep their access until the entry expired.
+"""
+
+from collections.abc import Iterator
+from contextlib import contextmanager
+from contextvars import ContextVar
+from dataclasses import dataclass
+from uuid import uuid4
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models import Value
+
+GENERATION_KEY = "api.auth.membership.generation"
+
+# user pk -> Membership, for the request being served. None outside a
+# request (management commands, the shell), where nothing is memoized.
+_snapshots: ContextVar[dict[int, "Membership"] | None] = ContextVar(
+    "membership_snapshots", default=None
+)
+
+
+@dataclass(frozen=True)
+class Membership:
+    member_of: frozenset[int]
+    edits: frozenset[int]
+
+    @property
+    def organizations(self) -> frozenset[int]:
+        """Every organization the user may act for."""
+        return self.member_of | self.edits
+
+    def administers(self, organization_id: int) -> bool:
+        return organization_id in self.member_of or organization_id in self.edits
+
+
+NO_MEMBERSHIP = Membership(member_of=frozenset(), edits=frozenset())
+
+
+def membership(user) -> Membership:
+    """The organizations `user` is a member or the editor of."""
+    if not user.is_authenticated:
+        return NO_MEMBERSHIP
+    snapshots = _snapshots.get()
+    if snapshots is not None and user.pk in snapshots:
+        return snapshots[user.pk]
+    found = _cached(user) if settings.MEMBERSHIP_CACHE_SECONDS else _load(user)
+    if snapshots is not None:
+        snapshots[user.pk] = found
+    return found
+
+
+@contextmanager
+def request_scope() -> Iterator[None]:
+    """Memoize membership() for the duration of one request."""
+    token = _snapshots.set({})
+    try:
+        yield
+    finally:
+        _snapshots.reset(token)
+
+
+def forget_memberships() -> None:
+    """Invalidate every cached snapshot once the current transaction commits.
+
+    One generation for everybody rather than one per user: membership
+    changes are rare, and working out whose snapshots an edit to an
+    organization affects would take the query this is meant to save.
+    """
+    transaction.on_commit(lambda: cache.set(GENERATION_KEY, uuid4().hex, None))
+
+
+def _load(user) -> Membership:
+    rows = user.organization_set.values_list("pk", Value("member")).union(
+        user.editor.values_list("pk", Value("editor")), all=True
+    )
+    member_of, edits = set(), set()
+    for organization_id, role in rows:
+        (member_of if role == "member" else edits).add(organization_id)
+    return Membership(member_of=frozenset(member_of), edits=frozenset(edits))
+
+
+def _cached(user) -> Membership:
+    # A random generation rather than a counter: if the cache evicts it,
+    # the replacement cannot coincide with one that old entries carry.
+    generation = cache.get_or_set(GENERATION_KEY, lambda: uuid4().hex, None)
+    key = f"api.auth.membership.{user.pk}.{generation}"
+    found = cache.get(key)
+    if found is None:
+        found = _load(user)
+        cache.set(key, found, settings.MEMBERSHIP_CACHE_SECONDS)
+    return found
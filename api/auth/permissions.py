@@ -1,6 +1,8 @@
 from rest_framework import permissions
 from rest_framework.exceptions import PermissionDenied, ValidationError
 
+from api.auth.membership import membership
+
 
 def can_administer_organization(user, organization) -> bool:
     """
@@ -11,10 +13,7 @@ def can_administer_organization(user, organization) -> bool:
         return False
     if user.is_staff:
         return True
-    return (
-        organization.editor_id == user.pk
-        or user.organization_set.filter(pk=organization.pk).exists()
-    )
+    return organization.editor_id == user.pk or membership(user).administers(organization.pk)
 
 
 def can_schedule_for_organization(user, organization) -> bool:
@@ -140,7 +139,7 @@ class IsOrganizationEditorOrDisallow(permissions.IsAuthenticatedOrReadOnly):
         else:
             organization_id = obj.video.organization_id
         # User must be editor of organization to do changes
-        return request.user.editor.filter(id=organization_id).exists()
+        return organization_id in membership(request.user).edits
 
 
 class IsOrganizationEditorOrReadOnly(IsOrganizationEditorOrDisallow):
@@ -175,14 +174,11 @@ class IsInOrganizationOrDisallow(permissions.IsAuthenticatedOrReadOnly):
         # We expect either the object to have an organization directly
         # or have a video field with an organization.
         try:
-            organization = obj.organization
+            organization_id = obj.organization_id
         except AttributeError:
-            organization = obj.video.organization
+            organization_id = obj.video.organization_id
         # User must be part of organization to do changes
-        return (
-            organization.editor == request.user
-            or organization in request.user.organization_set.all()
-        )
+        return membership(request.user).administers(organization_id)
 
 
 class IsInOrganizationOrReadOnly(IsInOrganizationOrDisallow):
@@ -0,0 +1,112 @@
+"""
+The membership snapshot behind the permission classes.
+
+Loaded once per request however many objects are checked, and -- when
+the cross-request cache is on -- replaced as soon as anyone joins, leaves
+or takes over an organization.
+"""
+
+import pytest
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from api.auth.membership import membership, request_scope
+from fk.models import Organization, User, Video
+
+pytestmark = pytest.mark.django_db
+
+
+@pytest.fixture
+def shared_cache(real_cache, settings) -> None:
+    settings.MEMBERSHIP_CACHE_SECONDS = 300
+
+
+@pytest.fixture
+def user() -> User:
+    return User.objects.create(email="membership@example.test")
+
+
+def organization(name: str, **fields) -> Organization:
+    return Organization.objects.create(name=name, **fields)
+
+
+def test_members_and_editors_are_told_apart(user: User) -> None:
+    joined = organization("Joined")
+    joined.members.add(user)
+    edited = organization("Edited", editor=user)
+    organization("Neither")
+
+    found = membership(user)
+
+    assert found.member_of == {joined.pk}
+    assert found.edits == {edited.pk}
+    assert found.administers(joined.pk) and found.administers(edited.pk)
+
+
+def test_one_query_per_request_however_many_checks(user: User, django_assert_num_queries) -> None:
+    organization("Joined").members.add(user)
+
+    with request_scope(), django_assert_num_queries(1):
+        for _ in range(10):
+            membership(user)
+
+
+def test_outside_a_request_every_call_looks_again(user: User) -> None:
+    joined = organization("Joined")
+    assert not membership(user).administers(joined.pk)
+
+    joined.members.add(user)
+
+    assert membership(user).administers(joined.pk)
+
+
+@pytest.mark.usefixtures("shared_cache")
+def test_a_cached_snapshot_serves_the_next_request(user: User, django_assert_num_queries) -> None:
+    organization("Joined").members.add(user)
+    membership(user)
+
+    with django_assert_num_queries(0):
+        membership(user)
+
+
+@pytest.mark.usefixtures("shared_cache")
+def test_leaving_an_organization_is_seen_at_once(
+    user: User, django_capture_on_commit_callbacks
+) -> None:
+    joined = organization("Joined")
+    joined.members.add(user)
+    assert membership(user).administers(joined.pk)
+
+    with django_capture_on_commit_callbacks(execute=True):
+        joined.members.remove(user)
+
+    assert not membership(user).administers(joined.pk)
+
+
+@pytest.mark.usefixtures("shared_cache")
+def test_losing_the_editorship_is_seen_at_once(
+    user: User, django_capture_on_commit_callbacks
+) -> None:
+    edited = organization("Edited", editor=user)
+    assert edited.pk in membership(user).edits
+
+    with django_capture_on_commit_callbacks(execute=True):
+        edited.editor = None
+        edited.save()
+
+    assert edited.pk not in membership(user).edits
+
+
+def test_each_request_takes_its_own_snapshot(user: User) -> None:
+    # A client reusing one user object across requests, as the test
+    # client does, must still see a membership made in between.
+    other = organization("Other")
+    video = Video.objects.create(name="Foreign", creator=user, organization=other)
+    url = reverse("api-video-upload-token-detail", args=[video.pk])
+    client = APIClient()
+    client.force_authenticate(user=user)
+
+    assert client.get(url).status_code == status.HTTP_403_FORBIDDEN
+    other.members.add(user)
+    assert client.get(url).status_code == status.HTTP_200_OK
@@ -0,0 +1,117 @@
+"""
+Remembering who a token belongs to between requests.
+
+A repeated token skips the Token-and-User lookup; anything that changes
+what the lookup would say -- deleting the token, deactivating or
+anonymizing its owner, logging out with it -- makes the next request
+look again.
+"""
+
+import pytest
+from django.core.cache import cache
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.authtoken.models import Token
+from rest_framework.test import APIClient
+
+from api.auth.authentication import _cache_key
+from fk.models import User
+
+pytestmark = pytest.mark.django_db
+
+URL = reverse("api-user-detail")
+
+
+@pytest.fixture(autouse=True)
+def token_cache(real_cache, settings) -> None:
+    settings.TOKEN_AUTH_CACHE_SECONDS = 60
+
+
+@pytest.fixture
+def account() -> User:
+    return User.objects.create(email="token-cache@example.test")
+
+
+@pytest.fixture
+def token_client(account: User) -> APIClient:
+    client = APIClient()
+    client.credentials(HTTP_AUTHORIZATION=f"Token {account.auth_token.key}")
+    return client
+
+
+def test_a_repeated_token_is_not_looked_up_again(token_client: APIClient) -> None:
+    token_client.get(URL)
+
+    with CaptureQueriesContext(connection) as queries:
+        response = token_client.get(URL)
+
+    assert response.status_code == status.HTTP_200_OK
+    assert not [query for query in queries if "authtoken_token" in query["sql"]]
+
+
+def test_the_raw_token_is_not_a_cache_key(account: User, token_client: APIClient) -> None:
+    token_client.get(URL)
+
+    assert cache.get(_cache_key(account.auth_token.key)) is not None
+    assert cache.get(f"api.auth.token.{account.auth_token.key}") is None
+
+
+def test_a_deleted_token_stops_working(
+    account: User, token_client: APIClient, django_capture_on_commit_callbacks
+) -> None:
+    token_client.get(URL)
+
+    with django_capture_on_commit_callbacks(execute=True):
+        Token.objects.filter(user=account).delete()
+
+    assert token_client.get(URL).status_code == status.HTTP_401_UNAUTHORIZED
+
+
+def test_a_deactivated_user_is_refused(
+    account: User, token_client: APIClient, django_capture_on_commit_callbacks
+) -> None:
+    token_client.get(URL)
+
+    with django_capture_on_commit_callbacks(execute=True):
+        account.is_active = False
+        account.save()
+
+    assert token_client.get(URL).status_code == status.HTTP_401_UNAUTHORIZED
+
+
+def test_a_change_of_privileges_is_seen_at_once(
+    account: User, token_client: APIClient, django_capture_on_commit_callbacks
+) -> None:
+    token_client.get(URL)
+
+    with django_capture_on_commit_callbacks(execute=True):
+        account.is_superuser = True
+        account.save()
+
+    assert token_client.get(URL).json()["isStaff"] is True
+
+
+def test_deleting_the_account_retires_its_token(
+    token_client: APIClient, django_capture_on_commit_callbacks
+) -> None:
+    token_client.get(URL)
+
+    with django_capture_on_commit_callbacks(execute=True):
+        assert token_client.delete(URL).status_code == status.HTTP_204_NO_CONTENT
+
+    assert token_client.get(URL).status_code == status.HTTP_401_UNAUTHORIZED
+
+
+def test_logging_out_drops_the_cached_owner(
+    account: User, token_client: APIClient, django_capture_on_commit_callbacks
+) -> None:
+    token_client.get(URL)
+
+    with django_capture_on_commit_callbacks(execute=True):
+        token_client.post(reverse("api-user-logout"))
+
+    assert cache.get(_cache_key(account.auth_token.key)) is None
+    # Logging out of the session is not revoking the token.
+    assert token_client.get(URL).status_code == status.HTTP_200_OK
@@ -10,6 +10,7 @@ from rest_framework.permissions import AllowAny, IsAuthenticated
 from rest_framework.response import Response
 from rest_framework.throttling import AnonRateThrottle
 
+from api.auth.authentication import forget_tokens
 from api.auth.serializers import (
     LoginSerializer,
     LogoutSerializer,
@@ -80,6 +81,10 @@ class UserLogout(generics.GenericAPIView):
     @extend_schema(responses=LogoutSerializer)
     def post(self, request):
         logout(request)
+        # A token outlives the session it is presented alongside, but the
+        # cached record of whose it is need not.
+        if isinstance(request.auth, Token):
+            forget_tokens(request.auth.key)
         # Return a small JSON confirmation so the endpoint is documented and
         # the schema generator can describe its response type.
         return Response({"detail": "Logged out"})
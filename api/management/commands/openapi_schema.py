@@ -0,0 +1,22 @@
+from pathlib import Path
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from api.schema import write_schema
+
+
+class Command(BaseCommand):
+    help = "Generate the OpenAPI schema and write it where the API serves it from"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--file",
+            type=Path,
+            help="Where to write it (default: the OPENAPI_SCHEMA_FILE setting).",
+        )
+
+    def handle(self, *args, **options):
+        path = options["file"] or Path(settings.OPENAPI_SCHEMA_FILE)
+        write_schema(path)
+        self.stdout.write(f"Wrote {path}")
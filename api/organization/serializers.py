@@ -11,6 +11,10 @@ class OrganizationSerializer(serializers.ModelSerializer):
     editor_msisdn = serializers.SerializerMethodField()
     fkmember = serializers.BooleanField(read_only=True)
 
+    # Each of the three editor fields reads the editor on its own, with no
+    # state kept between them. A listing loads the editor along with the
+    # organization (select_related), as the organization and series views
+    # do, so that costs no query per field.
     def get_editor_email(self, obj: Organization) -> str | None:
         if obj.editor:
             return obj.editor.email
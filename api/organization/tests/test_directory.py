@@ -0,0 +1,112 @@
+"""
+The cost of the organization listing, and the anonymous directory cache.
+
+Editors come from the same query as their organizations. For anonymous
+callers the whole directory is serialized once and kept until an
+organization or a user is next saved.
+"""
+
+import pytest
+from django.urls import reverse
+from rest_framework.test import APIClient
+
+from fk.models import Organization, User
+
+pytestmark = pytest.mark.django_db
+
+URL = reverse("api-organization-list")
+
+
+@pytest.fixture
+def directory() -> list[Organization]:
+    organizations = []
+    for n in range(10):
+        editor = User.objects.create(
+            email=f"directory-editor-{n}@example.test", phone_number="+4741234567"
+        )
+        organizations.append(Organization.objects.create(name=f"Org {n:02d}", editor=editor))
+    return organizations
+
+
+def names(response) -> list[str]:
+    return [entry["name"] for entry in response.json()["results"]]
+
+
+def test_editors_are_loaded_with_their_organizations(
+    editor_client: APIClient, directory: list[Organization], django_assert_max_num_queries
+) -> None:
+    # The count and the page, not one editor per row.
+    with django_assert_max_num_queries(2):
+        response = editor_client.get(URL)
+
+    assert response.json()["results"][0]["editorMsisdn"] == "+47 41 23 45 67"
+
+
+@pytest.mark.usefixtures("real_cache")
+def test_anonymous_pages_come_from_the_cached_directory(
+    directory: list[Organization], django_assert_num_queries
+) -> None:
+    client = APIClient()
+    first = client.get(URL, {"limit": 5})
+
+    # A different URL, so the page cache cannot be what answers.
+    with django_assert_num_queries(0):
+        second = client.get(URL, {"limit": 5, "offset": 5})
+
+    assert names(first) + names(second) == [f"Org {n:02d}" for n in range(10)]
+    assert second.json()["count"] == 10
+
+
+@pytest.mark.usefixtures("real_cache")
+def test_a_renamed_organization_is_listed_by_its_new_name(
+    directory: list[Organization], django_capture_on_commit_callbacks
+) -> None:
+    client = APIClient()
+    client.get(URL)
+
+    with django_capture_on_commit_callbacks(execute=True):
+        directory[0].name = "Renamed"
+        directory[0].save()
+
+    assert "Renamed" in names(client.get(URL, {"offset": 0}))
+
+
+@pytest.mark.usefixtures("real_cache")
+def test_an_editor_edit_reaches_the_directory(
+    directory: list[Organization], django_capture_on_commit_callbacks
+) -> None:
+    client = APIClient()
+    client.get(URL)
+    editor = directory[0].editor
+    assert editor is not None
+
+    with django_capture_on_commit_callbacks(execute=True):
+        editor.first_name = "Grace"
+        editor.save()
+
+    listed = client.get(URL, {"offset": 0}).json()["results"]
+    assert listed[0]["editorName"].startswith("Grace")
+
+
+@pytest.mark.usefixtures("real_cache")
+def test_authenticated_callers_bypass_the_directory(
+    editor_client: APIClient, editor: User, directory: list[Organization]
+) -> None:
+    # Staff-only organizations are among what a signed-in staff user sees;
+    # the anonymous directory must not answer for them.
+    APIClient().get(URL)
+    Organization.objects.create(name="Without editor")
+    editor.is_superuser = True
+    editor.save()
+
+    assert "Without editor" in names(editor_client.get(URL, {"limit": 20}))
+
+
+@pytest.mark.usefixtures("real_cache")
+def test_anonymous_callers_can_order_the_directory(directory: list[Organization]) -> None:
+    client = APIClient()
+    client.get(URL)
+
+    response = client.get(URL, {"ordering": "-name", "limit": 3})
+
+    assert names(response) == ["Org 09", "Org 08", "Org 07"]
@@ -1,9 +1,21 @@
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
 from rest_framework import generics
 
 from api.auth.permissions import IsOrganizationEditorOrReadOnly
 from api.organization.serializers import OrganizationSerializer
 from api.pagination import FkDefaultPagination
 from fk.models import Organization
+from fkweb.middleware import CacheVisibility
+
+# Every organization an anonymous caller may see, already serialized.
+PUBLIC_DIRECTORY_KEY = "api.organization.public_directory"
+
+
+def forget_public_directory() -> None:
+    """Drop the cached directory once the current transaction commits."""
+    transaction.on_commit(lambda: cache.delete(PUBLIC_DIRECTORY_KEY))
 
 
 class OrganizationList(generics.ListCreateAPIView):
@@ -11,11 +23,28 @@ class OrganizationList(generics.ListCreateAPIView):
     serializer_class = OrganizationSerializer
     pagination_class = FkDefaultPagination
     permission_classes = (IsOrganizationEditorOrReadOnly,)
+    cache_visibility = CacheVisibility.STAFF
 
     def get_queryset(self):
         # An organization with no ansvarlig redaktor is staff-only until
         # one is appointed; see OrganizationQuerySet.
-        return Organization.objects.visible_to(self.request.user)
+        return Organization.objects.visible_to(self.request.user).select_related("editor")
+
+    def list(self, request, *args, **kwargs):
+        paging = {self.paginator.limit_query_param, self.paginator.offset_query_param}
+        if request.user.is_authenticated or set(request.query_params) - paging:
+            return super().list(request, *args, **kwargs)
+        # The public directory is the same for every anonymous caller and
+        # changes a few times a year, so it is serialized once and paged
+        # from memory until an organization or a user is next saved (see
+        # fkweb.signals). The timeout is only a backstop. Only the whole
+        # directory is kept: ordered or filtered, it is asked of the
+        # database as for anyone else.
+        directory = cache.get(PUBLIC_DIRECTORY_KEY)
+        if directory is None:
+            directory = list(self.get_serializer(self.get_queryset(), many=True).data)
+            cache.set(PUBLIC_DIRECTORY_KEY, directory, settings.CACHE_MIDDLEWARE_SECONDS)
+        return self.get_paginated_response(self.paginate_queryset(directory))
 
     def perform_create(self, serializer):
         serializer.save(editor=self.request.user)
@@ -29,6 +58,7 @@ class OrganizationDetail(generics.RetrieveUpdateDestroyAPIView):
     queryset = Organization.objects.all()
     serializer_class = OrganizationSerializer
     permission_classes = (IsOrganizationEditorOrReadOnly,)
+    cache_visibility = CacheVisibility.STAFF
 
     def get_queryset(self):
-        return Organization.objects.visible_to(self.request.user)
+        return Organization.objects.visible_to(self.request.user).select_related("editor")
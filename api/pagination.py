@@ -1,4 +1,4 @@
-from rest_framework.pagination import LimitOffsetPagination
+from rest_framework.pagination import CursorPagination, LimitOffsetPagination
 
 
 class FkDefaultPagination(LimitOffsetPagination):
@@ -8,3 +8,18 @@ class FkDefaultPagination(LimitOffsetPagination):
 
 class FkSchedulePagination(FkDefaultPagination):
     default_limit = 200
+
+
+class FkFeedPagination(CursorPagination):
+    """Newest first, a page at a time, for lists that only ever grow at the top.
+
+    A cursor rather than an offset: the page after the first stays put
+    when something new is published while a reader is paging, and reading
+    far back costs an index range scan instead of counting past everything
+    skipped. The id breaks ties between rows created in the same instant.
+    """
+
+    page_size = 20
+    page_size_query_param = "page_size"
+    max_page_size = 100
+    ordering = ("-created", "-id")
@@ -0,0 +1,32 @@
+import json
+
+from django.conf import settings
+from djangorestframework_camel_case.settings import api_settings
+from djangorestframework_camel_case.util import underscoreize
+from rest_framework.exceptions import ParseError
+from rest_framework.parsers import BaseParser
+
+
+class CamelCaseNDJSONParser(BaseParser):
+    """Newline-delimited JSON: one object per line, parsed into a list.
+
+    For the append-only logs that clients write as they go, where a JSON
+    array would have to be held open until the last entry. Blank lines
+    are skipped; keys are underscoreized as CamelCaseJSONParser does.
+    """
+
+    media_type = "application/x-ndjson"
+
+    def parse(self, stream, media_type=None, parser_context=None):
+        parser_context = parser_context or {}
+        encoding = parser_context.get("encoding", settings.DEFAULT_CHARSET)
+
+        rows = []
+        for number, line in enumerate(stream.read().decode(encoding).splitlines(), start=1):
+            if not line.strip():
+                continue
+            try:
+                rows.append(json.loads(line))
+            except ValueError as exc:
+                raise ParseError(f"NDJSON parse error on line {number} - {exc}") from exc
+        return underscoreize(rows, **api_settings.JSON_UNDERSCOREIZE)
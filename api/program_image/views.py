@@ -10,6 +10,7 @@ from api.program_image.serializers import (
     ProgramImageSerializer,
 )
 from fk.models import ProgramImage, Video
+from fkweb.middleware import CacheVisibility
 
 
 class ProgramImageFilter(djfilters.FilterSet):
@@ -25,6 +26,7 @@ class ProgramImageViewSet(viewsets.ModelViewSet):
     pagination_class = FkDefaultPagination
     filterset_class = ProgramImageFilter
     permission_classes = (IsInOrganizationOrReadOnly,)
+    cache_visibility = CacheVisibility.STAFF
 
     def get_serializer_class(self):
         if self.action == "create":
@@ -1,10 +1,16 @@
+from datetime import timedelta
 from zoneinfo import ZoneInfo
 
 from django.db import transaction
+from django.utils import timezone
 from drf_spectacular.utils import extend_schema_field
 from rest_framework import serializers
+from rest_framework.exceptions import PermissionDenied
 
+from agenda import reconciliation
 from agenda.scheduling import policy
+from api.auth.permissions import RequireSchedulingEligibility, can_schedule_for_organization
+from api.serializers import BatchListSerializer
 from fk.models import (
     AsRun,
     Category,
@@ -17,6 +23,7 @@ from fk.models import (
     WeeklySlotSource,
     airtime_end,
 )
+from fk.models.airtime import AIRTIME_GROUPINGS, schedule_changed
 
 OSLO = ZoneInfo("Europe/Oslo")
 
@@ -174,6 +181,286 @@ class ScheduleitemModifySerializer(serializers.ModelSerializer):
         policy.displace(displaceable)
 
 
+# A day of programming is a few dozen items, and a page of the schedule
+# listing is 200. The whole batch is held under one set of row locks, so
+# it is kept to something a transaction can finish promptly.
+BATCH_MAX_OPERATIONS = 200
+
+
+class ScheduleitemBatchListSerializer(BatchListSerializer):
+    """Resolves, authorizes and applies a batch of schedule operations.
+
+    What ScheduleitemModifySerializer, RequireSchedulingEligibility and
+    CanScheduleForOrganizationOrReadOnly decide for one item per request,
+    decided here for all of them together: the items and videos named are
+    fetched in one query each, eligibility is asked once per organization,
+    and the window is computed once. Conflicts are left to save(), which
+    resolves every placement against one locked range query.
+
+    Nothing is written unless every operation succeeds.
+    """
+
+    max_items = BATCH_MAX_OPERATIONS
+
+    def to_internal_value(self, data):
+        operations = super().to_internal_value(data)
+        errors: list[dict] = [{} for _ in operations]
+        user = self.context["request"].user
+
+        seen: set[int] = set()
+        for index, operation in enumerate(operations):
+            if "id" in operation:
+                if operation["id"] in seen:
+                    errors[index]["id"] = ["The same item may only appear once."]
+                seen.add(operation["id"])
+        self.raise_if_any(errors)
+
+        items = Scheduleitem.objects.select_related("video__organization").in_bulk(seen)
+        videos = Video.objects.select_related("organization").in_bulk(
+            {op["video"] for op in operations if op.get("video") is not None}
+        )
+        for index, operation in enumerate(operations):
+            if "id" in operation and operation["id"] not in items:
+                errors[index]["id"] = ["No such schedule item."]
+            if operation.get("video") is not None and operation["video"] not in videos:
+                errors[index]["video"] = [
+                    f'Invalid pk "{operation["video"]}" - object does not exist.'
+                ]
+        self.raise_if_any(errors)
+
+        for operation in operations:
+            if "id" in operation:
+                operation["instance"] = items[operation.pop("id")]
+            if "video" in operation and operation["video"] is not None:
+                operation["video"] = videos[operation["video"]]
+
+        if not user.is_staff:
+            self._authorize(operations, errors)
+            self.raise_if_any(errors)
+        for operation in operations:
+            if operation["op"] == "delete":
+                continue
+            if user.is_staff:
+                if operation["op"] == "create":
+                    operation.setdefault("schedulereason", Scheduleitem.REASON_ADMIN)
+            else:
+                operation["schedulereason"] = Scheduleitem.REASON_USER
+        return operations
+
+    def _authorize(self, operations: list[dict], errors: list[dict]) -> None:
+        """The member-side rules, with each organization asked about once."""
+        user = self.context["request"].user
+        eligible: dict[int, bool] = {}
+
+        def may_schedule(video) -> bool:
+            if video is None:
+                return False
+            organization = video.organization
+            if organization.pk not in eligible:
+                eligible[organization.pk] = can_schedule_for_organization(user, organization)
+            return eligible[organization.pk]
+
+        now = timezone.now()
+        boundary = policy.freeze_boundary(now)
+        horizon = policy.scheduling_horizon(now)
+        for index, operation in enumerate(operations):
+            instance = operation.get("instance")
+            # The object permission, for the item as it stands...
+            if instance is not None and not may_schedule(instance.video):
+                raise PermissionDenied(RequireSchedulingEligibility.message)
+            # ...and eligibility for whatever video it is pointed at.
+            if "video" in operation or operation["op"] == "create":
+                video = operation.get("video")
+                if not may_schedule(video):
+                    raise PermissionDenied(RequireSchedulingEligibility.message)
+                if not video.proper_import:
+                    errors[index]["video"] = [
+                        "The video must finish processing before it can be scheduled."
+                    ]
+
+            # Both ends of a move must be open airtime; so must whatever a
+            # delete removes and wherever a create lands.
+            positions = []
+            if instance is not None:
+                positions.append((instance.starttime, instance.duration))
+            if operation["op"] != "delete":
+                positions.append(_position(operation))
+            for starttime, duration in positions:
+                if starttime is None or duration is None:
+                    continue
+                if not policy.is_open_airtime(starttime, airtime_end(starttime, duration), now):
+                    errors[index]["starttime"] = [
+                        policy.scheduling_window_message(boundary, horizon)
+                    ]
+                    break
+
+    def create(self, validated_data):
+        """Apply the batch in one transaction; returns one result per operation.
+
+        Deletions and moves vacate their current airtime first, so a batch
+        may shift a whole evening along without its items colliding with
+        where they used to be. Every create and move is then checked
+        against one locked range query covering all of them, and against
+        the other placements in the batch. Jukebox fillers in the way are
+        displaced, as they are for a single item.
+        """
+        placements = [
+            (index, operation)
+            for index, operation in enumerate(validated_data)
+            if operation["op"] != "delete" and _position(operation)[0] is not None
+        ]
+        vacating = {
+            operation["instance"].pk for operation in validated_data if "instance" in operation
+        }
+        intervals = []
+        for _index, operation in placements:
+            start, duration = _position(operation)
+            intervals.append((start, airtime_end(start, duration)))
+
+        errors: list[dict] = [{} for _ in validated_data]
+        with transaction.atomic():
+            conflicts = policy.batch_airtime_conflicts(intervals, vacating=vacating)
+            displaced: set[int] = set()
+            for position, ((index, _operation), (blocking, displaceable)) in enumerate(
+                zip(placements, conflicts, strict=True)
+            ):
+                start, end = intervals[position]
+                if blocking:
+                    errors[index]["duration"] = [f"Conflict with '{blocking[0]}'."]
+                    continue
+                for earlier, (other_start, other_end) in enumerate(intervals[:position]):
+                    if _overlap(start, end, other_start, other_end):
+                        errors[index]["duration"] = [
+                            f"Conflict with item {placements[earlier][0]} of this batch."
+                        ]
+                        break
+                displaced.update(item.pk for item in displaceable)
+            self.raise_if_any(errors)
+
+            deleted = {
+                operation["instance"].pk
+                for operation in validated_data
+                if operation["op"] == "delete"
+            }
+            if deleted or displaced:
+                Scheduleitem.objects.filter(pk__in=deleted | displaced).delete()
+
+            created, moved = [], []
+            for operation in validated_data:
+                if operation["op"] == "create":
+                    operation["instance"] = Scheduleitem(
+                        **{field: operation[field] for field in _FIELDS if field in operation}
+                    )
+                    created.append(operation["instance"])
+                elif operation["op"] == "update":
+                    instance = operation["instance"]
+                    for field in _FIELDS:
+                        if field in operation:
+                            setattr(instance, field, operation[field])
+                    # A human edit makes the item deliberate programming;
+                    # see ScheduleitemModifySerializer.update().
+                    instance.weekly_slot = None
+                    moved.append(instance)
+            # Neither bulk write sends signals; deletions above did. A moved
+            # item's airtime is still where it was until the re-read below.
+            schedule_changed(
+                *(item.starttime for item in [*created, *moved]),
+                *(item.airtime.lower for item in moved if item.airtime),
+            )
+            # airtime is generated, and bulk_create reads it back through
+            # RETURNING; bulk_update does not, hence the re-read below.
+            Scheduleitem.objects.bulk_create(created)
+            if moved:
+                Scheduleitem.objects.bulk_update(moved, [*_FIELDS, "weekly_slot"])
+                airtimes = dict(
+                    Scheduleitem.objects.filter(pk__in=[item.pk for item in moved]).values_list(
+                        "pk", "airtime"
+                    )
+                )
+                for item in moved:
+                    item.airtime = airtimes[item.pk]
+        return [
+            {
+                "op": operation["op"],
+                "id": operation["instance"].pk,
+                "item": operation["instance"] if operation["op"] != "delete" else None,
+            }
+            for operation in validated_data
+        ]
+
+
+# What an operation may set on an item; the rest is provenance.
+_FIELDS = ("video", "schedulereason", "starttime", "duration")
+
+
+def _overlap(start, end, other_start, other_end) -> bool:
+    """Whether two half-open intervals share airtime; empty ones share none."""
+    return start < end and other_start < other_end and start < other_end and other_start < end
+
+
+def _position(operation: dict):
+    """Where an operation leaves its item: (starttime, duration)."""
+    instance = operation.get("instance")
+    return (
+        operation.get("starttime", instance and instance.starttime),
+        operation.get("duration", instance and instance.duration),
+    )
+
+
+class ScheduleitemBatchOperationSerializer(serializers.Serializer):
+    """One step of a batch: create, move or edit, or delete an item."""
+
+    OPERATIONS = ("create", "update", "delete")
+
+    op = serializers.ChoiceField(choices=OPERATIONS)
+    id = serializers.IntegerField(
+        required=False, help_text="The item to update or delete. Not given for create."
+    )
+    # A plain id, resolved for the whole batch at once by the list
+    # serializer rather than looked up entry by entry.
+    video = serializers.IntegerField(required=False, allow_null=True)
+    schedulereason = serializers.ChoiceField(
+        choices=Scheduleitem.SCHEDULE_REASONS,
+        required=False,
+        help_text="Staff may choose provenance. Member writes are always recorded as User.",
+    )
+    starttime = serializers.DateTimeField(default_timezone=OSLO, required=False)
+    duration = serializers.DurationField(required=False, min_value=timedelta(0))
+
+    class Meta:
+        list_serializer_class = ScheduleitemBatchListSerializer
+
+    def validate(self, data):
+        op = data["op"]
+        if op == "create":
+            if "id" in data:
+                raise serializers.ValidationError({"id": "A new item has no id yet."})
+            missing = {
+                field: "This field is required."
+                for field in ("starttime", "duration")
+                if field not in data
+            }
+            if missing:
+                raise serializers.ValidationError(missing)
+        elif "id" not in data:
+            raise serializers.ValidationError({"id": f"Required to {op} an item."})
+        if op == "delete":
+            extra = set(data) - {"op", "id"}
+            if extra:
+                raise serializers.ValidationError(
+                    {field: "A delete takes nothing but the id." for field in sorted(extra)}
+                )
+        return data
+
+
+class ScheduleitemBatchResultSerializer(serializers.Serializer):
+    """What became of one operation: the item as saved, or null if deleted."""
+
+    op = serializers.ChoiceField(choices=ScheduleitemBatchOperationSerializer.OPERATIONS)
+    id = serializers.IntegerField()
+    item = ScheduleitemModifySerializer(allow_null=True)
+
+
 class ScheduleitemReadSerializer(serializers.ModelSerializer):
     video = ScheduleitemVideoSerializer(allow_null=True)
     starttime = serializers.DateTimeField(default_timezone=OSLO)
@@ -281,3 +568,170 @@ class AsRunSerializer(serializers.ModelSerializer):
             "in_ms",
             "out_ms",
         )
+
+
+# A few hours of playout log at a row per item and per interruption, which
+# is what a backfill after an outage amounts to. The batch is one
+# transaction.
+ASRUN_APPEND_MAX_ROWS = 5000
+
+
+class AsRunAppendListSerializer(BatchListSerializer):
+    """Appends a batch of playout log entries in a handful of statements.
+
+    The videos named are checked with one query for the whole batch, and
+    the rows go in with bulk_create. Entries that are already logged --
+    the same playout, start and video or programme name, see the
+    asrun_unique_entry constraint -- are skipped, so a batch that is sent
+    again after a timeout adds only what did not arrive the first time.
+    """
+
+    max_items = ASRUN_APPEND_MAX_ROWS
+
+    def to_internal_value(self, data):
+        rows = super().to_internal_value(data)
+        named = {row["video_id"] for row in rows if row.get("video_id") is not None}
+        known = set(Video.objects.filter(pk__in=named).values_list("pk", flat=True))
+        self.raise_if_any(
+            [
+                {"video": [f'Invalid pk "{row["video_id"]}" - object does not exist.']}
+                if row.get("video_id") is not None and row["video_id"] not in known
+                else {}
+                for row in rows
+            ]
+        )
+        return rows
+
+    def create(self, validated_data):
+        with transaction.atomic():
+            return AsRun.objects.bulk_create(
+                [AsRun(**row) for row in validated_data],
+                batch_size=1000,
+                ignore_conflicts=True,
+            )
+
+
+class AsRunAppendSerializer(serializers.ModelSerializer):
+    """One entry of a bulk append to the playout log.
+
+    Unlike a single POST, `playedAt` is required: defaulting it to the time
+    of arrival would make a resent entry a new one.
+    """
+
+    # By id, and checked for the whole batch in AsRunAppendListSerializer
+    # rather than with a query per row.
+    video = serializers.IntegerField(source="video_id", required=False, allow_null=True)
+    played_at = serializers.DateTimeField()
+
+    class Meta:
+        model = AsRun
+        list_serializer_class = AsRunAppendListSerializer
+        fields = (
+            "video",
+            "program_name",
+            "playout",
+            "played_at",
+            "in_ms",
+            "out_ms",
+        )
+        # Duplicates are skipped on insert, not refused row by row.
+        validators = []
+
+
+class AsRunAppendResultSerializer(serializers.Serializer):
+    received = serializers.IntegerField(
+        help_text="How many entries the batch held, including any that were already logged."
+    )
+
+
+class ReconciliationQuerySerializer(serializers.Serializer):
+    """The days a reconciliation report covers."""
+
+    start = serializers.DateField(help_text="The first day to compare, Europe/Oslo.")
+    end = serializers.DateField(help_text="The last day to compare, inclusive.")
+    playout = serializers.CharField(
+        default="main", max_length=255, help_text="The playout whose log to compare."
+    )
+
+    def validate(self, data):
+        if data["end"] < data["start"]:
+            raise serializers.ValidationError({"end": "The report cannot end before it starts."})
+        if data["end"] - data["start"] >= reconciliation.LONGEST_WINDOW:
+            raise serializers.ValidationError(
+                {"end": f"A report covers at most {reconciliation.LONGEST_WINDOW.days} days."}
+            )
+        return data
+
+
+class DiscrepancySerializer(serializers.Serializer):
+    kind = serializers.ChoiceField(choices=reconciliation.KINDS)
+    scheduleitem = serializers.IntegerField(
+        source="scheduleitem_id",
+        allow_null=True,
+        help_text="The schedule item concerned; null for an unscheduled play.",
+    )
+    asrun = serializers.IntegerField(
+        source="asrun_id",
+        allow_null=True,
+        help_text="The as-run entry concerned, for an unscheduled play.",
+    )
+    video = serializers.IntegerField(source="video_id", allow_null=True)
+    name = serializers.CharField()
+    scheduled_start = serializers.DateTimeField(default_timezone=OSLO, allow_null=True)
+    scheduled_end = serializers.DateTimeField(default_timezone=OSLO, allow_null=True)
+    played_start = serializers.DateTimeField(
+        default_timezone=OSLO,
+        allow_null=True,
+        help_text="When the first play accounting for the item began; null if it was missed.",
+    )
+    played_end = serializers.DateTimeField(default_timezone=OSLO, allow_null=True)
+
+
+class ReconciliationSerializer(serializers.Serializer):
+    start = serializers.DateTimeField(default_timezone=OSLO)
+    end = serializers.DateTimeField(default_timezone=OSLO)
+    playout = serializers.CharField()
+    counts = serializers.DictField(
+        child=serializers.IntegerField(),
+        help_text="How many of each kind of discrepancy were found.",
+    )
+    discrepancies = DiscrepancySerializer(many=True)
+
+
+class AirtimeStatisticsQuerySerializer(serializers.Serializer):
+    """The days, and the breakdown, of a scheduled airtime report."""
+
+    start = serializers.DateField(help_text="The first day to count, Europe/Oslo.")
+    end = serializers.DateField(help_text="The last day to count, inclusive.")
+    by = serializers.ChoiceField(
+        choices=AIRTIME_GROUPINGS,
+        default="organization",
+        help_text="What to break the airtime down by, besides schedule reason.",
+    )
+
+    def validate(self, data):
+        if data["end"] < data["start"]:
+            raise serializers.ValidationError({"end": "The report cannot end before it starts."})
+        return data
+
+
+class AirtimeRowSerializer(serializers.Serializer):
+    id = serializers.IntegerField(
+        source="group_id",
+        allow_null=True,
+        help_text=(
+            "The organization or category, as `by` says. Null when `by` is reason, "
+            "and for airtime without a video, which belongs to no organization."
+        ),
+    )
+    name = serializers.CharField(source="group_name", allow_null=True)
+    schedulereason = serializers.ChoiceField(choices=Scheduleitem.SCHEDULE_REASONS)
+    items = serializers.IntegerField(help_text="How many items were scheduled.")
+    airtime = serializers.DurationField(help_text="Their combined duration.")
+
+
+class AirtimeStatisticsSerializer(serializers.Serializer):
+    start = serializers.DateField()
+    end = serializers.DateField()
+    by = serializers.ChoiceField(choices=AIRTIME_GROUPINGS)
+    rows = AirtimeRowSerializer(many=True)
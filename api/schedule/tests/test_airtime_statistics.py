@@ -0,0 +1,254 @@
+"""
+Scheduled airtime statistics, and the daily rollups they are read from.
+
+Every schedule write rolls the days it touched up again once it commits
+-- single items through signals, batches explicitly -- as does moving or
+recategorizing a video for the days it is scheduled on, and
+rebuild_schedule_airtime redoes any range of days from the schedule.
+"""
+
+from datetime import date, datetime, timedelta
+from io import StringIO
+from zoneinfo import ZoneInfo
+
+import pytest
+from django.core.management import call_command
+from django.db import transaction
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from fk.models import (
+    Category,
+    Organization,
+    ScheduledAirtime,
+    ScheduledCategoryAirtime,
+    Scheduleitem,
+    Video,
+)
+from fk.models import airtime as airtime_module
+
+pytestmark = pytest.mark.django_db
+
+OSLO = ZoneInfo("Europe/Oslo")
+EVENING = datetime(2015, 1, 1, 18, tzinfo=OSLO)
+URL = reverse("api-scheduling-airtime")
+
+
+def place(video: Video | None, starttime: datetime, reason: int, hours: int = 1) -> Scheduleitem:
+    return Scheduleitem.objects.create(
+        video=video,
+        starttime=starttime,
+        duration=timedelta(hours=hours),
+        schedulereason=reason,
+        default_name="" if video else "Live",
+    )
+
+
+def rolled_up() -> dict:
+    return {
+        (row.day, row.schedulereason, row.organization_id): (row.items, row.airtime)
+        for row in ScheduledAirtime.objects.all()
+    }
+
+
+def test_placing_items_rolls_their_day_up(
+    video: Video, organization: Organization, django_capture_on_commit_callbacks
+) -> None:
+    with django_capture_on_commit_callbacks(execute=True):
+        place(video, EVENING, Scheduleitem.REASON_JUKEBOX)
+        place(video, EVENING + timedelta(hours=1), Scheduleitem.REASON_JUKEBOX, hours=2)
+        # 00:30 in Oslo is still the 1st in UTC; it belongs to the 2nd.
+        place(None, datetime(2015, 1, 2, 0, 30, tzinfo=OSLO), Scheduleitem.REASON_ADMIN)
+
+    assert rolled_up() == {
+        (date(2015, 1, 1), Scheduleitem.REASON_JUKEBOX, organization.pk): (2, timedelta(hours=3)),
+        (date(2015, 1, 2), Scheduleitem.REASON_ADMIN, None): (1, timedelta(hours=1)),
+    }
+
+
+def test_a_move_rolls_up_the_day_left_as_well(
+    video: Video, organization: Organization, django_capture_on_commit_callbacks
+) -> None:
+    with django_capture_on_commit_callbacks(execute=True):
+        item = place(video, EVENING, Scheduleitem.REASON_USER)
+    with django_capture_on_commit_callbacks(execute=True):
+        item.starttime += timedelta(days=1)
+        item.save()
+
+    assert list(rolled_up()) == [(date(2015, 1, 2), Scheduleitem.REASON_USER, organization.pk)]
+
+
+def test_a_deletion_is_rolled_up(video: Video, django_capture_on_commit_callbacks) -> None:
+    with django_capture_on_commit_callbacks(execute=True):
+        item = place(video, EVENING, Scheduleitem.REASON_USER)
+    with django_capture_on_commit_callbacks(execute=True):
+        item.delete()
+
+    assert rolled_up() == {}
+
+
+def test_a_transaction_rolls_each_day_up_once(
+    video: Video, monkeypatch: pytest.MonkeyPatch, django_capture_on_commit_callbacks
+) -> None:
+    calls = []
+    monkeypatch.setattr(airtime_module, "roll_up_schedule", calls.append)
+
+    with django_capture_on_commit_callbacks(execute=True), transaction.atomic():
+        for hour in range(5):
+            place(video, EVENING + timedelta(hours=hour), Scheduleitem.REASON_JUKEBOX)
+
+    assert calls == [{date(2015, 1, 1)}]
+
+
+@pytest.mark.usefixtures("now_in_the_drafting_week")
+def test_batches_are_rolled_up(
+    authenticated_client: APIClient,
+    video: Video,
+    organization: Organization,
+    django_capture_on_commit_callbacks,
+) -> None:
+    with django_capture_on_commit_callbacks(execute=True):
+        moved = place(video, EVENING, Scheduleitem.REASON_ADMIN)
+    with django_capture_on_commit_callbacks(execute=True):
+        response = authenticated_client.post(
+            reverse("api-scheduleitem-batch"),
+            [
+                {
+                    "op": "update",
+                    "id": moved.pk,
+                    "starttime": (EVENING + timedelta(days=1)).isoformat(),
+                },
+                {
+                    "op": "create",
+                    "video": video.pk,
+                    "starttime": (EVENING + timedelta(days=2)).isoformat(),
+                    "duration": "01:00:00",
+                },
+            ],
+            format="json",
+        )
+
+    assert response.status_code == status.HTTP_200_OK
+    assert sorted(day for day, _reason, _organization in rolled_up()) == [
+        date(2015, 1, 2),
+        date(2015, 1, 3),
+    ]
+
+
+@pytest.fixture
+def a_week_scheduled(video: Video, django_capture_on_commit_callbacks) -> None:
+    video.categories.add(Category.objects.create(id=90, name="Debatt"))
+    with django_capture_on_commit_callbacks(execute=True):
+        for day in range(7):
+            place(video, EVENING + timedelta(days=day), Scheduleitem.REASON_JUKEBOX)
+        place(video, EVENING + timedelta(hours=2), Scheduleitem.REASON_USER, hours=2)
+        place(None, EVENING + timedelta(hours=5), Scheduleitem.REASON_ADMIN)
+
+
+@pytest.mark.usefixtures("a_week_scheduled")
+def test_airtime_per_organization(organization: Organization) -> None:
+    response = APIClient().get(URL, {"start": "2015-01-01", "end": "2015-01-03"})
+
+    assert response.status_code == status.HTTP_200_OK
+    assert response.json()["rows"] == [
+        {
+            "id": organization.pk,
+            "name": organization.name,
+            "schedulereason": Scheduleitem.REASON_USER,
+            "items": 1,
+            "airtime": "02:00:00",
+        },
+        {
+            "id": organization.pk,
+            "name": organization.name,
+            "schedulereason": Scheduleitem.REASON_JUKEBOX,
+            "items": 3,
+            "airtime": "03:00:00",
+        },
+        {
+            "id": None,
+            "name": None,
+            "schedulereason": Scheduleitem.REASON_ADMIN,
+            "items": 1,
+            "airtime": "01:00:00",
+        },
+    ]
+
+
+@pytest.mark.usefixtures("a_week_scheduled")
+def test_airtime_per_reason_and_per_category() -> None:
+    client = APIClient()
+
+    per_reason = client.get(URL, {"start": "2015-01-01", "end": "2015-01-07", "by": "reason"})
+    per_category = client.get(URL, {"start": "2015-01-01", "end": "2015-01-07", "by": "category"})
+
+    assert [(row["schedulereason"], row["items"]) for row in per_reason.json()["rows"]] == [
+        (Scheduleitem.REASON_ADMIN, 1),
+        (Scheduleitem.REASON_USER, 1),
+        (Scheduleitem.REASON_JUKEBOX, 7),
+    ]
+    assert per_reason.json()["rows"][0]["id"] is None
+    assert [(row["name"], row["items"]) for row in per_category.json()["rows"]] == [
+        ("Debatt", 1),
+        ("Debatt", 7),
+    ]
+
+
+@pytest.mark.usefixtures("a_week_scheduled")
+def test_moving_a_video_rolls_up_the_days_it_is_scheduled_on(
+    video: Video, organization: Organization, django_capture_on_commit_callbacks
+) -> None:
+    elsewhere = Organization.objects.create(name="Elsewhere", editor=organization.editor)
+
+    with django_capture_on_commit_callbacks(execute=True):
+        video.organization = elsewhere
+        video.save()
+
+    assert {key[2] for key in rolled_up()} == {elsewhere.pk, None}
+
+
+@pytest.mark.usefixtures("a_week_scheduled")
+def test_recategorizing_a_video_rolls_up_the_days_it_is_scheduled_on(
+    video: Video, django_capture_on_commit_callbacks
+) -> None:
+    def per_category() -> set[str]:
+        return set(ScheduledCategoryAirtime.objects.values_list("category__name", flat=True))
+
+    with django_capture_on_commit_callbacks(execute=True):
+        video.categories.set([Category.objects.create(id=91, name="Kultur")])
+    assert per_category() == {"Kultur"}
+
+    # And from the category's side.
+    with django_capture_on_commit_callbacks(execute=True):
+        Category.objects.get(name="Kultur").video_set.clear()
+    assert per_category() == set()
+
+
+def test_a_range_ending_before_it_starts_is_refused() -> None:
+    response = APIClient().get(URL, {"start": "2015-01-02", "end": "2015-01-01"})
+
+    assert response.status_code == status.HTTP_400_BAD_REQUEST
+    assert response.json()["errors"][0]["attr"] == "end"
+
+
+@pytest.mark.usefixtures("a_week_scheduled")
+def test_rebuilding_restores_the_rollups() -> None:
+    before = rolled_up()
+    ScheduledAirtime.objects.all().delete()
+    ScheduledCategoryAirtime.objects.all().delete()
+    # Left over from an item removed without the rollups hearing of it.
+    ScheduledAirtime.objects.create(
+        day=date(2015, 1, 4),
+        schedulereason=Scheduleitem.REASON_LEGACY,
+        items=1,
+        airtime=timedelta(hours=1),
+    )
+
+    output = StringIO()
+    call_command("rebuild_schedule_airtime", stdout=output)
+
+    assert rolled_up() == before
+    # A jukebox row for each day, and the member's pick on the first.
+    assert ScheduledCategoryAirtime.objects.count() == 7 + 1
+    assert "Rebuilt 2015-01-01 to 2015-01-07" in output.getvalue()
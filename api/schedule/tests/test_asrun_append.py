@@ -0,0 +1,110 @@
+"""
+Appending to the playout log many entries at a time.
+
+A batch arrives as a JSON array or as NDJSON, is checked and written in a
+few statements whatever its size, and can be sent again without logging
+anything twice.
+"""
+
+import json
+from datetime import UTC, datetime, timedelta
+
+import pytest
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from fk.models import AsRun, Video
+
+pytestmark = pytest.mark.django_db
+
+URL = reverse("asrun-bulk")
+START = datetime(2015, 1, 1, 18, tzinfo=UTC)
+
+
+def entries(video: Video, count: int) -> list[dict]:
+    return [
+        {"video": video.pk, "playedAt": (START + timedelta(minutes=n)).isoformat()}
+        for n in range(count)
+    ]
+
+
+def ndjson(rows: list[dict]) -> str:
+    return "\n".join(json.dumps(row) for row in rows) + "\n"
+
+
+def test_a_json_array_is_appended(authenticated_client: APIClient, video: Video) -> None:
+    response = authenticated_client.post(URL, entries(video, 3), format="json")
+
+    assert response.status_code == status.HTTP_200_OK
+    assert response.json() == {"received": 3}
+    assert AsRun.objects.filter(video=video).count() == 3
+
+
+def test_ndjson_is_appended(authenticated_client: APIClient, video: Video) -> None:
+    rows = [*entries(video, 2), {"programName": "Live", "playedAt": START.isoformat()}]
+
+    response = authenticated_client.post(URL, ndjson(rows), content_type="application/x-ndjson")
+
+    assert response.status_code == status.HTTP_200_OK
+    assert AsRun.objects.get(program_name="Live").video is None
+
+
+def test_a_malformed_line_is_reported(authenticated_client: APIClient) -> None:
+    response = authenticated_client.post(
+        URL, '{"programName": "Live"}\n{not json\n', content_type="application/x-ndjson"
+    )
+
+    assert response.status_code == status.HTTP_400_BAD_REQUEST
+    assert "line 2" in response.json()["errors"][0]["detail"]
+
+
+def test_a_resent_batch_logs_nothing_twice(authenticated_client: APIClient, video: Video) -> None:
+    authenticated_client.post(URL, entries(video, 3), format="json")
+
+    response = authenticated_client.post(URL, entries(video, 5), format="json")
+
+    assert response.status_code == status.HTTP_200_OK
+    assert AsRun.objects.count() == 5
+
+
+def test_a_batch_is_written_in_a_few_queries(
+    authenticated_client: APIClient, video: Video, django_assert_max_num_queries
+) -> None:
+    # The video check, and the insert with its savepoint.
+    with django_assert_max_num_queries(4):
+        authenticated_client.post(URL, entries(video, 500), format="json")
+
+    assert AsRun.objects.count() == 500
+
+
+def test_an_unknown_video_refuses_the_batch(authenticated_client: APIClient, video: Video) -> None:
+    rows = [*entries(video, 1), {"video": 999999, "playedAt": START.isoformat()}]
+
+    response = authenticated_client.post(URL, rows, format="json")
+
+    assert response.status_code == status.HTTP_400_BAD_REQUEST
+    assert response.json()["errors"][0]["attr"] == "1.video"
+    assert not AsRun.objects.exists()
+
+
+def test_played_at_is_required(authenticated_client: APIClient) -> None:
+    response = authenticated_client.post(URL, [{"programName": "Live"}], format="json")
+
+    assert response.status_code == status.HTTP_400_BAD_REQUEST
+    assert response.json()["errors"][0]["attr"] == "0.played_at"
+
+
+def test_only_staff_may_append(video: Video) -> None:
+    response = APIClient().post(URL, entries(video, 1), format="json")
+
+    assert response.status_code == status.HTTP_401_UNAUTHORIZED
+
+
+def test_a_single_duplicate_entry_is_refused(authenticated_client: APIClient, video: Video) -> None:
+    entry = entries(video, 1)[0]
+    authenticated_client.post(reverse("asrun-list"), entry, format="json")
+
+    response = authenticated_client.post(reverse("asrun-list"), entry, format="json")
+
+    assert response.status_code == status.HTTP_400_BAD_REQUEST
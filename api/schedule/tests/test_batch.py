@@ -0,0 +1,257 @@
+"""
+Many schedule operations in one request.
+
+A batch obeys the single-item rules -- the window, eligibility, and
+jukebox displacement -- but is judged as a whole: what it moves or
+deletes stops occupying its old airtime, its own placements may not
+collide, and one failure leaves the schedule exactly as it was.
+
+The pinned clock puts the open week at 2014-12-29 through 2015-01-04.
+"""
+
+import threading
+from datetime import datetime, timedelta
+from zoneinfo import ZoneInfo
+
+import pytest
+from django.db import DatabaseError, connection, transaction
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from agenda.scheduling import policy
+from fk.models import Organization, Scheduleitem, User, Video
+
+pytestmark = [pytest.mark.django_db, pytest.mark.usefixtures("now_in_the_drafting_week")]
+
+OSLO = ZoneInfo("Europe/Oslo")
+EVENING = datetime(2015, 1, 1, 18, tzinfo=OSLO)
+IN_THE_FROZEN_WEEK = datetime(2014, 12, 25, 18, tzinfo=OSLO)
+URL = reverse("api-scheduleitem-batch")
+
+
+@pytest.fixture
+def member(organization: Organization) -> User:
+    user = User.objects.create(email="batch-member@example.test", identity_confirmed=True)
+    organization.members.add(user)
+    return user
+
+
+@pytest.fixture
+def member_client(member: User) -> APIClient:
+    client = APIClient()
+    client.force_authenticate(user=member)
+    return client
+
+
+def item_at(video: Video, starttime: datetime, reason: int = Scheduleitem.REASON_USER):
+    return Scheduleitem.objects.create(
+        video=video, starttime=starttime, duration=timedelta(hours=1), schedulereason=reason
+    )
+
+
+def create(video: Video, starttime: datetime, hours: int = 1) -> dict:
+    return {
+        "op": "create",
+        "video": video.pk,
+        "starttime": starttime.isoformat(),
+        "duration": str(timedelta(hours=hours)),
+    }
+
+
+def test_a_member_can_program_an_evening_in_one_request(
+    member_client: APIClient, video: Video
+) -> None:
+    response = member_client.post(
+        URL,
+        [create(video, EVENING + timedelta(hours=hour)) for hour in range(3)],
+        format="json",
+    )
+
+    assert response.status_code == status.HTTP_200_OK
+    results = response.json()
+    assert [result["op"] for result in results] == ["create"] * 3
+    items = Scheduleitem.objects.order_by("starttime")
+    assert [result["id"] for result in results] == [item.pk for item in items]
+    assert {item.schedulereason for item in items} == {Scheduleitem.REASON_USER}
+    assert results[0]["item"]["endtime"] == "2015-01-01T19:00:00+01:00"
+
+
+def test_items_may_shift_into_each_others_airtime(member_client: APIClient, video: Video) -> None:
+    # Moving a block an hour later only works if each item's old airtime
+    # no longer counts as taken by the time the next one lands there.
+    first = item_at(video, EVENING)
+    second = item_at(video, EVENING + timedelta(hours=1))
+
+    response = member_client.post(
+        URL,
+        [
+            {
+                "op": "update",
+                "id": first.pk,
+                "starttime": (EVENING + timedelta(hours=1)).isoformat(),
+            },
+            {
+                "op": "update",
+                "id": second.pk,
+                "starttime": (EVENING + timedelta(hours=2)).isoformat(),
+            },
+        ],
+        format="json",
+    )
+
+    assert response.status_code == status.HTTP_200_OK
+    first.refresh_from_db()
+    second.refresh_from_db()
+    assert first.starttime == EVENING + timedelta(hours=1)
+    assert first.endtime == EVENING + timedelta(hours=2)
+    assert second.starttime == EVENING + timedelta(hours=2)
+
+
+def test_placements_in_one_batch_may_not_overlap(member_client: APIClient, video: Video) -> None:
+    response = member_client.post(
+        URL,
+        [create(video, EVENING, hours=2), create(video, EVENING + timedelta(hours=1))],
+        format="json",
+    )
+
+    assert response.status_code == status.HTTP_400_BAD_REQUEST
+    assert [error["attr"] for error in response.json()["errors"]] == ["1.duration"]
+    assert not Scheduleitem.objects.exists()
+
+
+def test_deliberate_programming_blocks_and_nothing_is_written(
+    member_client: APIClient, video: Video
+) -> None:
+    item_at(video, EVENING + timedelta(hours=2), reason=Scheduleitem.REASON_ADMIN)
+
+    response = member_client.post(
+        URL,
+        [create(video, EVENING), create(video, EVENING + timedelta(hours=2))],
+        format="json",
+    )
+
+    assert response.status_code == status.HTTP_400_BAD_REQUEST
+    assert [error["attr"] for error in response.json()["errors"]] == ["1.duration"]
+    assert Scheduleitem.objects.count() == 1
+
+
+def test_jukebox_fillers_give_way(member_client: APIClient, video: Video) -> None:
+    filler = item_at(video, EVENING, reason=Scheduleitem.REASON_JUKEBOX)
+
+    response = member_client.post(URL, [create(video, EVENING)], format="json")
+
+    assert response.status_code == status.HTTP_200_OK
+    assert not Scheduleitem.objects.filter(pk=filler.pk).exists()
+
+
+def test_deletes_are_reported_by_id(member_client: APIClient, video: Video) -> None:
+    item = item_at(video, EVENING)
+
+    response = member_client.post(URL, [{"op": "delete", "id": item.pk}], format="json")
+
+    assert response.status_code == status.HTTP_200_OK
+    assert response.json() == [{"op": "delete", "id": item.pk, "item": None}]
+    assert not Scheduleitem.objects.exists()
+
+
+def test_members_may_not_touch_the_frozen_weeks(member_client: APIClient, video: Video) -> None:
+    frozen = item_at(video, IN_THE_FROZEN_WEEK)
+
+    response = member_client.post(
+        URL,
+        [create(video, EVENING), {"op": "delete", "id": frozen.pk}],
+        format="json",
+    )
+
+    assert response.status_code == status.HTTP_400_BAD_REQUEST
+    assert [error["attr"] for error in response.json()["errors"]] == ["1.starttime"]
+    assert list(Scheduleitem.objects.all()) == [frozen]
+
+
+def test_staff_are_exempt_from_the_window(authenticated_client: APIClient, video: Video) -> None:
+    response = authenticated_client.post(URL, [create(video, IN_THE_FROZEN_WEEK)], format="json")
+
+    assert response.status_code == status.HTTP_200_OK
+    assert Scheduleitem.objects.get().schedulereason == Scheduleitem.REASON_ADMIN
+
+
+def test_another_organizations_video_refuses_the_batch(
+    member_client: APIClient, video: Video
+) -> None:
+    stranger = User.objects.create(email="batch-stranger@example.test")
+    foreign = Video.objects.create(
+        creator=stranger,
+        name="Foreign video",
+        organization=Organization.objects.create(name="Foreign", editor=stranger, fkmember=True),
+        proper_import=True,
+    )
+
+    response = member_client.post(
+        URL, [create(video, EVENING), create(foreign, EVENING + timedelta(hours=1))], format="json"
+    )
+
+    assert response.status_code == status.HTTP_403_FORBIDDEN
+    assert not Scheduleitem.objects.exists()
+
+
+def test_operations_must_say_what_they_act_on(member_client: APIClient, video: Video) -> None:
+    response = member_client.post(
+        URL,
+        [{"op": "update", "starttime": EVENING.isoformat()}, {"op": "create", "video": video.pk}],
+        format="json",
+    )
+
+    assert response.status_code == status.HTTP_400_BAD_REQUEST
+    assert sorted(error["attr"] for error in response.json()["errors"]) == [
+        "0.id",
+        "1.duration",
+        "1.starttime",
+    ]
+
+
+def test_conflicts_are_resolved_with_one_locking_query(
+    member_client: APIClient, video: Video, django_assert_max_num_queries
+) -> None:
+    operations = [create(video, EVENING + timedelta(hours=hour)) for hour in range(12)]
+
+    # Authentication, the video lookup, the eligibility check, one locked
+    # conflict query and one INSERT -- not a round of each per item.
+    with django_assert_max_num_queries(10):
+        response = member_client.post(URL, operations, format="json")
+
+    assert response.status_code == status.HTTP_200_OK
+    assert Scheduleitem.objects.count() == 12
+
+
+@pytest.mark.django_db(transaction=True)
+def test_a_sparse_batch_locks_only_what_it_overlaps(video: Video) -> None:
+    met = item_at(video, EVENING)
+    between = item_at(video, EVENING + timedelta(days=1))
+    later = EVENING + timedelta(days=2)
+
+    def locked(item: Scheduleitem) -> bool:
+        outcome = []
+
+        def try_to_lock() -> None:
+            try:
+                with transaction.atomic():
+                    Scheduleitem.objects.select_for_update(nowait=True).get(pk=item.pk)
+                outcome.append(False)
+            except DatabaseError:
+                outcome.append(True)
+            finally:
+                connection.close()
+
+        other = threading.Thread(target=try_to_lock)
+        other.start()
+        other.join()
+        return outcome[0]
+
+    with transaction.atomic():
+        policy.batch_airtime_conflicts(
+            [(EVENING, EVENING + timedelta(hours=1)), (later, later + timedelta(hours=1))]
+        )
+
+        assert locked(met)
+        assert not locked(between)
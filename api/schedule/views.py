@@ -1,10 +1,12 @@
 from django.utils import timezone
 from drf_spectacular.utils import extend_schema
 from rest_framework import permissions, viewsets
+from rest_framework.decorators import action
 from rest_framework.exceptions import PermissionDenied
 from rest_framework.response import Response
 from rest_framework.views import APIView
 
+from agenda.reconciliation import reconcile_days
 from agenda.scheduling import policy
 from api.auth.permissions import (
     CanScheduleForOrganizationOrReadOnly,
@@ -13,11 +15,19 @@ from api.auth.permissions import (
 from api.pagination import FkSchedulePagination
 from api.schedule.filters import ScheduleitemFilter
 from api.schedule.serializers import (
+    AirtimeStatisticsQuerySerializer,
+    AirtimeStatisticsSerializer,
+    ReconciliationQuerySerializer,
+    ReconciliationSerializer,
+    ScheduleitemBatchOperationSerializer,
+    ScheduleitemBatchResultSerializer,
     ScheduleitemModifySerializer,
     ScheduleitemReadSerializer,
     SchedulingPolicySerializer,
 )
 from fk.models import Scheduleitem, WeeklySlot
+from fk.models.airtime import scheduled_airtime
+from fkweb.middleware import CacheVisibility
 
 
 class ScheduleitemViewSet(RequireSchedulingEligibility, viewsets.ModelViewSet):
@@ -45,6 +55,7 @@ class ScheduleitemViewSet(RequireSchedulingEligibility, viewsets.ModelViewSet):
     )
     pagination_class = FkSchedulePagination
     permission_classes = (CanScheduleForOrganizationOrReadOnly,)
+    cache_visibility = CacheVisibility.PUBLIC
     filterset_class = ScheduleitemFilter
     ordering_fields = ["starttime"]
     ordering = ["starttime"]
@@ -57,8 +68,35 @@ class ScheduleitemViewSet(RequireSchedulingEligibility, viewsets.ModelViewSet):
     def get_serializer_class(self):
         if self.action in ["create", "update", "partial_update"]:
             return ScheduleitemModifySerializer
+        if self.action == "batch":
+            return ScheduleitemBatchOperationSerializer
         return ScheduleitemReadSerializer
 
+    @extend_schema(
+        operation_id="scheduleitems_batch",
+        summary="Create, move and delete many schedule items at once",
+        description=(
+            "Takes a list of operations, each `create` (with `starttime` and `duration`), "
+            "`update` (an `id` and the fields to change) or `delete` (an `id`). The same "
+            "rules apply as to the single-item endpoints -- the scheduling window, "
+            "eligibility and displacement of jukebox fillers -- but the batch is checked "
+            "as a whole: items it moves or deletes no longer occupy their old airtime, and "
+            "its placements may not overlap one another. Either every operation is "
+            "applied or none is; errors are reported per operation, and on success the "
+            "response lists what became of each one, in request order."
+        ),
+        request=ScheduleitemBatchOperationSerializer(many=True),
+        responses=ScheduleitemBatchResultSerializer(many=True),
+    )
+    @action(detail=False, methods=["post"])
+    def batch(self, request):
+        serializer = self.get_serializer(data=request.data, many=True)
+        serializer.is_valid(raise_exception=True)
+        results = serializer.save()
+        return Response(
+            ScheduleitemBatchResultSerializer(results, many=True, context={"request": request}).data
+        )
+
     def perform_destroy(self, instance):
         # Create and update enforce the window in the serializer; delete
         # never reaches one, so the check lives here.
@@ -73,6 +111,7 @@ class SchedulingPolicyView(APIView):
     """Broadcast-week boundaries and recurring weekly reservations."""
 
     permission_classes = (permissions.AllowAny,)
+    cache_visibility = CacheVisibility.PUBLIC
 
     @extend_schema(
         operation_id="scheduling_policy_retrieve",
@@ -106,3 +145,73 @@ class SchedulingPolicyView(APIView):
             }
         )
         return Response(serializer.data)
+
+
+class ReconciliationView(APIView):
+    """What the schedule said would air, against what the as-run log says did."""
+
+    permission_classes = (permissions.IsAdminUser,)
+
+    @extend_schema(
+        operation_id="scheduling_reconciliation_retrieve",
+        summary="Compare the schedule with the as-run log",
+        description=(
+            "Lists every disagreement between the schedule and the as-run log of one "
+            "playout over whole Europe/Oslo days. A scheduled item with no matching play "
+            "is `missed`. One whose first play started more than a few seconds late is "
+            "`late`. One whose plays fill less of its airtime than its duration is "
+            "`truncated`, so a late one is usually truncated too. A "
+            "play that matches no scheduled item is `unscheduled`. A play matches an item "
+            "when their times overlap and they name the same video, or, without a video, "
+            "the same programme name. Staff only."
+        ),
+        parameters=[ReconciliationQuerySerializer],
+        responses=ReconciliationSerializer,
+    )
+    def get(self, request):
+        query = ReconciliationQuerySerializer(data=request.query_params)
+        query.is_valid(raise_exception=True)
+        data = query.validated_data
+        report = reconcile_days(data["start"], data["end"], data["playout"])
+        return Response(
+            ReconciliationSerializer(
+                {
+                    "start": report.start,
+                    "end": report.end,
+                    "playout": report.playout,
+                    "counts": report.counts,
+                    "discrepancies": report.discrepancies,
+                }
+            ).data
+        )
+
+
+class AirtimeStatisticsView(APIView):
+    """Scheduled airtime over a range of days, from the daily rollups."""
+
+    permission_classes = (permissions.AllowAny,)
+    cache_visibility = CacheVisibility.PUBLIC
+
+    @extend_schema(
+        operation_id="scheduling_airtime_retrieve",
+        summary="Scheduled airtime statistics",
+        description=(
+            "How many items, and how much airtime, were scheduled over whole Europe/Oslo "
+            "days, per schedule reason and per organization or category. An item counts "
+            "towards the day it starts on. A video in several categories counts towards "
+            "each of them. The figures come from daily rollups kept up to date on every "
+            "schedule change, and on a video moving to another organization or changing "
+            "categories, so even a range of years is cheap to ask for."
+        ),
+        parameters=[AirtimeStatisticsQuerySerializer],
+        responses=AirtimeStatisticsSerializer,
+    )
+    def get(self, request):
+        query = AirtimeStatisticsQuerySerializer(data=request.query_params)
+        query.is_valid(raise_exception=True)
+        data = query.validated_data
+        return Response(
+            AirtimeStatisticsSerializer(
+                {**data, "rows": scheduled_airtime(data["start"], data["end"], data["by"])}
+            ).data
+        )
@@ -0,0 +1,101 @@
+"""The OpenAPI schema, generated once instead of on every request.
+
+drf-spectacular's SpectacularAPIView generates the schema afresh each time
+it is asked, which takes a worker some two seconds of CPU. The page cache
+only ever spared anonymous callers, and only for CACHE_MIDDLEWARE_SECONDS
+at a time. The Swagger UI and Redoc pages send the session cookie, and
+generated clients are often built with a token, so they paid every time.
+
+`manage.py openapi_schema` writes the schema to OPENAPI_SCHEMA_FILE, which
+start.sh does before gunicorn starts. SchemaView serves it from memory.
+Each format is rendered once per process and carries an ETag, so a
+client that already has it gets a 304. A process that finds no file
+generates the schema once itself. With DEBUG on, the schema is generated on every
+request as before, so that it follows the code being edited.
+"""
+
+import functools
+import hashlib
+import json
+import logging
+import os
+from pathlib import Path
+
+from django.conf import settings
+from django.http import HttpResponse
+from django.utils.cache import get_conditional_response, patch_cache_control
+from drf_spectacular.renderers import OpenApiJsonRenderer, OpenApiYamlRenderer
+from drf_spectacular.settings import spectacular_settings
+from drf_spectacular.utils import extend_schema
+from drf_spectacular.views import SCHEMA_KWARGS, SpectacularAPIView
+
+logger = logging.getLogger(__name__)
+
+# What each of SpectacularAPIView's formats is rendered with; the media
+# types it also answers to render the same.
+RENDERERS = {"yaml": OpenApiYamlRenderer, "json": OpenApiJsonRenderer}
+
+
+def generate_schema() -> dict:
+    """The schema as drf-spectacular sees it now, as the public sees it."""
+    generator = spectacular_settings.DEFAULT_GENERATOR_CLASS()
+    return generator.get_schema(request=None, public=True)
+
+
+def write_schema(path: Path) -> None:
+    """Generate the schema and write it to `path` as JSON."""
+    content = OpenApiJsonRenderer().render(generate_schema(), renderer_context={})
+    # Replaced in one go, so nothing ever reads half a schema.
+    partial = path.with_name(path.name + ".partial")
+    partial.write_bytes(content)
+    os.replace(partial, path)
+
+
+@functools.cache
+def _schema() -> dict:
+    if settings.OPENAPI_SCHEMA_FILE:
+        path = Path(settings.OPENAPI_SCHEMA_FILE)
+        try:
+            return json.loads(path.read_bytes())
+        except FileNotFoundError:
+            logger.warning("No OpenAPI schema at %s; generating it (see openapi_schema)", path)
+    return generate_schema()
+
+
+@functools.cache
+def rendered_schema(format: str) -> tuple[bytes, str]:
+    """The schema in `format`, and its ETag."""
+    content = RENDERERS[format]().render(_schema(), renderer_context={})
+    return content, f'"{hashlib.sha256(content).hexdigest()[:32]}"'
+
+
+def forget_schema() -> None:
+    """Have the schema read, or generated, again at the next request."""
+    _schema.cache_clear()
+    rendered_schema.cache_clear()
+
+
+# SpectacularAPIView, serving the schema generated beforehand unless DEBUG
+# is on. Without a docstring of its own, so that the schema describes the
+# endpoint with SpectacularAPIView's, and decorated as its get() is.
+class SchemaView(SpectacularAPIView):
+    @extend_schema(**SCHEMA_KWARGS)
+    def get(self, request, *args, **kwargs):
+        if settings.DEBUG:
+            return super().get(request, *args, **kwargs)
+        renderer = request.accepted_renderer
+        content, etag = rendered_schema(renderer.format)
+        content_type = renderer.media_type
+        if renderer.charset:
+            content_type += f"; charset={renderer.charset}"
+        response = HttpResponse(content, content_type=content_type)
+        response["ETag"] = etag
+        response["Content-Disposition"] = (
+            f'inline; filename="{spectacular_settings.TITLE}.{renderer.format}"'
+        )
+        # Asked again each time, and answered with a 304 while unchanged.
+        # no-cache also keeps it out of the page cache, which would answer
+        # without looking at If-None-Match, and which has no room for a
+        # megabyte or two in memcached anyway.
+        patch_cache_control(response, public=True, no_cache=True)
+        return get_conditional_response(request, etag=etag, response=response)
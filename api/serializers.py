@@ -5,17 +5,52 @@ import logging
 
 from rest_framework import serializers
 
-from fk.models import Category, Video
+from fk.models import Category
 
 logger = logging.getLogger(__name__)
 
 
+class BatchListSerializer(serializers.ListSerializer):
+    """Base for the endpoints that take a list of changes in one request.
+
+    A batch is all-or-nothing, so its errors are only useful lined up with
+    the request: one entry per item, empty where the item was fine. DRF
+    reports the per-item field errors as a dict keyed by index instead,
+    which the standardized error handler then renders without the index
+    for the first item; both kinds are reported as the list here.
+    """
+
+    # Subclasses bound the batch to what one transaction should hold.
+    max_items: int
+
+    def __init__(self, *args, **kwargs):
+        kwargs.setdefault("allow_empty", False)
+        kwargs.setdefault("max_length", self.max_items)
+        super().__init__(*args, **kwargs)
+
+    def to_internal_value(self, data):
+        try:
+            return super().to_internal_value(data)
+        except serializers.ValidationError as error:
+            if isinstance(error.detail, dict) and all(isinstance(k, int) for k in error.detail):
+                self.raise_if_any([error.detail.get(index, {}) for index in range(len(data))])
+            raise
+
+    @staticmethod
+    def raise_if_any(errors: list[dict]) -> None:
+        if any(errors):
+            raise serializers.ValidationError(errors)
+
+
 class CategorySerializer(serializers.ModelSerializer):
     videocount = serializers.SerializerMethodField("count_videos")
 
-    @staticmethod
-    def count_videos(category) -> int:
-        return Video.objects.public().filter(categories=category).count()
+    def count_videos(self, category) -> int:
+        # CategoryViewSet fetches the counts once for the whole page.
+        counts = self.context.get("public_video_counts")
+        if counts is None:
+            counts = Category.public_video_counts()
+        return counts.get(category.pk, 0)
 
     class Meta:
         model = Category
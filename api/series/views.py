@@ -11,6 +11,7 @@ from api.auth.permissions import (
 from api.pagination import FkDefaultPagination
 from api.series.serializers import SeriesSerializer, SeriesWriteSerializer
 from fk.models import Series
+from fkweb.middleware import CacheVisibility
 
 
 class SeriesFilter(filters.FilterSet):
@@ -29,6 +30,7 @@ class SeriesList(RequireTargetOrganizationMembership, generics.ListCreateAPIView
     pagination_class = FkDefaultPagination
     filterset_class = SeriesFilter
     permission_classes = (IsInOrganizationOrReadOnly,)
+    cache_visibility = CacheVisibility.STAFF
 
     def get_serializer_class(self):
         if self.request.method == "POST":
@@ -48,6 +50,7 @@ class SeriesDetail(RequireTargetOrganizationMembership, generics.RetrieveUpdateD
 
     serializer_class = SeriesSerializer
     permission_classes = (IsInOrganizationOrReadOnly,)
+    cache_visibility = CacheVisibility.STAFF
 
     def get_serializer_class(self):
         if self.request.method in ("PUT", "PATCH"):
@@ -0,0 +1,151 @@
+"""
+The public video counts on the category listing.
+
+Counted in one grouped query and kept in the cache until something that
+decides whether a video is public changes: the video, its categories, its
+organization, or the editor answering for that organization.
+"""
+
+import pytest
+from django.core.cache import cache
+from django.urls import reverse
+from rest_framework.test import APIClient
+
+from fk.models import Category, Organization, User, Video
+
+pytestmark = pytest.mark.django_db
+
+
+@pytest.fixture
+def editor() -> User:
+    return User.objects.create(email="category-editor@example.test")
+
+
+@pytest.fixture
+def organization(editor: User) -> Organization:
+    return Organization.objects.create(name="Category org", editor=editor)
+
+
+@pytest.fixture
+def categories() -> list[Category]:
+    return [Category.objects.create(id=n, name=f"Category {n}") for n in range(1, 6)]
+
+
+def public_video(editor: User, organization: Organization, *categories: Category) -> Video:
+    video = Video.objects.create(
+        name="Public video",
+        creator=editor,
+        organization=organization,
+        publish_on_web=True,
+        proper_import=True,
+    )
+    video.categories.add(*categories)
+    return video
+
+
+def test_each_category_counts_its_public_videos(
+    editor: User, organization: Organization, categories: list[Category]
+) -> None:
+    first, second, *_ = categories
+    public_video(editor, organization, first, second)
+    public_video(editor, organization, first)
+    hidden = public_video(editor, organization, first)
+    hidden.publish_on_web = False
+    hidden.save()
+
+    listed = APIClient().get(reverse("category-list")).json()["results"]
+
+    assert {entry["id"]: entry["videocount"] for entry in listed} == {
+        1: 2,
+        2: 1,
+        3: 0,
+        4: 0,
+        5: 0,
+    }
+
+
+def test_the_listing_costs_the_same_however_many_categories(
+    editor: User,
+    organization: Organization,
+    categories: list[Category],
+    django_assert_max_num_queries,
+) -> None:
+    public_video(editor, organization, *categories)
+
+    # The page count, the page, and one grouped count -- not one per row.
+    with django_assert_max_num_queries(3):
+        APIClient().get(reverse("category-list"))
+
+
+@pytest.mark.usefixtures("real_cache")
+def test_a_warm_cache_answers_without_counting(
+    editor: User, organization: Organization, categories: list[Category], django_assert_num_queries
+) -> None:
+    public_video(editor, organization, categories[0])
+    Category.public_video_counts()
+
+    with django_assert_num_queries(0):
+        assert Category.public_video_counts() == {1: 1}
+
+
+@pytest.mark.usefixtures("real_cache")
+def test_unpublishing_a_video_is_counted(
+    editor: User,
+    organization: Organization,
+    categories: list[Category],
+    django_capture_on_commit_callbacks,
+) -> None:
+    video = public_video(editor, organization, categories[0])
+    assert Category.public_video_counts() == {1: 1}
+
+    with django_capture_on_commit_callbacks(execute=True):
+        video.publish_on_web = False
+        video.save()
+
+    assert Category.public_video_counts() == {}
+
+
+@pytest.mark.usefixtures("real_cache")
+def test_recategorizing_a_video_is_counted(
+    editor: User,
+    organization: Organization,
+    categories: list[Category],
+    django_capture_on_commit_callbacks,
+) -> None:
+    video = public_video(editor, organization, categories[0])
+    assert Category.public_video_counts() == {1: 1}
+
+    with django_capture_on_commit_callbacks(execute=True):
+        video.categories.set([categories[1]])
+
+    assert Category.public_video_counts() == {2: 1}
+
+
+@pytest.mark.usefixtures("real_cache")
+def test_an_editor_leaving_is_counted(
+    editor: User,
+    organization: Organization,
+    categories: list[Category],
+    django_capture_on_commit_callbacks,
+) -> None:
+    public_video(editor, organization, categories[0])
+    assert Category.public_video_counts() == {1: 1}
+
+    # No video changed, but none of the organization's is public any more.
+    with django_capture_on_commit_callbacks(execute=True):
+        editor.is_active = False
+        editor.save()
+
+    assert Category.public_video_counts() == {}
+
+
+@pytest.mark.usefixtures("real_cache")
+def test_a_login_leaves_the_counts_alone(
+    editor: User, categories: list[Category], django_capture_on_commit_callbacks
+) -> None:
+    cache.set("fk.category.public_video_counts", {1: 7})
+
+    with django_capture_on_commit_callbacks(execute=True):
+        editor.save(update_fields=["last_login"])
+
+    assert Category.public_video_counts() == {1: 7}
@@ -12,9 +12,12 @@ Two properties matter, and they pull against each other:
     is dead weight -- which it silently was, because the timezone
     override sat between the two cache middlewares and made them write
     and read different keys;
-  * authenticated responses must never enter it, because the cache key
-    knows nothing about a token or a session, while the responses very
-    much depend on who asked.
+  * an authenticated caller must only ever get a response meant for the
+    likes of them, because the cache key knows nothing about a token or a
+    session. Views declare who their responses differ between (see
+    fkweb.middleware.CacheVisibility): members share the anonymous entry
+    where the response cannot tell them apart, staff get one of their own,
+    and per-user views are never cached at all.
 """
 
 import pytest
@@ -106,18 +109,38 @@ def test_anonymous_responses_are_served_from_the_cache(catalogue) -> None:
     assert second == first
 
 
-def test_a_token_request_is_neither_served_nor_stored(catalogue) -> None:
+def test_a_member_is_served_the_anonymous_entry(catalogue) -> None:
+    """The catalogue a member sees is the public one, so it is the same page."""
+    url = reverse("api-video-list")
+
+    APIClient().get(url)
+    add_video(catalogue, "second video")
+
+    assert names(authorized(catalogue["editor"]).get(url)) == ["first video"]
+
+
+def test_a_member_response_is_stored_for_everyone(catalogue) -> None:
     url = reverse("api-video-list")
 
     authorized(catalogue["editor"]).get(url)
-    assert not cached_pages(), "an authenticated response was written to the shared cache"
+    add_video(catalogue, "second video")
+
+    assert names(APIClient().get(url)) == ["first video"]
+
 
-    # A response cached for anonymous callers must not be replayed to a
-    # logged-in one either: they are entitled to see more, not less.
+def test_a_bad_token_is_refused_not_served(catalogue) -> None:
+    url = reverse("api-video-list")
     APIClient().get(url)
-    add_video(catalogue, "second video")
+    client = APIClient()
+    client.credentials(HTTP_AUTHORIZATION="Token not-a-token")
+
+    assert client.get(url).status_code == 401
+
 
-    assert "second video" in names(authorized(catalogue["editor"]).get(url))
+def test_a_per_user_view_is_neither_served_nor_stored(catalogue) -> None:
+    authorized(catalogue["editor"]).get(reverse("api-user-detail"))
+
+    assert not cached_pages(), "a per-user response was written to the shared cache"
 
 
 def test_two_token_users_never_share_a_response(catalogue) -> None:
@@ -159,17 +182,49 @@ def test_a_staff_response_is_never_replayed_to_the_public(catalogue) -> None:
     assert "staff only video" not in names(APIClient().get(url))
 
 
-def test_a_session_request_is_neither_served_nor_stored(catalogue) -> None:
+def test_staff_are_not_served_the_anonymous_entry(catalogue) -> None:
+    staff = User.objects.create(email="staff@fake.com", is_superuser=True)
+    url = reverse("api-video-list")
+
+    APIClient().get(url)
+    add_video(catalogue, "second video")
+
+    assert "second video" in names(authorized(staff).get(url))
+
+
+def test_staff_share_an_entry_of_their_own(catalogue) -> None:
     url = reverse("api-video-list")
+    first = authorized(User.objects.create(email="staff@fake.com", is_superuser=True))
+    second = authorized(User.objects.create(email="more-staff@fake.com", is_superuser=True))
+
+    first.get(url)
+    add_video(catalogue, "second video")
+    response = second.get(url)
+
+    assert names(response) == ["first video"]
+    # Nothing between us and the client may replay it to anyone else.
+    assert "private" in response["Cache-Control"]
+
+
+def test_a_session_member_is_served_the_anonymous_entry(catalogue) -> None:
+    url = reverse("api-video-list")
+    APIClient().get(url)
+    add_video(catalogue, "second video")
+
     client = APIClient()
     client.force_login(catalogue["editor"])
 
-    client.get(url)
-    assert not cached_pages(), "a session response was written to the shared cache"
+    assert names(client.get(url)) == ["first video"]
 
-    add_video(catalogue, "second video")
 
-    assert "second video" in names(client.get(url))
+def test_the_browsable_api_is_never_shared(catalogue) -> None:
+    """It greets the caller by name."""
+    client = APIClient()
+    client.force_login(catalogue["editor"])
+
+    client.get(reverse("api-video-list"), HTTP_ACCEPT="text/html")
+
+    assert not cached_pages()
 
 
 def test_the_cache_key_survives_the_api_timezone_override(catalogue, settings) -> None:
@@ -0,0 +1,106 @@
+"""
+/api/schema/ serves the schema generated beforehand, not one per request.
+
+`manage.py openapi_schema` writes OPENAPI_SCHEMA_FILE; the view reads it
+once, renders each format once, and answers a client that already has it
+with a 304. Only with DEBUG on is the schema generated per request.
+"""
+
+import json
+
+import pytest
+import yaml
+from django.core.management import call_command
+from django.urls import reverse
+from rest_framework.test import APIClient
+
+import api.schema
+from api.schema import forget_schema
+
+pytestmark = pytest.mark.django_db
+
+# Small enough to tell apart from anything drf-spectacular generates.
+STAND_IN = {"openapi": "3.0.3", "info": {"title": "From the file", "version": "1"}, "paths": {}}
+
+
+@pytest.fixture(autouse=True)
+def fresh_schema():
+    forget_schema()
+    yield
+    forget_schema()
+
+
+@pytest.fixture
+def schema_file(settings, tmp_path):
+    path = tmp_path / "openapi.json"
+    path.write_text(json.dumps(STAND_IN))
+    settings.OPENAPI_SCHEMA_FILE = str(path)
+    return path
+
+
+def test_the_command_writes_the_schema_the_api_describes(tmp_path):
+    path = tmp_path / "openapi.json"
+
+    call_command("openapi_schema", file=path)
+
+    schema = json.loads(path.read_text())
+    assert "/api/scheduleitems" in schema["paths"]
+    assert not list(tmp_path.glob("*.partial"))
+
+
+def test_the_schema_is_served_from_the_file_without_generating_it(schema_file, monkeypatch):
+    def generate():
+        raise AssertionError("generated the schema")
+
+    monkeypatch.setattr(api.schema, "generate_schema", generate)
+    client = APIClient()
+
+    as_yaml = client.get(reverse("schema"))
+    as_json = client.get(reverse("schema"), {"format": "json"})
+
+    assert as_yaml["Content-Type"] == "application/vnd.oai.openapi; charset=utf-8"
+    assert yaml.safe_load(as_yaml.content) == STAND_IN
+    assert as_json["Content-Type"] == "application/vnd.oai.openapi+json"
+    assert json.loads(as_json.content) == STAND_IN
+
+
+def test_a_client_that_has_the_schema_gets_a_304(schema_file):
+    client = APIClient()
+    first = client.get(reverse("schema"), {"format": "json"})
+
+    again = client.get(reverse("schema"), {"format": "json"}, HTTP_IF_NONE_MATCH=first["ETag"])
+    as_yaml = client.get(reverse("schema"), HTTP_IF_NONE_MATCH=first["ETag"])
+
+    assert again.status_code == 304
+    assert again.content == b""
+    assert again["ETag"] == first["ETag"]
+    assert "no-cache" in first["Cache-Control"]
+    # Another format is another representation, with an ETag of its own.
+    assert as_yaml.status_code == 200
+    assert as_yaml["ETag"] != first["ETag"]
+
+
+def test_without_a_file_the_schema_is_generated_once(settings, tmp_path, monkeypatch):
+    settings.OPENAPI_SCHEMA_FILE = str(tmp_path / "missing.json")
+    generated = []
+
+    def generate():
+        generated.append(True)
+        return STAND_IN
+
+    monkeypatch.setattr(api.schema, "generate_schema", generate)
+    client = APIClient()
+
+    client.get(reverse("schema"))
+    response = client.get(reverse("schema"), {"format": "json"})
+
+    assert json.loads(response.content) == STAND_IN
+    assert len(generated) == 1
+
+
+def test_with_debug_on_the_schema_follows_the_code(schema_file, settings):
+    settings.DEBUG = True
+
+    response = APIClient().get(reverse("schema"), {"format": "json"})
+
+    assert "/api/scheduleitems" in json.loads(response.content)["paths"]
@@ -1,7 +1,7 @@
 # Copyright (c) 2012-2013 Benjamin Bruheim <grolgh@gmail.com>
 # This file is covered by the LGPLv3 or later, read COPYING for details.
 from django.urls import URLPattern, URLResolver, include, path, re_path
-from drf_spectacular.views import SpectacularAPIView, SpectacularRedocView, SpectacularSwaggerView
+from drf_spectacular.views import SpectacularRedocView, SpectacularSwaggerView
 from rest_framework import parsers
 from rest_framework.authtoken.views import ObtainAuthToken
 from rest_framework.routers import SimpleRouter
@@ -15,6 +15,7 @@ import api.schedule.views as schedule_views
 import api.series.views as series_views
 import api.video.views as video_views
 import api.videofile.views as videofile_views
+from api.schema import SchemaView
 from fkweb.views import CsrfView
 
 from . import views
@@ -48,6 +49,7 @@ api_patterns: list[URLPattern | URLResolver] = [
     path("obtain-token", ObtainAuthTokenJsonOnly.as_view(), name="api-token-auth"),
     # Video
     path("videos", video_views.VideoList.as_view(), name="api-video-list"),
+    path("videos/bulk", video_views.VideoBulkUpdate.as_view(), name="api-video-bulk-update"),
     path(
         "videos/<int:video_id>/images",
         program_image_views.ProgramImageViewSet.as_view({"get": "list", "post": "create"}),
@@ -81,6 +83,8 @@ api_patterns: list[URLPattern | URLResolver] = [
         name="api-video-ingest-job-detail",
     ),
     path("videos/<int:pk>", video_views.VideoDetail.as_view(), name="api-video-detail"),
+    path("ingest", video_views.IngestJobList.as_view(), name="api-ingest-job-list"),
+    path("ingest/claim", video_views.IngestJobClaim.as_view(), name="api-ingest-job-claim"),
     # Series
     path("series", series_views.SeriesList.as_view(), name="api-series-list"),
     path("series/<int:pk>", series_views.SeriesDetail.as_view(), name="api-series-detail"),
@@ -110,6 +114,16 @@ api_patterns += [
         schedule_views.SchedulingPolicyView.as_view(),
         name="api-scheduling-policy",
     ),
+    path(
+        "scheduling/reconciliation",
+        schedule_views.ReconciliationView.as_view(),
+        name="api-scheduling-reconciliation",
+    ),
+    path(
+        "scheduling/airtime",
+        schedule_views.AirtimeStatisticsView.as_view(),
+        name="api-scheduling-airtime",
+    ),
     # Same reasoning, and more so: these only ever render XML, so a
     # `.json` suffix would advertise a representation that cannot exist.
     #
@@ -137,7 +151,7 @@ api_patterns += [
 api_patterns += [
     # drf-spectacular schema and docs UIs, plus DRF's own browsable-API
     # login/logout views - not part of the API surface itself.
-    path("schema/", SpectacularAPIView.as_view(), name="schema"),
+    path("schema/", SchemaView.as_view(), name="schema"),
     path(
         "schema/swagger-ui/", SpectacularSwaggerView.as_view(url_name="schema"), name="swagger-ui"
     ),
@@ -1,9 +1,16 @@
 from django.conf import settings
-from rest_framework import serializers
+from django.db import transaction
+from django.db.models import prefetch_related_objects
+from django.utils import timezone
+from rest_framework import serializers, status
+from rest_framework.exceptions import APIException, PermissionDenied
 
+from api.auth.permissions import can_administer_organization
 from api.organization.serializers import OrganizationSerializer
+from api.serializers import BatchListSerializer
 from api.series.serializers import SeriesSummarySerializer
 from fk.models import Category, IngestJob, IngestState, Organization, Series, User, Video
+from fk.models.airtime import videos_changed
 
 
 class BaseVideoSerializer(serializers.ModelSerializer):
@@ -182,6 +189,12 @@ class UploadTokenVerificationSerializer(serializers.Serializer):
     upload_token = serializers.CharField(max_length=32, trim_whitespace=False)
 
 
+class StaleClaim(APIException):
+    status_code = status.HTTP_409_CONFLICT
+    default_detail = "The job has been claimed again since; stop working on it."
+    default_code = "stale_claim"
+
+
 class IngestJobSerializer(serializers.ModelSerializer):
     """What ingest reports about an upload, and what its uploader is shown.
 
@@ -196,6 +209,15 @@ class IngestJobSerializer(serializers.ModelSerializer):
     # every video uploaded before this endpoint existed is in. The model
     # field cannot express that, because a saved row always has a time.
     updated_time = serializers.DateTimeField(read_only=True, allow_null=True)
+    # Sent back, never stored: see validate().
+    claim = serializers.IntegerField(
+        min_value=0,
+        default=0,
+        help_text=(
+            "The `claim` the job was handed out with by `/ingest/claim`; 0, or left out, "
+            "for a job that was never claimed."
+        ),
+    )
 
     class Meta:
         model = IngestJob
@@ -206,6 +228,7 @@ class IngestJobSerializer(serializers.ModelSerializer):
             "status_text",
             "error_code",
             "updated_time",
+            "claim",
         )
         read_only_fields = ("video", "updated_time")
         extra_kwargs = {
@@ -224,4 +247,256 @@ class IngestJobSerializer(serializers.ModelSerializer):
             raise serializers.ValidationError(
                 {"error_code": "Only a failed ingest may carry an error code."}
             )
+        # A report is from whoever holds the current claim, or it is from
+        # a worker that lost the job and is turned away. `pending` is the
+        # exception: it is the upload receiver queueing a new upload, which
+        # fences off whoever was working on the old one. A job nobody ever
+        # claimed has nobody to fence off, and is left for the claim-less
+        # reporting it is getting.
+        current = self.instance.claim if self.instance is not None else 0
+        claim = data.pop("claim")
+        if data.get("state") == IngestState.PENDING:
+            if current > 0:
+                data["claim"] = current + 1
+        elif claim != current:
+            raise StaleClaim()
         return data
+
+
+# As large as a page of the video list may be, so an organization can edit
+# everything it was just shown in one request, and no larger: the whole
+# batch is validated and written inside a single transaction.
+BULK_UPDATE_MAX_VIDEOS = 1000
+
+
+class CategoryNamesField(serializers.ListField):
+    """Categories by name, resolved for the whole batch at once.
+
+    A SlugRelatedField would look each name up as it parses it, which in
+    a bulk update is one query per category per video.
+    """
+
+    child = serializers.CharField()
+
+    def to_representation(self, data):
+        return [category.name for category in data.all()]
+
+
+class VideoBulkUpdateListSerializer(BatchListSerializer):
+    """Validates a batch of partial updates together, and applies it.
+
+    Each item has already passed its own field validation by the time
+    to_internal_value() gets to the batch; what remains is everything
+    that would otherwise cost queries per item -- resolving videos,
+    series and categories, the organization check, and the series/episode
+    rule -- which is answered here with one query apiece.
+    """
+
+    max_items = BULK_UPDATE_MAX_VIDEOS
+
+    def to_internal_value(self, data):
+        items = super().to_internal_value(data)
+        errors: list[dict] = [{} for _ in items]
+
+        seen: set[int] = set()
+        for index, item in enumerate(items):
+            if item["id"] in seen:
+                errors[index]["id"] = ["The same video may only appear once."]
+            seen.add(item["id"])
+        self.raise_if_any(errors)
+
+        user = self.context["request"].user
+        videos = (
+            Video.objects.visible_to(user)
+            .select_related("organization", "series")
+            .in_bulk([item["id"] for item in items])
+        )
+        for index, item in enumerate(items):
+            if item["id"] not in videos:
+                errors[index]["id"] = ["No such video."]
+        self.raise_if_any(errors)
+        # The videos are only known once the payload names them, so they
+        # become the instance here rather than being handed in by the view;
+        # save() then routes to update() as it would for a single video.
+        self.instance = [videos[item["id"]] for item in items]
+
+        # Once per distinct organization, rather than once per video: a
+        # batch is nearly always one organization's back catalogue.
+        organizations = {video.organization_id: video.organization for video in videos.values()}
+        for organization in organizations.values():
+            if not can_administer_organization(user, organization):
+                raise PermissionDenied(
+                    "You must belong to the organization that owns this content."
+                )
+
+        series = Series.objects.in_bulk(
+            {item["series_id"] for item in items if item.get("series_id") is not None}
+        )
+        names = {name for item in items for name in item.get("categories", ())}
+        categories = {
+            category.name: category for category in Category.objects.filter(name__in=names)
+        }
+        for index, item in enumerate(items):
+            item["video"] = videos[item.pop("id")]
+            if "series_id" in item:
+                series_id = item.pop("series_id")
+                if series_id is not None and series_id not in series:
+                    errors[index]["series_id"] = [
+                        f'Invalid pk "{series_id}" - object does not exist.'
+                    ]
+                    continue
+                item["series"] = series.get(series_id)
+            if "categories" in item:
+                missing = [name for name in item["categories"] if name not in categories]
+                if missing:
+                    errors[index]["categories"] = [
+                        f"Object with name={name} does not exist." for name in missing
+                    ]
+                    continue
+                # Named twice is still one category, as .set() would have it.
+                item["categories"] = [
+                    categories[name] for name in dict.fromkeys(item["categories"])
+                ]
+        self.raise_if_any(errors)
+
+        self._validate_episodes(items, errors)
+        self.raise_if_any(errors)
+        return items
+
+    @staticmethod
+    def _validate_episodes(items: list[dict], errors: list[dict]) -> None:
+        """BaseVideoSerializer.validate's series rules, for the batch as a whole.
+
+        Every item is checked against the state the batch leaves behind,
+        not against the table as it stands: renumbering a series swaps
+        numbers between its episodes, which is only a conflict if two
+        videos still share one when the batch is done.
+        """
+        claimed: dict[tuple[int, int], int] = {}
+        for index, item in enumerate(items):
+            video = item["video"]
+            if "series" in item and item["series"] is None:
+                # Clearing membership also clears the number that only has
+                # meaning inside that series.
+                item["episode_number"] = None
+            series = item.get("series", video.series)
+            episode_number = item.get("episode_number", video.episode_number)
+
+            if series is not None and series.organization_id != video.organization_id:
+                errors[index]["series_id"] = ["The series must belong to the video's organization."]
+            elif episode_number is not None and series is None:
+                errors[index]["episode_number"] = [
+                    "Choose a series before setting an episode number."
+                ]
+            elif series is not None and episode_number is not None:
+                if (series.pk, episode_number) in claimed:
+                    errors[index]["episode_number"] = [
+                        "That episode number is already used in this series."
+                    ]
+                claimed[(series.pk, episode_number)] = index
+
+        if not claimed:
+            return
+        # The rest of each series, which this batch does not touch, in one
+        # query however many series the batch spans.
+        batch = [item["video"].pk for item in items]
+        taken = (
+            Video.objects.filter(
+                series__in={series_id for series_id, _ in claimed},
+                episode_number__isnull=False,
+            )
+            .exclude(pk__in=batch)
+            .values_list("series_id", "episode_number")
+        )
+        for key in taken:
+            if key in claimed:
+                errors[claimed[key]]["episode_number"] = [
+                    "That episode number is already used in this series."
+                ]
+
+    def update(self, instance, validated_data):
+        """Write the batch as a handful of statements, in one transaction.
+
+        bulk_update() neither calls save() nor honours auto_now, so the
+        modification time is stamped here. The episode unique index is
+        checked row by row as an UPDATE proceeds, so a batch that swaps
+        two episode numbers would trip over itself halfway; every video
+        whose number moves has it cleared first, and the second statement
+        then writes the numbers the batch has already validated.
+        """
+        now = timezone.now()
+        videos = []
+        fields = {"updated_time"}
+        renumbered = []
+        category_changes = {}
+        for item in validated_data:
+            video = item.pop("video")
+            if "categories" in item:
+                category_changes[video.pk] = item.pop("categories")
+            before = (video.series_id, video.episode_number)
+            for field, value in item.items():
+                setattr(video, field, value)
+                fields.add(field)
+            if before[1] is not None and before != (video.series_id, video.episode_number):
+                renumbered.append(video.pk)
+            video.updated_time = now
+            videos.append(video)
+
+        with transaction.atomic():
+            if renumbered:
+                Video.objects.filter(pk__in=renumbered).update(episode_number=None)
+            Video.objects.bulk_update(videos, sorted(fields))
+            if category_changes:
+                through = Video.categories.through
+                through.objects.filter(video_id__in=category_changes).delete()
+                through.objects.bulk_create(
+                    through(video_id=video_id, category_id=category.pk)
+                    for video_id, categories in category_changes.items()
+                    for category in categories
+                )
+            # bulk_update() sends no signals, so the listing's cached
+            # counts are not told about publish_on_web or the categories,
+            # nor the scheduled airtime per category about the latter.
+            Category.forget_public_video_counts()
+            if category_changes:
+                videos_changed(category_changes)
+        prefetch_related_objects(videos, "categories")
+        return videos
+
+
+class VideoBulkUpdateSerializer(serializers.ModelSerializer):
+    """One entry of a bulk update: which video, and what to change about it.
+
+    Only editorial metadata is offered. The organization is deliberately
+    not among it: the batch is authorized against the organizations its
+    videos already belong to, and moving a video elsewhere is a single
+    video's PATCH, where the new owner is checked as well.
+    """
+
+    id = serializers.IntegerField()
+    series_id = serializers.IntegerField(required=False, allow_null=True)
+    categories = CategoryNamesField(required=False)
+
+    class Meta:
+        model = Video
+        list_serializer_class = VideoBulkUpdateListSerializer
+        # See BaseVideoSerializer.Meta; the list serializer applies the
+        # series/episode rule across the whole batch instead.
+        validators = ()
+        fields = (
+            "id",
+            "name",
+            "header",
+            "description",
+            "series_id",
+            "episode_number",
+            "categories",
+            "publish_on_web",
+            "is_filler",
+            "has_tono_records",
+            "ref_url",
+            "spoken_language",
+            "minimum_age",
+        )
+        # Every field but `id` is optional: an entry names only what changes.
+        extra_kwargs = {"name": {"required": False}}
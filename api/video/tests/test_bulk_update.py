@@ -0,0 +1,259 @@
+"""
+Editing many videos' metadata in one request.
+
+The batch is all-or-nothing and is checked as a whole: per-entry field
+errors come back aligned with the request, the organization check covers
+every video named, and episode numbers are judged against the series as
+the batch leaves it rather than as it found it.
+"""
+
+import pytest
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from fk.models import Category, Organization, Series, User, Video
+
+pytestmark = pytest.mark.django_db
+
+URL = reverse("api-video-bulk-update")
+
+
+@pytest.fixture
+def series(organization: Organization) -> Series:
+    return Series.objects.create(organization=organization, name="Bulk series")
+
+
+def make_video(editor: User, organization: Organization, name: str, **fields) -> Video:
+    return Video.objects.create(name=name, creator=editor, organization=organization, **fields)
+
+
+def test_updates_every_video_named(
+    editor_client: APIClient, editor: User, organization: Organization
+) -> None:
+    first = make_video(editor, organization, "First")
+    second = make_video(editor, organization, "Second")
+
+    response = editor_client.patch(
+        URL,
+        [
+            {"id": first.pk, "publishOnWeb": False, "minimumAge": 12},
+            {"id": second.pk, "spokenLanguage": "se"},
+        ],
+        format="json",
+    )
+
+    assert response.status_code == status.HTTP_200_OK
+    assert [entry["id"] for entry in response.json()] == [first.pk, second.pk]
+    first.refresh_from_db()
+    second.refresh_from_db()
+    assert (first.publish_on_web, first.minimum_age) == (False, 12)
+    assert second.spoken_language == "se"
+    # Fields an entry leaves out are left alone.
+    assert second.publish_on_web
+
+
+def test_the_modification_time_moves(
+    editor_client: APIClient, editor: User, organization: Organization
+) -> None:
+    # bulk_update() bypasses auto_now; the serializer has to stamp it.
+    video = make_video(editor, organization, "Stamped")
+    before = video.updated_time
+
+    editor_client.patch(URL, [{"id": video.pk, "name": "Renamed"}], format="json")
+
+    video.refresh_from_db()
+    assert video.updated_time > before
+
+
+def test_categories_are_replaced_by_name(
+    editor_client: APIClient, editor: User, organization: Organization
+) -> None:
+    news = Category.objects.create(id=1, name="News")
+    culture = Category.objects.create(id=2, name="Culture")
+    video = make_video(editor, organization, "Categorized")
+    video.categories.add(news)
+
+    response = editor_client.patch(
+        URL, [{"id": video.pk, "categories": ["Culture"]}], format="json"
+    )
+
+    assert response.status_code == status.HTTP_200_OK
+    assert response.json()[0]["categories"] == ["Culture"]
+    assert list(video.categories.all()) == [culture]
+
+
+def test_a_category_named_twice_is_set_once(
+    editor_client: APIClient, editor: User, organization: Organization
+) -> None:
+    culture = Category.objects.create(id=2, name="Culture")
+    video = make_video(editor, organization, "Named twice")
+
+    response = editor_client.patch(
+        URL, [{"id": video.pk, "categories": ["Culture", "Culture"]}], format="json"
+    )
+
+    assert response.status_code == status.HTTP_200_OK
+    assert list(video.categories.all()) == [culture]
+
+
+def test_episodes_may_swap_numbers(
+    editor_client: APIClient, editor: User, organization: Organization, series: Series
+) -> None:
+    one = make_video(editor, organization, "One", series=series, episode_number=1)
+    two = make_video(editor, organization, "Two", series=series, episode_number=2)
+
+    response = editor_client.patch(
+        URL,
+        [{"id": one.pk, "episodeNumber": 2}, {"id": two.pk, "episodeNumber": 1}],
+        format="json",
+    )
+
+    assert response.status_code == status.HTTP_200_OK
+    one.refresh_from_db()
+    two.refresh_from_db()
+    assert (one.episode_number, two.episode_number) == (2, 1)
+
+
+def test_two_entries_may_not_claim_the_same_episode(
+    editor_client: APIClient, editor: User, organization: Organization, series: Series
+) -> None:
+    first = make_video(editor, organization, "First")
+    second = make_video(editor, organization, "Second")
+
+    response = editor_client.patch(
+        URL,
+        [
+            {"id": first.pk, "seriesId": series.pk, "episodeNumber": 1},
+            {"id": second.pk, "seriesId": series.pk, "episodeNumber": 1},
+        ],
+        format="json",
+    )
+
+    assert response.status_code == status.HTTP_400_BAD_REQUEST
+    assert [error["attr"] for error in response.json()["errors"]] == ["1.episode_number"]
+    assert not Video.objects.filter(series=series).exists()
+
+
+def test_an_episode_outside_the_batch_still_counts(
+    editor_client: APIClient, editor: User, organization: Organization, series: Series
+) -> None:
+    make_video(editor, organization, "Existing", series=series, episode_number=1)
+    newcomer = make_video(editor, organization, "Newcomer")
+
+    response = editor_client.patch(
+        URL, [{"id": newcomer.pk, "seriesId": series.pk, "episodeNumber": 1}], format="json"
+    )
+
+    assert response.status_code == status.HTTP_400_BAD_REQUEST
+
+
+def test_one_invalid_entry_rejects_the_whole_batch(
+    editor_client: APIClient, editor: User, organization: Organization
+) -> None:
+    valid = make_video(editor, organization, "Valid")
+    invalid = make_video(editor, organization, "Invalid")
+
+    response = editor_client.patch(
+        URL,
+        [
+            {"id": valid.pk, "publishOnWeb": False},
+            {"id": invalid.pk, "spokenLanguage": "not a language tag"},
+        ],
+        format="json",
+    )
+
+    assert response.status_code == status.HTTP_400_BAD_REQUEST
+    assert [error["attr"] for error in response.json()["errors"]] == ["1.spoken_language"]
+    valid.refresh_from_db()
+    assert valid.publish_on_web
+
+
+def test_the_first_entrys_field_errors_keep_their_index(
+    editor_client: APIClient, editor: User, organization: Organization
+) -> None:
+    video = make_video(editor, organization, "First and invalid")
+
+    response = editor_client.patch(
+        URL, [{"id": video.pk, "spokenLanguage": "not a language tag"}], format="json"
+    )
+
+    assert [error["attr"] for error in response.json()["errors"]] == ["0.spoken_language"]
+
+
+def test_a_video_of_another_organization_refuses_the_batch(
+    editor_client: APIClient, editor: User, organization: Organization
+) -> None:
+    own = make_video(editor, organization, "Own")
+    stranger = User.objects.create(email="bulk-stranger@example.test")
+    foreign_org = Organization.objects.create(name="Foreign", editor=stranger)
+    foreign = make_video(stranger, foreign_org, "Foreign")
+
+    response = editor_client.patch(
+        URL,
+        [{"id": own.pk, "name": "Mine"}, {"id": foreign.pk, "name": "Not mine"}],
+        format="json",
+    )
+
+    assert response.status_code == status.HTTP_403_FORBIDDEN
+    foreign.refresh_from_db()
+    assert foreign.name == "Foreign"
+
+
+def test_a_series_of_another_organization_is_refused(
+    editor_client: APIClient, editor: User, organization: Organization
+) -> None:
+    video = make_video(editor, organization, "Own")
+    stranger = User.objects.create(email="bulk-series-owner@example.test")
+    foreign_series = Series.objects.create(
+        organization=Organization.objects.create(name="Elsewhere", editor=stranger),
+        name="Their series",
+    )
+
+    response = editor_client.patch(
+        URL, [{"id": video.pk, "seriesId": foreign_series.pk}], format="json"
+    )
+
+    assert response.status_code == status.HTTP_400_BAD_REQUEST
+    assert [error["attr"] for error in response.json()["errors"]] == ["0.series_id"]
+
+
+def test_unknown_and_repeated_videos_are_reported_per_entry(
+    editor_client: APIClient, editor: User, organization: Organization
+) -> None:
+    video = make_video(editor, organization, "Repeated")
+
+    response = editor_client.patch(URL, [{"id": video.pk}, {"id": video.pk}], format="json")
+
+    assert response.status_code == status.HTTP_400_BAD_REQUEST
+    assert [error["attr"] for error in response.json()["errors"]] == ["1.id"]
+
+    response = editor_client.patch(URL, [{"id": video.pk + 1000}], format="json")
+
+    assert [error["attr"] for error in response.json()["errors"]] == ["0.id"]
+
+
+def test_the_organization_is_checked_once_however_many_videos(
+    editor_client: APIClient,
+    editor: User,
+    organization: Organization,
+    django_assert_max_num_queries,
+) -> None:
+    videos = [make_video(editor, organization, f"Episode {n}") for n in range(20)]
+    payload = [{"id": video.pk, "isFiller": True} for video in videos]
+
+    with django_assert_max_num_queries(10):
+        response = editor_client.patch(URL, payload, format="json")
+
+    assert response.status_code == status.HTTP_200_OK
+    assert Video.objects.filter(is_filler=True).count() == 20
+
+
+def test_anonymous_callers_are_asked_to_authenticate(
+    editor: User, organization: Organization
+) -> None:
+    video = make_video(editor, organization, "Anonymous")
+
+    response = APIClient().patch(URL, [{"id": video.pk, "name": "x"}], format="json")
+
+    assert response.status_code == status.HTTP_401_UNAUTHORIZED
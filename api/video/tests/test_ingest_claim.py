@@ -0,0 +1,177 @@
+"""
+Ingest workers claiming uploads from the work queue.
+
+Each claim hands out one pending job, oldest first, and moves it out of
+`pending` so nobody else gets it. A worker that stops reporting for the
+lease period loses its job to the next one that asks.
+"""
+
+import threading
+from datetime import timedelta
+
+import pytest
+from django.db import connection, transaction
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from fk.models import IngestJob, IngestState, Organization, User, Video
+
+pytestmark = pytest.mark.django_db
+
+URL = reverse("api-ingest-job-claim")
+
+
+@pytest.fixture
+def ingest_client() -> APIClient:
+    service = User.objects.create(email="ingest@example.test", is_superuser=True)
+    client = APIClient()
+    client.force_authenticate(user=service)
+    return client
+
+
+def job_for(editor: User, organization: Organization, name: str, **fields) -> IngestJob:
+    video = Video.objects.create(name=name, creator=editor, organization=organization)
+    return IngestJob.objects.create(video=video, **fields)
+
+
+def age(job: IngestJob, by: timedelta) -> None:
+    # auto_now would stamp a save; only update() can backdate.
+    IngestJob.objects.filter(pk=job.pk).update(updated_time=timezone.now() - by)
+
+
+def test_claims_hand_out_pending_jobs_oldest_first(
+    ingest_client: APIClient, editor: User, organization: Organization
+) -> None:
+    older = job_for(editor, organization, "Older")
+    age(older, timedelta(minutes=5))
+    newer = job_for(editor, organization, "Newer")
+
+    first = ingest_client.post(URL)
+    second = ingest_client.post(URL)
+    third = ingest_client.post(URL)
+
+    assert first.status_code == status.HTTP_200_OK
+    assert [first.json()["video"], second.json()["video"]] == [older.pk, newer.pk]
+    assert first.json()["state"] == "probing"
+    assert third.status_code == status.HTTP_204_NO_CONTENT
+
+
+def test_a_job_being_worked_on_is_not_handed_out(
+    ingest_client: APIClient, editor: User, organization: Organization
+) -> None:
+    job_for(editor, organization, "Transcoding", state=IngestState.TRANSCODING)
+    job_for(editor, organization, "Done", state=IngestState.DONE, percentage_done=100)
+
+    assert ingest_client.post(URL).status_code == status.HTTP_204_NO_CONTENT
+
+
+def test_a_silent_workers_job_is_reclaimed(
+    ingest_client: APIClient, editor: User, organization: Organization, settings
+) -> None:
+    settings.INGEST_LEASE_SECONDS = 600
+    abandoned = job_for(
+        editor, organization, "Abandoned", state=IngestState.TRANSCODING, percentage_done=80
+    )
+    age(abandoned, timedelta(minutes=11))
+
+    response = ingest_client.post(URL)
+
+    assert response.json()["video"] == abandoned.pk
+    abandoned.refresh_from_db()
+    assert abandoned.state == IngestState.PROBING
+    assert abandoned.percentage_done is None
+    # Claimed afresh, so the new worker has a whole lease of its own.
+    assert abandoned.updated_time > timezone.now() - timedelta(minutes=1)
+
+
+def test_a_worker_that_lost_its_job_is_turned_away(
+    ingest_client: APIClient, editor: User, organization: Organization
+) -> None:
+    job = job_for(editor, organization, "Slow")
+    slow = ingest_client.post(URL).json()["claim"]
+    age(job, timedelta(minutes=11))
+    fresh = ingest_client.post(URL).json()["claim"]
+    detail = reverse("api-video-ingest-job-detail", args=[job.pk])
+
+    late = ingest_client.put(
+        detail, {"state": "transcoding", "percentageDone": 50, "claim": slow}, format="json"
+    )
+    current = ingest_client.put(
+        detail, {"state": "transcoding", "percentageDone": 10, "claim": fresh}, format="json"
+    )
+
+    assert fresh == slow + 1
+    assert late.status_code == status.HTTP_409_CONFLICT
+    assert current.status_code == status.HTTP_200_OK
+    job.refresh_from_db()
+    assert (job.percentage_done, job.claim) == (10, fresh)
+
+
+def test_a_new_upload_queues_the_job_again(
+    ingest_client: APIClient, editor: User, organization: Organization
+) -> None:
+    job = job_for(editor, organization, "Uploaded twice")
+    claim = ingest_client.post(URL).json()["claim"]
+    detail = reverse("api-video-ingest-job-detail", args=[job.pk])
+
+    queued = ingest_client.put(detail, {"state": "pending"}, format="json")
+    late = ingest_client.put(detail, {"state": "archiving", "claim": claim}, format="json")
+
+    assert queued.status_code == status.HTTP_200_OK
+    assert late.status_code == status.HTTP_409_CONFLICT
+    assert ingest_client.post(URL).json()["video"] == job.pk
+
+
+def test_a_new_upload_of_an_unclaimed_job_keeps_claimless_reports_working(
+    ingest_client: APIClient, editor: User, organization: Organization
+) -> None:
+    job = job_for(editor, organization, "Reported without claims", state=IngestState.DONE)
+    detail = reverse("api-video-ingest-job-detail", args=[job.pk])
+
+    queued = ingest_client.put(detail, {"state": "pending"}, format="json")
+    probing = ingest_client.put(detail, {"state": "probing"}, format="json")
+
+    assert (queued.status_code, probing.status_code) == (status.HTTP_200_OK, status.HTTP_200_OK)
+    job.refresh_from_db()
+    assert (job.state, job.claim) == (IngestState.PROBING, 0)
+
+
+def test_only_the_ingest_service_may_claim(
+    editor_client: APIClient, editor: User, organization: Organization
+) -> None:
+    job = job_for(editor, organization, "Pending")
+
+    response = editor_client.post(URL)
+
+    assert response.status_code == status.HTTP_403_FORBIDDEN
+    job.refresh_from_db()
+    assert job.state == IngestState.PENDING
+
+
+@pytest.mark.django_db(transaction=True)
+def test_a_job_locked_by_another_claim_is_skipped(editor: User, organization: Organization) -> None:
+    locked = job_for(editor, organization, "Being claimed")
+    age(locked, timedelta(minutes=5))
+    free = job_for(editor, organization, "Free")
+    holding, release = threading.Event(), threading.Event()
+
+    def claim_in_progress():
+        with transaction.atomic():
+            IngestJob.objects.select_for_update().get(pk=locked.pk)
+            holding.set()
+            release.wait(timeout=10)
+        connection.close()
+
+    other_worker = threading.Thread(target=claim_in_progress)
+    other_worker.start()
+    try:
+        assert holding.wait(timeout=10)
+        # Rather than wait for the lock on the older job, take the next.
+        claimed = IngestJob.claim_next(lease=timedelta(minutes=10))
+    finally:
+        release.set()
+        other_worker.join()
+
+    assert claimed is not None and claimed.pk == free.pk
@@ -54,6 +54,7 @@ def test_a_video_nothing_has_uploaded_to_is_pending(editor_client: APIClient, vi
         "percentageDone": None,
         "errorCode": "",
         "updatedTime": None,
+        "claim": 0,
     }
 
 
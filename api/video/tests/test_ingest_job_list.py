@@ -0,0 +1,119 @@
+"""
+The ingest state of many videos in one request.
+
+Each entry is what `/videos/{id}/ingest` would say about that video --
+including the answer for videos ingest never reported on, which here is
+worked out by the database rather than per object.
+"""
+
+from datetime import timedelta
+
+import pytest
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from fk.models import IngestJob, IngestState, Organization, User, Video
+
+pytestmark = pytest.mark.django_db
+
+URL = reverse("api-ingest-job-list")
+
+
+def make_video(editor: User, organization: Organization, name: str, **fields) -> Video:
+    return Video.objects.create(name=name, creator=editor, organization=organization, **fields)
+
+
+def listed(client: APIClient, **params) -> dict[int, dict]:
+    response = client.get(URL, params)
+    assert response.status_code == status.HTTP_200_OK
+    return {job["video"]: job for job in response.json()["results"]}
+
+
+def test_each_entry_matches_the_single_video_endpoint(
+    editor_client: APIClient, editor: User, organization: Organization
+) -> None:
+    legacy = make_video(editor, organization, "Ingested long ago", proper_import=True)
+    waiting = make_video(editor, organization, "Not uploaded yet")
+    running = make_video(editor, organization, "Transcoding")
+    IngestJob.objects.create(video=running, state=IngestState.TRANSCODING, percentage_done=30)
+
+    jobs = listed(editor_client)
+
+    for video in (legacy, waiting, running):
+        detail = editor_client.get(reverse("api-video-ingest-job-detail", args=[video.pk]))
+        assert jobs[video.pk] == detail.json()
+    assert jobs[legacy.pk]["state"] == "done"
+    assert jobs[waiting.pk]["state"] == "pending"
+
+
+def test_videos_can_be_named_by_id(
+    editor_client: APIClient, editor: User, organization: Organization
+) -> None:
+    first, _, third = (make_video(editor, organization, f"Video {n}") for n in range(3))
+
+    jobs = listed(editor_client, video_id=f"{first.pk},{third.pk}")
+
+    assert set(jobs) == {first.pk, third.pk}
+
+
+def test_active_leaves_out_finished_and_failed_jobs(
+    editor_client: APIClient, editor: User, organization: Organization
+) -> None:
+    legacy = make_video(editor, organization, "Done long ago", proper_import=True)
+    failed = make_video(editor, organization, "Failed")
+    IngestJob.objects.create(video=failed, state=IngestState.FAILED, error_code="bad_upload")
+    waiting = make_video(editor, organization, "Waiting")
+    probing = make_video(editor, organization, "Probing")
+    IngestJob.objects.create(video=probing, state=IngestState.PROBING)
+
+    assert set(listed(editor_client, active="true")) == {waiting.pk, probing.pk}
+    assert set(listed(editor_client, active="false")) == {legacy.pk, failed.pk}
+    assert set(listed(editor_client, state="done")) == {legacy.pk}
+
+
+def test_the_ingest_service_can_find_stuck_jobs(editor: User, organization: Organization) -> None:
+    stuck = make_video(editor, organization, "Stuck")
+    IngestJob.objects.create(video=stuck, state=IngestState.TRANSCODING)
+    IngestJob.objects.filter(video=stuck).update(updated_time=timezone.now() - timedelta(hours=3))
+    recent = make_video(editor, organization, "Recent")
+    IngestJob.objects.create(video=recent, state=IngestState.TRANSCODING)
+    make_video(editor, organization, "Never reported")
+    service = APIClient()
+    service.force_authenticate(User.objects.create(email="ingest@example.test", is_superuser=True))
+
+    an_hour_ago = (timezone.now() - timedelta(hours=1)).isoformat()
+    jobs = listed(service, active="true", updated_before=an_hour_ago)
+
+    assert set(jobs) == {stuck.pk}
+
+
+def test_other_organizations_uploads_are_not_listed(
+    editor_client: APIClient, editor: User, organization: Organization
+) -> None:
+    own = make_video(editor, organization, "Own")
+    stranger = User.objects.create(email="ingest-list-stranger@example.test")
+    make_video(stranger, Organization.objects.create(name="Foreign", editor=stranger), "Foreign")
+
+    assert set(listed(editor_client)) == {own.pk}
+
+
+def test_one_query_however_many_videos(
+    editor_client: APIClient,
+    editor: User,
+    organization: Organization,
+    django_assert_max_num_queries,
+) -> None:
+    for n in range(20):
+        video = make_video(editor, organization, f"Upload {n}")
+        if n % 2:
+            IngestJob.objects.create(video=video, state=IngestState.ARCHIVING)
+
+    # The caller's memberships, the count and the page; nothing per video.
+    with django_assert_max_num_queries(3):
+        assert len(listed(editor_client)) == 20
+
+
+def test_anonymous_callers_are_asked_to_authenticate() -> None:
+    assert APIClient().get(URL).status_code == status.HTTP_401_UNAUTHORIZED
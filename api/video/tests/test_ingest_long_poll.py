@@ -0,0 +1,197 @@
+"""
+Long-polling an ingest job instead of asking every second.
+
+A reader passes the `updatedTime` it last saw as `since`. If the job has
+moved on, or can move no further, the answer comes at once; otherwise the
+request is held until ingest reports again or the wait runs out.
+"""
+
+import threading
+import time
+
+import pytest
+from django.db import connection
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from fk.models import IngestJob, IngestReportListener, IngestState, Organization, User, Video
+
+pytestmark = pytest.mark.django_db
+
+
+@pytest.fixture
+def video(editor: User, organization: Organization) -> Video:
+    return Video.objects.create(
+        name="Long-polled video",
+        creator=editor,
+        organization=organization,
+        proper_import=False,
+    )
+
+
+@pytest.fixture(autouse=True)
+def stop_listening():
+    # The listener's connection would outlive the test database otherwise.
+    yield
+    IngestReportListener.stop_all()
+
+
+@pytest.fixture
+def short_wait(settings):
+    settings.INGEST_REPORT_WAIT_SECONDS = 0.2
+    return settings.INGEST_REPORT_WAIT_SECONDS
+
+
+def url(video: Video) -> str:
+    return reverse("api-video-ingest-job-detail", args=[video.pk])
+
+
+def poll(client: APIClient, video: Video, since: str):
+    started = time.monotonic()
+    response = client.get(url(video), {"since": since})
+    return response, time.monotonic() - started
+
+
+def test_a_state_that_has_moved_on_is_answered_at_once(
+    editor_client: APIClient, video: Video, settings
+) -> None:
+    settings.INGEST_REPORT_WAIT_SECONDS = 10
+    IngestJob.objects.create(video=video, state=IngestState.PROBING)
+
+    # Seen before ingest ever reported: null.
+    response, elapsed = poll(editor_client, video, since="")
+
+    assert response.status_code == status.HTTP_200_OK
+    assert response.json()["state"] == "probing"
+    assert elapsed < 5
+
+
+def test_a_final_state_is_answered_at_once(
+    editor_client: APIClient, video: Video, settings
+) -> None:
+    settings.INGEST_REPORT_WAIT_SECONDS = 10
+    IngestJob.objects.create(video=video, state=IngestState.FAILED, error_code="bad_upload")
+    seen = editor_client.get(url(video)).json()["updatedTime"]
+
+    response, elapsed = poll(editor_client, video, since=seen)
+
+    assert response.json()["state"] == "failed"
+    assert elapsed < 5
+
+
+def test_an_unchanged_state_is_held_and_then_repeated(
+    editor_client: APIClient, video: Video, short_wait: float
+) -> None:
+    IngestJob.objects.create(video=video, state=IngestState.TRANSCODING, percentage_done=10)
+    seen = editor_client.get(url(video)).json()
+
+    response, elapsed = poll(editor_client, video, since=seen["updatedTime"])
+
+    assert response.json() == seen
+    assert elapsed >= short_wait
+
+
+def test_past_the_waiter_limit_the_state_is_answered_at_once(
+    editor_client: APIClient, video: Video, settings
+) -> None:
+    settings.INGEST_REPORT_WAIT_SECONDS = 10
+    settings.INGEST_REPORT_MAX_WAITERS = 0
+    IngestJob.objects.create(video=video, state=IngestState.TRANSCODING, percentage_done=10)
+    seen = editor_client.get(url(video)).json()
+
+    response, elapsed = poll(editor_client, video, since=seen["updatedTime"])
+
+    assert response.json() == seen
+    assert elapsed < 5
+
+
+def test_since_must_be_a_time(editor_client: APIClient, video: Video) -> None:
+    response = editor_client.get(url(video), {"since": "yesterday"})
+
+    assert response.status_code == status.HTTP_400_BAD_REQUEST
+    assert [error["attr"] for error in response.json()["errors"]] == ["since"]
+
+
+def test_long_polling_is_no_way_around_the_permission_check(video: Video) -> None:
+    outsider = User.objects.create(email="long-poll-outsider@example.test")
+    client = APIClient()
+    client.force_authenticate(user=outsider)
+
+    response = client.get(url(video), {"since": ""})
+
+    assert response.status_code == status.HTTP_403_FORBIDDEN
+
+
+@pytest.mark.django_db(transaction=True)
+def test_a_committed_report_wakes_the_waiter(video: Video) -> None:
+    # Only a committed report is announced, which the per-test rollback
+    # never gets to; this one commits for real, from another connection.
+    def report_from_ingest():
+        time.sleep(0.1)
+        IngestJob(video=video, state=IngestState.ARCHIVING).save()
+        connection.close()
+
+    reported = threading.Event()
+    listener = IngestReportListener.shared()
+    with listener.waiting(video.pk, reported.set) as can_wait:
+        assert can_wait and listener.ready()
+        reporter = threading.Thread(target=report_from_ingest)
+        reporter.start()
+        started = time.monotonic()
+
+        assert reported.wait(timeout=10)
+        assert time.monotonic() - started < 5
+
+    reporter.join()
+
+
+@pytest.mark.django_db(transaction=True)
+def test_reports_on_other_videos_do_not_end_the_wait(
+    video: Video, editor: User, organization: Organization
+) -> None:
+    other = Video.objects.create(name="Other upload", creator=editor, organization=organization)
+
+    reported = threading.Event()
+    listener = IngestReportListener.shared()
+    with listener.waiting(video.pk, reported.set):
+        assert listener.ready()
+        IngestJob(video=other, state=IngestState.PROBING).save()
+
+        assert not reported.wait(timeout=0.3)
+
+
+@pytest.mark.django_db(transaction=True)
+def test_waiters_share_the_one_connection(video: Video) -> None:
+    listener = IngestReportListener.shared()
+    first, second = threading.Event(), threading.Event()
+
+    with listener.waiting(video.pk, first.set), listener.waiting(video.pk, second.set):
+        assert listener.ready()
+        IngestJob(video=video, state=IngestState.PROBING).save()
+
+        assert first.wait(timeout=10)
+        assert second.wait(timeout=10)
+    assert IngestReportListener.shared() is listener
+
+
+@pytest.mark.django_db(transaction=True)
+def test_a_held_poll_answers_as_soon_as_ingest_reports(
+    editor_client: APIClient, video: Video, settings
+) -> None:
+    settings.INGEST_REPORT_WAIT_SECONDS = 10
+    IngestJob(video=video, state=IngestState.PROBING).save()
+    seen = editor_client.get(url(video)).json()["updatedTime"]
+
+    def report_from_ingest():
+        time.sleep(0.5)
+        IngestJob(video=video, state=IngestState.ARCHIVING).save()
+        connection.close()
+
+    reporter = threading.Thread(target=report_from_ingest)
+    reporter.start()
+    response, elapsed = poll(editor_client, video, since=seen)
+    reporter.join()
+
+    assert response.json()["state"] == "archiving"
+    assert 0.5 <= elapsed < 5
@@ -1,14 +1,23 @@
+import asyncio
+import functools
+from datetime import timedelta
 from hmac import compare_digest
 
+from asgiref.sync import sync_to_async
+from django.conf import settings
 from django.contrib.postgres.search import SearchQuery, SearchRank
-from django.db.models import F
+from django.db import transaction
+from django.db.models import F, Q
 from django.db.models.functions import Greatest
+from django.utils.dateparse import parse_datetime
 from django_filters import rest_framework as djfilters
-from drf_spectacular.utils import OpenApiResponse, extend_schema
+from drf_spectacular.utils import OpenApiParameter, OpenApiResponse, extend_schema
 from rest_framework import generics, status
-from rest_framework.exceptions import NotFound
+from rest_framework.exceptions import NotFound, ValidationError
+from rest_framework.permissions import IsAuthenticated
 from rest_framework.response import Response
 
+from api.auth.membership import membership
 from api.auth.permissions import (
     IngestJobPermission,
     IsInOrganizationOrDisallow,
@@ -19,11 +28,13 @@ from api.pagination import FkDefaultPagination
 from api.video.serializers import (
     IngestJobSerializer,
     UploadTokenVerificationSerializer,
+    VideoBulkUpdateSerializer,
     VideoCreateSerializer,
     VideoSerializer,
     VideoUploadTokenSerializer,
 )
-from fk.models import Category, IngestJob, Video
+from fk.models import Category, IngestJob, IngestReportListener, IngestState, Video
+from fkweb.middleware import CacheVisibility
 
 
 class VideoDetail(generics.RetrieveUpdateDestroyAPIView):
@@ -34,6 +45,7 @@ class VideoDetail(generics.RetrieveUpdateDestroyAPIView):
     queryset = Video.objects.all()
     serializer_class = VideoSerializer
     permission_classes = (IsInOrganizationOrReadOnly,)
+    cache_visibility = CacheVisibility.STAFF
 
     def get_queryset(self):
         # Videos of an organization without an ansvarlig redaktor are
@@ -41,6 +53,41 @@ class VideoDetail(generics.RetrieveUpdateDestroyAPIView):
         return Video.objects.visible_to(self.request.user)
 
 
+class VideoBulkUpdate(generics.GenericAPIView):
+    """Edit the metadata of many videos in one request.
+
+    For organizations renumbering a series or flipping a flag across their
+    back catalogue, which would otherwise be one PATCH -- one permission
+    check, one validation and one save -- per video. The batch stands or
+    falls as a whole: one invalid entry and nothing is written.
+    """
+
+    # Only for schema generation; the serializer looks videos up itself.
+    queryset = Video.objects.none()
+    serializer_class = VideoBulkUpdateSerializer
+    permission_classes = (IsAuthenticated,)
+    http_method_names = ["patch", "options"]
+
+    @extend_schema(
+        operation_id="videos_bulk_partial_update",
+        summary="Update many videos at once",
+        description=(
+            "Takes a list of partial updates, each naming a video by `id` and giving only "
+            "the fields to change. Every video must belong to an organization you "
+            "administer. Episode numbers are checked against the series as the whole batch "
+            "leaves it, so episodes may swap numbers within one request. Validation errors "
+            "are reported per entry; if any entry is invalid, no video is changed."
+        ),
+        request=VideoBulkUpdateSerializer(many=True),
+        responses=VideoBulkUpdateSerializer(many=True),
+    )
+    def patch(self, request, *args, **kwargs):
+        serializer = self.get_serializer(data=request.data, many=True)
+        serializer.is_valid(raise_exception=True)
+        serializer.save()
+        return Response(serializer.data)
+
+
 class VideoUploadTokenDetail(generics.RetrieveAPIView):
     """
     Video details
@@ -103,6 +150,10 @@ class VideoIngestJobDetail(generics.RetrieveUpdateAPIView):
 
     def get_object(self) -> IngestJob:
         video = generics.get_object_or_404(Video.objects.all(), pk=self.kwargs["pk"])
+        if self.request.method == "PUT":
+            # Held until the report is saved, so that no claim is made
+            # between checking the report's claim and saving it.
+            IngestJob.objects.select_for_update().filter(pk=video.pk).first()
         # Unsaved when ingest has never reported; saving it is the PUT's
         # business, and a reader must not create rows by looking.
         job = IngestJob.for_video(video)
@@ -115,11 +166,89 @@ class VideoIngestJobDetail(generics.RetrieveUpdateAPIView):
         description=(
             "How far ingest has got with the video's uploaded file. Videos that were "
             "ingested before this endpoint existed report `done`; videos nothing has "
-            "uploaded to report `pending`."
+            "uploaded to report `pending`.\n\n"
+            "Pass the `updatedTime` last seen as `since` to long-poll: the response is "
+            "held until ingest reports again or a little under half a minute passes, "
+            "and comes back at once if the state has already moved on or is final, or "
+            "if the server is already holding as many requests as it will."
         ),
+        parameters=[
+            OpenApiParameter(
+                "since",
+                str,
+                description=(
+                    "The `updatedTime` of the state already shown; empty if that was null."
+                ),
+            )
+        ],
     )
     def get(self, request, *args, **kwargs):
-        return super().get(request, *args, **kwargs)
+        if "since" not in request.query_params:
+            return super().get(request, *args, **kwargs)
+        since = self.parse_since(request.query_params["since"])
+        job = self.get_object()
+        response = Response(self.get_serializer(job).data)
+        # Read by as_view()'s long poll, which holds the request open and
+        # asks again once ingest reports.
+        response.unchanged = job.state not in IngestState.terminal() and job.updated_time == since
+        return response
+
+    @classmethod
+    def as_view(cls, **initkwargs):
+        """The view, with a long poll (`?since=`) that waits without a thread.
+
+        An uploader watching a progress bar otherwise asks every second or
+        two, each time for the same answer. Held open, one request covers
+        every report that changes nothing, and the next report is shown the
+        moment it is committed rather than at the next tick.
+
+        DRF views are sync, so the wait is done out here, in a coroutine,
+        around two ordinary calls of the view: one for the state now, and,
+        if that is what the caller already has, another once ingest reports
+        or INGEST_REPORT_WAIT_SECONDS pass. Under ASGI the wait holds
+        nothing but a callback on the process's IngestReportListener; under
+        WSGI it holds the worker thread, as any async view does there.
+        """
+        view = sync_to_async(super().as_view(**initkwargs))
+
+        @functools.wraps(view.func)
+        async def long_polling_view(request, *args, **kwargs):
+            if request.method != "GET" or "since" not in request.GET:
+                return await view(request, *args, **kwargs)
+            loop = asyncio.get_running_loop()
+            reported = asyncio.Event()
+            listener = IngestReportListener.shared()
+
+            def wake() -> None:
+                loop.call_soon_threadsafe(reported.set)
+
+            # Registered before the first read, so that a report committed
+            # in between still wakes the wait.
+            with listener.waiting(kwargs["pk"], wake) as admitted:
+                response = await view(request, *args, **kwargs)
+                if not (admitted and getattr(response, "unchanged", False)):
+                    return response
+                if not await sync_to_async(listener.ready, thread_sensitive=False)():
+                    return response
+                try:
+                    await asyncio.wait_for(reported.wait(), settings.INGEST_REPORT_WAIT_SECONDS)
+                except TimeoutError:
+                    pass
+                return await view(request, *args, **kwargs)
+
+        return long_polling_view
+
+    @staticmethod
+    def parse_since(value: str):
+        if not value:
+            return None
+        try:
+            since = parse_datetime(value)
+        except ValueError:
+            since = None
+        if since is None:
+            raise ValidationError({"since": "Expected the updatedTime of an ingest report."})
+        return since
 
     @extend_schema(
         operation_id="videos_ingest_report",
@@ -127,11 +256,140 @@ class VideoIngestJobDetail(generics.RetrieveUpdateAPIView):
         description=(
             "Replaces the video's ingest state with the one given. Reserved for the "
             "ingest service; the whole state is sent every time, so a retried report "
-            "is indistinguishable from the first."
+            "is indistinguishable from the first.\n\n"
+            "Reporting `pending` queues the video for a worker to claim; the upload "
+            "receiver does so once the file is in. Any other report must carry the "
+            "job's current `claim`, and is answered 409 when the job has been claimed "
+            "again since -- the worker sending it has lost the job."
         ),
+        responses={
+            200: IngestJobSerializer,
+            409: OpenApiResponse(description="The job has been claimed again since."),
+        },
     )
     def put(self, request, *args, **kwargs):
-        return super().put(request, *args, **kwargs)
+        with transaction.atomic():
+            return super().put(request, *args, **kwargs)
+
+
+class NumberInFilter(djfilters.BaseInFilter, djfilters.NumberFilter):
+    pass
+
+
+class IngestJobFilter(djfilters.FilterSet):
+    video_id = NumberInFilter(field_name="pk", label="Comma-separated video ids")
+    organization = djfilters.NumberFilter(field_name="organization")
+    state = djfilters.MultipleChoiceFilter(choices=IngestState.choices, method="filter_state")
+    active = djfilters.BooleanFilter(method="filter_active", label="Not yet done or failed")
+    updated_before = djfilters.IsoDateTimeFilter(method="filter_updated_before")
+
+    class Meta:
+        model = Video
+        fields = []
+
+    def filter_state(self, queryset, name, value):
+        return queryset.filter(self._in_states(set(value)))
+
+    def filter_active(self, queryset, name, value):
+        condition = self._in_states(set(IngestState) - IngestState.terminal())
+        return queryset.filter(condition if value else ~condition)
+
+    def filter_updated_before(self, queryset, name, value):
+        # Only a job that has reported has a time; a video ingest never
+        # touched is not stuck, it is waiting.
+        return queryset.filter(ingest_job__updated_time__lt=value)
+
+    @staticmethod
+    def _in_states(states) -> Q:
+        # The same answer as filtering on the synthesized `ingest_state`,
+        # but stated on the job's own column where there is a job, so the
+        # state index can serve "everything stuck in transcoding".
+        condition = Q(ingest_job__state__in=states)
+        if IngestState.DONE in states:
+            condition |= Q(ingest_job__isnull=True, proper_import=True)
+        if IngestState.PENDING in states:
+            condition |= Q(ingest_job__isnull=True, proper_import=False)
+        return condition
+
+
+class IngestJobList(generics.ListAPIView):
+    """Ingest state for many videos in one request.
+
+    The upload manager lists an organization's recent uploads, and asking
+    VideoIngestJobDetail about each one costs a request, a permission check
+    and two queries apiece. Here the whole page is one query, with the
+    answer for videos ingest has never reported on worked out in SQL.
+    """
+
+    serializer_class = IngestJobSerializer
+    permission_classes = (IsAuthenticated,)
+    pagination_class = FkDefaultPagination
+    filterset_class = IngestJobFilter
+
+    def get_queryset(self):
+        # The read side of IngestJobPermission, as a filter: staff see
+        # every video, anyone else the videos of organizations they edit
+        # or belong to.
+        if getattr(self, "swagger_fake_view", False):
+            return Video.objects.none()
+        user = self.request.user
+        videos = Video.objects.all()
+        if not user.is_staff:
+            videos = videos.filter(organization_id__in=membership(user).organizations)
+        return IngestJob.annotate_videos(videos).order_by("-id")
+
+    def paginate_queryset(self, queryset):
+        page = super().paginate_queryset(queryset)
+        return [IngestJob.from_annotated(video) for video in page]
+
+    @extend_schema(
+        operation_id="ingest_list",
+        summary="Read the ingest state of many videos",
+        description=(
+            "The same state as `/videos/{id}/ingest`, for every video matching the "
+            "filters that you may read it for, newest video first. `video_id` takes a "
+            "comma-separated list; `active` narrows to jobs not yet done or failed, and "
+            "`updated_before` to jobs that last reported before the given time."
+        ),
+    )
+    def get(self, request, *args, **kwargs):
+        return super().get(request, *args, **kwargs)
+
+
+class IngestJobClaim(generics.GenericAPIView):
+    """The ingest work queue: each call hands one worker one upload.
+
+    Lets several ingest workers run side by side off this database alone,
+    with no broker in between; IngestJob.claim_next() is what keeps two of
+    them from taking the same upload.
+    """
+
+    queryset = IngestJob.objects.none()
+    serializer_class = IngestJobSerializer
+    permission_classes = (IngestJobPermission,)
+
+    @extend_schema(
+        operation_id="ingest_claim",
+        summary="Claim the next upload to ingest",
+        description=(
+            "Reserved for the ingest service. Moves the oldest pending job to `probing` "
+            "and returns it; the caller then reports progress on it as usual, sending "
+            "back the `claim` it was given. A job whose worker has not reported for the "
+            "lease period is handed out again, with a new `claim`. Answers 204 when "
+            "there is nothing to do. Jobs are queued by reporting `pending` on "
+            "`/videos/{id}/ingest`."
+        ),
+        request=None,
+        responses={
+            200: IngestJobSerializer,
+            204: OpenApiResponse(description="No upload is waiting to be ingested."),
+        },
+    )
+    def post(self, request, *args, **kwargs):
+        job = IngestJob.claim_next(lease=timedelta(seconds=settings.INGEST_LEASE_SECONDS))
+        if job is None:
+            return Response(status=status.HTTP_204_NO_CONTENT)
+        return Response(self.get_serializer(job).data)
 
 
 class VideoFilter(djfilters.FilterSet):
@@ -275,6 +533,7 @@ class VideoList(RequireTargetOrganizationMembership, generics.ListCreateAPIView)
     pagination_class = FkDefaultPagination
     filterset_class = VideoFilter
     permission_classes = (IsInOrganizationOrReadOnly,)
+    cache_visibility = CacheVisibility.STAFF
     ordering_fields = [
         f.column for f in Video._meta.fields if f.column in VideoSerializer.Meta().fields
     ]
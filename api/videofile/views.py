@@ -5,6 +5,7 @@ from api.auth.permissions import IsInOrganizationOrReadOnly, RequireTargetOrgani
 from api.pagination import FkDefaultPagination
 from api.videofile.serializers import VideoFileSerializer
 from fk.models import VideoFile
+from fkweb.middleware import CacheVisibility
 
 
 class VideoFileFilter(djfilters.FilterSet):
@@ -29,3 +30,4 @@ class VideoFileViewSet(RequireTargetOrganizationMembership, viewsets.ModelViewSe
     pagination_class = FkDefaultPagination
     filterset_class = VideoFileFilter
     permission_classes = (IsInOrganizationOrReadOnly,)
+    cache_visibility = CacheVisibility.PUBLIC
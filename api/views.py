@@ -3,17 +3,24 @@
 
 import logging
 
+from djangorestframework_camel_case.parser import CamelCaseJSONParser
 from drf_spectacular.utils import OpenApiTypes, extend_schema
-from rest_framework.decorators import api_view
+from rest_framework.decorators import action, api_view
 from rest_framework.response import Response
 from rest_framework.reverse import reverse
 from rest_framework.viewsets import ModelViewSet
 
 from api.auth.permissions import IsStaffOrReadOnly
 from api.pagination import FkDefaultPagination
-from api.schedule.serializers import AsRunSerializer
+from api.parsers import CamelCaseNDJSONParser
+from api.schedule.serializers import (
+    AsRunAppendResultSerializer,
+    AsRunAppendSerializer,
+    AsRunSerializer,
+)
 from api.serializers import CategorySerializer
 from fk.models import AsRun, Category
+from fkweb.middleware import CacheVisibility
 
 logger = logging.getLogger(__name__)
 
@@ -63,11 +70,45 @@ class AsRunViewSet(ModelViewSet):
     queryset = AsRun.objects.all()
     serializer_class = AsRunSerializer
     permission_classes = (IsStaffOrReadOnly,)
+    cache_visibility = CacheVisibility.PUBLIC
     pagination_class = FkDefaultPagination
 
+    @extend_schema(
+        operation_id="asrun_bulk_create",
+        summary="Append many entries to the playout log",
+        description=(
+            "Takes the entries as a JSON array, or as newline-delimited JSON "
+            "(`application/x-ndjson`), one entry per line. `playedAt` is required. The "
+            "batch is written whole or not at all. An entry already in the log -- the same "
+            "playout, `playedAt`, and video or programme name -- is skipped rather than "
+            "logged twice, so a batch may safely be sent again."
+        ),
+        request=AsRunAppendSerializer(many=True),
+        responses=AsRunAppendResultSerializer,
+    )
+    @action(
+        detail=False,
+        methods=["post"],
+        parser_classes=[CamelCaseJSONParser, CamelCaseNDJSONParser],
+    )
+    def bulk(self, request):
+        serializer = AsRunAppendSerializer(data=request.data, many=True)
+        serializer.is_valid(raise_exception=True)
+        serializer.save()
+        return Response(
+            AsRunAppendResultSerializer({"received": len(serializer.validated_data)}).data
+        )
+
 
 class CategoryViewSet(ModelViewSet):
     queryset = Category.objects.all()
     serializer_class = CategorySerializer
     permission_classes = (IsStaffOrReadOnly,)
+    cache_visibility = CacheVisibility.PUBLIC
     pagination_class = FkDefaultPagination
+
+    def get_serializer_context(self):
+        return {
+            **super().get_serializer_context(),
+            "public_video_counts": Category.public_video_counts(),
+        }
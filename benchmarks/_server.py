@@ -0,0 +1,64 @@
+"""What the benchmarks share: a gunicorn to run against, and clients for it."""
+
+import contextlib
+import http.client
+import os
+import socket
+import subprocess
+import sys
+import time
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+
+
+def wait_for(port: int, timeout: float = 30) -> None:
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            socket.create_connection(("127.0.0.1", port), timeout=1).close()
+            return
+        except OSError:
+            time.sleep(0.1)
+    raise RuntimeError(f"gunicorn did not start listening on {port}")
+
+
+@contextlib.contextmanager
+def gunicorn(port: int, settings: str, **env: str):
+    """gunicorn as gunicorn.conf.py sets it up, with `env` on top.
+
+    The page cache is switched off (CACHE_URL=dummycache://) so that every
+    request does the work it would on a miss.
+    """
+    server = subprocess.Popen(
+        [sys.executable, "-m", "gunicorn", "--bind", f"127.0.0.1:{port}", "--log-level", "warning"],
+        cwd=ROOT,
+        env={
+            **os.environ,
+            "DJANGO_SETTINGS_MODULE": settings,
+            "CACHE_URL": "dummycache://",
+            **env,
+        },
+    )
+    try:
+        wait_for(port)
+        yield
+    finally:
+        server.terminate()
+        server.wait()
+
+
+def drive(port: int, path: str, requests: int) -> list[float]:
+    """GET `path` `requests` times over one keep-alive connection; the latencies."""
+    connection = http.client.HTTPConnection("127.0.0.1", port)
+    latencies = []
+    for _ in range(requests):
+        started = time.perf_counter()
+        connection.request("GET", path)
+        response = connection.getresponse()
+        response.read()
+        latencies.append(time.perf_counter() - started)
+        if response.status != 200:
+            raise RuntimeError(f"{path} answered {response.status}")
+    connection.close()
+    return latencies
@@ -0,0 +1,123 @@
+"""How many feed pollers one pod keeps up with, under WSGI and under ASGI.
+
+A poller holds a keep-alive connection and asks for a feed once every
+--interval seconds, as an EPG consumer or a feed reader does. For each
+number of pollers, and each server -- gthread as the chart runs it, and
+the uvicorn worker serving fkweb.asgi -- this reports the polls answered
+per second against those asked for, the 95th percentile latency, and
+how many polls failed. A pod has kept up while the two rates agree, the
+latency stays flat and nothing fails.
+
+    uv run python benchmarks/asgi_pollers.py [--pollers 25 50 100 200] [--seconds 15] [--cached]
+
+By default every poll renders the feed, as on a cache miss; --cached
+turns the page cache back on (per process, in memory), so that nearly
+every poll is the hit it is in production.
+
+Give the database some schedule first, as for gunicorn_workers.py.
+"""
+
+import argparse
+import asyncio
+import statistics
+import time
+
+from _server import gunicorn
+
+SERVERS = {
+    "gthread, 2 workers x 4 threads": {
+        "GUNICORN_WORKER_CLASS": "gthread",
+        "WEB_CONCURRENCY": "2",
+        "GUNICORN_THREADS": "4",
+    },
+    "uvicorn (ASGI), 2 workers": {
+        "GUNICORN_WORKER_CLASS": "uvicorn",
+        "WEB_CONCURRENCY": "2",
+    },
+}
+
+RECONNECTS = 5
+
+
+async def fetch(reader: asyncio.StreamReader, writer: asyncio.StreamWriter, path: str) -> bool:
+    """GET `path` on an open connection; whether it answered 200."""
+    writer.write(f"GET {path} HTTP/1.1\r\nHost: localhost\r\n\r\n".encode())
+    head = await reader.readuntil(b"\r\n\r\n")
+    # Django's CommonMiddleware sets Content-Length on everything here.
+    length = next(
+        int(line.split(b":", 1)[1])
+        for line in head.split(b"\r\n")
+        if line.lower().startswith(b"content-length:")
+    )
+    await reader.readexactly(length)
+    return head.split(b" ", 2)[1] == b"200"
+
+
+async def poll(
+    port: int, path: str, interval: float, until: float, latencies: list, failures: list
+) -> None:
+    reader, writer = await asyncio.open_connection("127.0.0.1", port)
+    while (started := time.monotonic()) < until:
+        for attempt in range(RECONNECTS + 1):
+            try:
+                answered = await fetch(reader, writer, path)
+                break
+            except (asyncio.IncompleteReadError, ConnectionError):
+                # The server closed the connection -- a worker recycled
+                # after max_requests, say -- and, as any client would, we
+                # connect again, to whichever worker takes it.
+                if attempt == RECONNECTS:
+                    raise
+                writer.close()
+                await asyncio.sleep(0.1)
+                reader, writer = await asyncio.open_connection("127.0.0.1", port)
+        if answered:
+            latencies.append(time.monotonic() - started)
+        else:
+            failures.append(started)
+        await asyncio.sleep(max(0, interval - (time.monotonic() - started)))
+    writer.close()
+
+
+async def run_pollers(pollers: int, args: argparse.Namespace) -> tuple[float, float, int]:
+    latencies: list[float] = []
+    failures: list[float] = []
+    started = time.monotonic()
+    until = started + args.seconds
+
+    # Spread the pollers over an interval, as real ones are.
+    async def staggered(n: int) -> None:
+        await asyncio.sleep(args.interval * n / pollers)
+        await poll(args.port, args.path, args.interval, until, latencies, failures)
+
+    await asyncio.gather(*(staggered(n) for n in range(pollers)))
+    elapsed = time.monotonic() - started
+    return len(latencies) / elapsed, statistics.quantiles(latencies, n=20)[-1], len(failures)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--pollers", type=int, nargs="+", default=[25, 50, 100, 200])
+    parser.add_argument("--interval", type=float, default=1.0, help="seconds between polls")
+    parser.add_argument("--seconds", type=float, default=15)
+    parser.add_argument("--path", default="/xmltv/upcoming/")
+    parser.add_argument("--port", type=int, default=8767)
+    parser.add_argument("--settings", default="fkweb.settings.local")
+    parser.add_argument("--cached", action="store_true", help="keep the page cache on")
+    args = parser.parse_args()
+
+    cache = {"CACHE_URL": "locmemcache://"} if args.cached else {}
+    for label, env in SERVERS.items():
+        with gunicorn(args.port, args.settings, **env, **cache):
+            asyncio.run(run_pollers(2, args))
+            for pollers in args.pollers:
+                answered, p95, failed = asyncio.run(run_pollers(pollers, args))
+                print(
+                    f"{label:>31}, {pollers:4} pollers: "
+                    f"{answered:6.1f} of {pollers / args.interval:6.1f} polls/s, "
+                    f"p95 {p95 * 1000:7.1f} ms, {failed} failed"
+                )
+
+
+if __name__ == "__main__":
+    main()
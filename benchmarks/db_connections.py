@@ -0,0 +1,60 @@
+"""Requests per second with and without persistent database connections.
+
+Starts gunicorn twice against the database DATABASE_URL names, once with
+DATABASE_CONN_MAX_AGE=0 (a new connection per request) and once with it
+set, and drives the same endpoint through each with a few keep-alive
+clients. The page cache is switched off (CACHE_URL=dummycache://) so that
+every request reaches the database.
+
+    uv run python benchmarks/db_connections.py [--requests 2000] [--workers 4]
+
+Against a local Postgres the difference is mostly backend start-up and
+authentication; across a network, with TLS, it is larger.
+"""
+
+import argparse
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from _server import drive, gunicorn
+
+
+def run(conn_max_age: int, args: argparse.Namespace) -> float:
+    with gunicorn(
+        args.port,
+        args.settings,
+        DATABASE_CONN_MAX_AGE=str(conn_max_age),
+        GUNICORN_WORKER_CLASS="sync",
+        WEB_CONCURRENCY=str(args.workers),
+    ):
+        # Warm up: imports, and with persistent connections the connections.
+        drive(args.port, args.path, args.workers * 5)
+        per_client = args.requests // args.workers
+        started = time.perf_counter()
+        with ThreadPoolExecutor(args.workers) as clients:
+            for future in [
+                clients.submit(drive, args.port, args.path, per_client) for _ in range(args.workers)
+            ]:
+                future.result()
+        return per_client * args.workers / (time.perf_counter() - started)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--requests", type=int, default=2000)
+    parser.add_argument("--workers", type=int, default=4, help="gunicorn sync workers, and clients")
+    parser.add_argument("--path", default="/api/scheduling/policy")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--settings", default="fkweb.settings.local")
+    parser.add_argument("--conn-max-age", type=int, default=60)
+    args = parser.parse_args()
+
+    for label, conn_max_age in (
+        ("connection per request", 0),
+        (f"persistent ({args.conn_max_age}s)", args.conn_max_age),
+    ):
+        print(f"{label:>28}: {run(conn_max_age, args):7.1f} requests/s")
+
+
+if __name__ == "__main__":
+    main()
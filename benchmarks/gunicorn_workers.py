@@ -0,0 +1,84 @@
+"""How gunicorn's worker model holds up when some requests are slow.
+
+Runs gunicorn in a few configurations and, against each, a handful of
+clients asking a quick endpoint while one client keeps asking a slow one
+-- the TV-Anytime week, a few hundred milliseconds of rendering. Reports
+the quick endpoint's throughput and its 95th percentile latency, which is
+what a slow request sitting on a worker shows up in.
+
+    uv run python benchmarks/gunicorn_workers.py [--requests 1000] [--clients 8]
+
+Give the database some schedule first (the synthetic data generator, or a
+copy of production) so the slow endpoint has something to render.
+"""
+
+import argparse
+import statistics
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from _server import drive, gunicorn
+
+CONFIGURATIONS = {
+    "sync, 1 worker (the old default)": {"GUNICORN_WORKER_CLASS": "sync", "WEB_CONCURRENCY": "1"},
+    "sync, 4 workers": {"GUNICORN_WORKER_CLASS": "sync", "WEB_CONCURRENCY": "4"},
+    "gthread, 1 worker x 4 threads": {
+        "GUNICORN_WORKER_CLASS": "gthread",
+        "WEB_CONCURRENCY": "1",
+        "GUNICORN_THREADS": "4",
+    },
+    "gthread, 2 workers x 4 threads": {
+        "GUNICORN_WORKER_CLASS": "gthread",
+        "WEB_CONCURRENCY": "2",
+        "GUNICORN_THREADS": "4",
+    },
+}
+
+
+def run(env: dict[str, str], args: argparse.Namespace) -> tuple[float, float]:
+    with gunicorn(args.port, args.settings, **env):
+        drive(args.port, args.quick, args.clients)
+        drive(args.port, args.slow, 1)
+        done = threading.Event()
+
+        def keep_slow_busy():
+            while not done.is_set():
+                drive(args.port, args.slow, 1)
+
+        slow = threading.Thread(target=keep_slow_busy)
+        slow.start()
+        per_client = args.requests // args.clients
+        started = time.perf_counter()
+        with ThreadPoolExecutor(args.clients) as clients:
+            latencies = [
+                latency
+                for future in [
+                    clients.submit(drive, args.port, args.quick, per_client)
+                    for _ in range(args.clients)
+                ]
+                for latency in future.result()
+            ]
+        elapsed = time.perf_counter() - started
+        done.set()
+        slow.join()
+    return len(latencies) / elapsed, statistics.quantiles(latencies, n=20)[-1]
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--requests", type=int, default=1000)
+    parser.add_argument("--clients", type=int, default=8)
+    parser.add_argument("--quick", default="/api/scheduling/policy")
+    parser.add_argument("--slow", default="/api/tvanytime/upcoming")
+    parser.add_argument("--port", type=int, default=8766)
+    parser.add_argument("--settings", default="fkweb.settings.local")
+    args = parser.parse_args()
+
+    for label, env in CONFIGURATIONS.items():
+        throughput, p95 = run(env, args)
+        print(f"{label:>34}: {throughput:7.1f} requests/s, p95 {p95 * 1000:6.1f} ms")
+
+
+if __name__ == "__main__":
+    main()
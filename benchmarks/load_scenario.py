@@ -0,0 +1,223 @@
+"""How the API holds up under a mix of requests shaped like a day's traffic.
+
+A few clients, each on a keep-alive connection, ask for what the site and
+its consumers ask for, in about the proportions they ask for it: the
+schedule a day at a time, the video catalogue and its organizations and
+series, free-text search, the EPG and news feeds, and -- given a staff
+token -- the ingest dashboard. The ids and search words come from the
+database itself. Reports, for each kind of request, how many there were,
+how many failed, and the latency percentiles, then the requests per
+second overall.
+
+    uv run python benchmarks/load_scenario.py [--clients 8] [--seconds 60] [--token KEY] [--cached]
+
+Fill a database with the synthetic data generator first, which prints a
+staff token for --token:
+
+    ./manage.py generate_synthetic_data
+
+By default the scenario runs against its own gunicorn, with the page cache
+off as on a miss; --cached turns it on (per process, in memory), and --url
+aims the clients at a server that is already running instead. The ingest
+dashboard's long poll (`?since=`) is left out: it holds a request open by
+design, which says nothing about latency.
+"""
+
+import argparse
+import contextlib
+import http.client
+import json
+import random
+import statistics
+import threading
+import time
+from collections import defaultdict
+from datetime import date, timedelta
+from urllib.parse import quote, urlsplit
+
+from _server import gunicorn
+
+RECONNECTS = 5
+
+
+class Catalogue:
+    """What there is to ask for: ids, and words to search for."""
+
+    def __init__(self, connection: http.client.HTTPConnection, headers: dict, staff: dict) -> None:
+        def results(path: str, headers: dict = headers) -> list[dict]:
+            connection.request("GET", path, headers=headers)
+            response = connection.getresponse()
+            body = response.read()
+            if response.status != 200:
+                raise RuntimeError(f"{path} answered {response.status}")
+            return json.loads(body)["results"]
+
+        videos = results("/api/videos?limit=1000")
+        self.videos = [video["id"] for video in videos]
+        self.organizations = [
+            organization["id"] for organization in results("/api/organization?limit=1000")
+        ]
+        self.series = [series["id"] for series in results("/api/series?limit=1000")]
+        self.words = sorted(
+            {word for video in videos for word in video["name"].lower().split() if len(word) > 3}
+        )
+        self.ingesting = (
+            [job["video"] for job in results("/api/ingest?active=true&limit=1000", staff)]
+            if staff
+            else []
+        )
+        if not (self.videos and self.organizations and self.words):
+            raise RuntimeError("The database has no videos or organizations to ask for")
+
+
+# What is asked for, how often relative to the rest, and how to pick the
+# path. Each pick gets the client's random generator and the catalogue.
+MIX = {
+    "schedule day": (
+        20,
+        lambda rng, c: (
+            f"/api/scheduleitems?date={date.today() + timedelta(days=rng.randint(-7, 14))}&days=1"
+        ),
+    ),
+    "scheduling policy": (3, lambda rng, c: "/api/scheduling/policy"),
+    "video list": (10, lambda rng, c: f"/api/videos?offset={rng.randrange(0, 500, 50)}"),
+    "organization's videos": (
+        6,
+        lambda rng, c: f"/api/videos?organization={rng.choice(c.organizations)}",
+    ),
+    "video": (15, lambda rng, c: f"/api/videos/{rng.choice(c.videos)}"),
+    "organization": (6, lambda rng, c: f"/api/organization/{rng.choice(c.organizations)}"),
+    "series list": (3, lambda rng, c: "/api/series"),
+    "series": (3, lambda rng, c: f"/api/series/{rng.choice(c.series)}"),
+    "categories": (3, lambda rng, c: "/api/categories"),
+    "search": (8, lambda rng, c: f"/api/videos?q={quote(rng.choice(c.words))}"),
+    "tv-anytime": (3, lambda rng, c: "/api/tvanytime/upcoming"),
+    "xmltv": (6, lambda rng, c: "/xmltv/upcoming/"),
+    "news feed": (4, lambda rng, c: "/api/news/feed.atom"),
+}
+
+# Asked for with the staff token; everything else is asked for anonymously,
+# as most of it is, so that --cached lets the page cache answer it.
+INGEST = {
+    "ingest jobs": (4, lambda rng, c: "/api/ingest?active=true"),
+    "video ingest": (
+        4,
+        lambda rng, c: f"/api/videos/{rng.choice(c.ingesting or c.videos)}/ingest",
+    ),
+}
+
+
+def client(
+    host: str,
+    port: int,
+    headers: dict,
+    staff: dict,
+    mix: dict,
+    catalogue: Catalogue,
+    seed: int,
+    until: float,
+    latencies: dict,
+    failures: dict,
+) -> None:
+    rng = random.Random(seed)
+    names = list(mix)
+    weights = [weight for weight, _ in mix.values()]
+    connection = http.client.HTTPConnection(host, port)
+    while time.monotonic() < until:
+        name = rng.choices(names, weights)[0]
+        path = mix[name][1](rng, catalogue)
+        started = time.perf_counter()
+        for attempt in range(RECONNECTS + 1):
+            try:
+                connection.request("GET", path, headers=staff if name in INGEST else headers)
+                response = connection.getresponse()
+                response.read()
+                break
+            except (http.client.HTTPException, ConnectionError):
+                # A worker recycled after max_requests closes the
+                # connection; connect again, as any client would.
+                if attempt == RECONNECTS:
+                    raise
+                connection.close()
+                time.sleep(0.1)
+        if response.status == 200:
+            latencies[name].append(time.perf_counter() - started)
+        else:
+            failures[name] += 1
+    connection.close()
+
+
+def percentile(latencies: list[float], p: int) -> float:
+    if len(latencies) < 2:
+        return latencies[0] if latencies else float("nan")
+    return statistics.quantiles(latencies, n=100, method="inclusive")[p - 1]
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--clients", type=int, default=8)
+    parser.add_argument("--seconds", type=float, default=60)
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--token", help="a staff user's API token, to include the ingest dashboard")
+    parser.add_argument("--url", help="a server already running, instead of starting gunicorn")
+    parser.add_argument("--port", type=int, default=8768)
+    parser.add_argument("--settings", default="fkweb.settings.local")
+    parser.add_argument("--cached", action="store_true", help="keep the page cache on")
+    args = parser.parse_args()
+
+    headers = {"Host": "localhost"}
+    if args.url:
+        url = urlsplit(args.url)
+        host, port = url.hostname, url.port or 80
+        headers["Host"] = url.netloc
+        server = contextlib.nullcontext()
+    else:
+        host, port = "127.0.0.1", args.port
+        cache = {"CACHE_URL": "locmemcache://"} if args.cached else {}
+        server = gunicorn(port, args.settings, **cache)
+
+    mix = dict(MIX)
+    staff = {}
+    if args.token:
+        staff = {**headers, "Authorization": f"Token {args.token}"}
+        mix |= INGEST
+
+    with server:
+        catalogue = Catalogue(http.client.HTTPConnection(host, port), headers, staff)
+        latencies: dict[str, list[float]] = defaultdict(list)
+        failures: dict[str, int] = defaultdict(int)
+        started = time.monotonic()
+        until = started + args.seconds
+        threads = [
+            threading.Thread(
+                target=client,
+                args=(host, port, headers, staff, mix, catalogue, args.seed + n, until),
+                kwargs={"latencies": latencies, "failures": failures},
+            )
+            for n in range(args.clients)
+        ]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        elapsed = time.monotonic() - started
+
+    print(f"{'':>22} {'requests':>8} {'failed':>6} {'p50':>8} {'p95':>8} {'p99':>8} {'max':>8}")
+    for name in mix:
+        answered = latencies[name]
+        times = [
+            percentile(answered, 50),
+            percentile(answered, 95),
+            percentile(answered, 99),
+            max(answered, default=float("nan")),
+        ]
+        print(
+            f"{name:>22} {len(answered) + failures[name]:8} {failures[name]:6} "
+            + " ".join(f"{seconds * 1000:5.0f} ms" for seconds in times)
+        )
+    total = sum(len(answered) for answered in latencies.values()) + sum(failures.values())
+    print(f"{total} requests in {elapsed:.0f} s, {total / elapsed:.1f} per second")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,73 @@
+"""How long a CronJob's command and a web worker take to start.
+
+Starts a fresh interpreter for each, several times over, and reports the
+least CPU time it took and how many modules it imported (`-X importtime`).
+Nothing is run against the database: a command is taken as far as
+manage.py takes it before handle(), system checks included, and a web
+worker as far as fkweb.wsgi takes it, which gunicorn's master does
+before forking the workers.
+
+    uv run python benchmarks/startup.py [--runs 15] [--settings fkweb.settings.batch]
+"""
+
+import argparse
+import os
+import re
+import resource
+import subprocess
+import sys
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parents[1]
+
+COMMAND = """
+import django
+django.setup()
+from django.core.management import load_command_class
+command = load_command_class("agenda", "draft_broadcast_schedule")
+if command.requires_system_checks:
+    command.check()
+"""
+
+WEB = """
+import fkweb.wsgi
+from django.urls import resolve
+resolve("/api")
+"""
+
+
+def started(code: str, settings: str) -> tuple[float, int]:
+    """The CPU seconds `code` took in a new interpreter, and the modules it imported."""
+    env = dict(os.environ, DJANGO_SETTINGS_MODULE=settings)
+    before = resource.getrusage(resource.RUSAGE_CHILDREN)
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", code],
+        cwd=ROOT,
+        env=env,
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    after = resource.getrusage(resource.RUSAGE_CHILDREN)
+    seconds = after.ru_utime + after.ru_stime - before.ru_utime - before.ru_stime
+    return seconds, len(re.findall(r"^import time:\s+\d", result.stderr, flags=re.MULTILINE))
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--runs", type=int, default=15)
+    parser.add_argument("--settings", default="fkweb.settings.batch", help="the command's")
+    parser.add_argument("--web-settings", default="fkweb.settings.production")
+    args = parser.parse_args()
+
+    for label, code, settings in (
+        ("draft_broadcast_schedule", COMMAND, args.settings),
+        ("web worker", WEB, args.web_settings),
+    ):
+        runs = [started(code, settings) for _ in range(args.runs)]
+        seconds = min(seconds for seconds, _ in runs)
+        print(f"{label:>24}: {seconds * 1000:5.0f} ms CPU, {runs[0][1]} modules")
+
+
+if __name__ == "__main__":
+    main()
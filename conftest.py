@@ -0,0 +1,21 @@
+import pytest
+from django.core.cache import cache
+
+
+@pytest.fixture
+def real_cache(settings):
+    """Swap the suite's DummyCache for a real one, kept to a single test.
+
+    See api/tests/test_page_cache.py for why the suite runs on DummyCache.
+    The local-memory cache outlives the per-test database rollback, so it
+    is emptied on the way in as well as on the way out.
+    """
+    settings.CACHES = {
+        "default": {
+            "BACKEND": "django.core.cache.backends.locmem.LocMemCache",
+            "LOCATION": "real-cache-tests",
+        }
+    }
+    cache.clear()
+    yield
+    cache.clear()
@@ -4,9 +4,13 @@ from django.contrib import admin
 from django.contrib.auth.admin import UserAdmin as BaseUserAdmin
 from django.contrib.auth.models import Group
 from django.db.models import Count
+from django.template.response import TemplateResponse
+from django.urls import path
 
-from fk.forms import UserChangeForm, UserCreationForm
+from agenda.reconciliation import reconcile_days
+from fk.forms import ReconciliationForm, UserChangeForm, UserCreationForm
 from fk.models import (
+    AsRun,
     Category,
     IngestJob,
     Organization,
@@ -262,6 +266,58 @@ class WeeklySlotSourceAdmin(admin.ModelAdmin):
         return f"{summary} -- {', '.join(reasons)}." if reasons else f"{summary}."
 
 
+class AsRunAdmin(admin.ModelAdmin):
+    """The playout log, read-only, and the report comparing it with the schedule.
+
+    Playout writes the log; an entry corrected by hand would only make the
+    reconciliation report agree with something that did not happen.
+    """
+
+    list_display = ("played_at", "playout", "video", "program_name", "in_ms", "out_ms")
+    list_filter = ("playout",)
+    list_select_related = ("video",)
+    search_fields = ("video__name", "program_name")
+    date_hierarchy = "played_at"
+    change_list_template = "admin/fk/asrun/change_list.html"
+
+    def has_add_permission(self, request):
+        return False
+
+    def has_change_permission(self, request, obj=None):
+        return False
+
+    def has_delete_permission(self, request, obj=None):
+        return False
+
+    def get_urls(self):
+        return [
+            path(
+                "reconciliation/",
+                self.admin_site.admin_view(self.reconciliation_view),
+                name="fk_asrun_reconciliation",
+            ),
+            *super().get_urls(),
+        ]
+
+    def reconciliation_view(self, request):
+        form = ReconciliationForm(request.GET or None)
+        report = None
+        if form.is_valid():
+            data = form.cleaned_data
+            report = reconcile_days(data["start"], data["end"], data["playout"] or "main")
+        return TemplateResponse(
+            request,
+            "admin/fk/asrun/reconciliation.html",
+            {
+                **self.admin_site.each_context(request),
+                "opts": self.model._meta,
+                "title": "Schedule against as-run",
+                "form": form,
+                "report": report,
+            },
+        )
+
+
 class CategoryAdmin(admin.ModelAdmin):
     """Where the TV-Anytime genre mapping is maintained.
 
@@ -293,6 +349,7 @@ class WeeklySlotAdmin(admin.ModelAdmin):
     autocomplete_fields = ("source",)
 
 
+admin.site.register(AsRun, AsRunAdmin)
 admin.site.register(Category, CategoryAdmin)
 admin.site.register(IngestJob, IngestJobAdmin)
 admin.site.register(Organization, OrganizationAdmin)
@@ -1,6 +1,7 @@
 from django import forms
 from django.contrib.auth.forms import ReadOnlyPasswordHashField
 
+from agenda.reconciliation import LONGEST_WINDOW
 from fk.models import User
 
 
@@ -55,3 +56,21 @@ class UserCreationForm(forms.ModelForm):
         if commit:
             user.save()
         return user
+
+
+class ReconciliationForm(forms.Form):
+    """The days of a schedule-versus-as-run report, for the admin."""
+
+    start = forms.DateField(help_text="The first day to compare, Europe/Oslo.")
+    end = forms.DateField(help_text="The last day to compare, inclusive.")
+    playout = forms.CharField(initial="main", max_length=255, required=False)
+
+    def clean(self):
+        data = super().clean()
+        start, end = data.get("start"), data.get("end")
+        if start and end:
+            if end < start:
+                self.add_error("end", "The report cannot end before it starts.")
+            elif end - start >= LONGEST_WINDOW:
+                self.add_error("end", f"A report covers at most {LONGEST_WINDOW.days} days.")
+        return data
@@ -0,0 +1,54 @@
+from datetime import date
+
+from django.core.management.base import BaseCommand, CommandError
+from rest_framework.authtoken.models import Token
+
+from fk.models import Organization, Video
+from fk.synthetic import STAFF_EMAIL, Scale, generate
+
+
+class Command(BaseCommand):
+    help = (
+        "Fill an empty database with made-up data shaped like production: "
+        "organizations, videos, series, weekly slots and years of schedule and as-run log"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--seed",
+            type=int,
+            default=1,
+            help="The same seed, on the same day, makes the same data (default: 1).",
+        )
+        parser.add_argument(
+            "--videos",
+            type=int,
+            default=Scale.videos,
+            help=(
+                f"How many videos to make (default: {Scale.videos}). Organizations and "
+                "series are made in proportion."
+            ),
+        )
+        parser.add_argument(
+            "--history-days",
+            type=int,
+            default=Scale.history_days,
+            help=f"Days of schedule and as-run log before today (default: {Scale.history_days}).",
+        )
+        parser.add_argument(
+            "--today",
+            type=date.fromisoformat,
+            help="The day to make the data around (default: today).",
+        )
+
+    def handle(self, *args, **options):
+        # Not for adding to: the data only comes out the same in an empty
+        # database, and a production database is anything but.
+        if Organization.objects.exists() or Video.objects.exists():
+            raise CommandError("The database already has organizations or videos in it")
+        scale = Scale(videos=options["videos"], history_days=options["history_days"])
+        made = generate(options["seed"], scale, options["today"])
+        for name, count in made.items():
+            self.stdout.write(f"{count:>9} {name}")
+        token = Token.objects.get(user__email=STAFF_EMAIL)
+        self.stdout.write(f"Staff token, for benchmarks/load_scenario.py --token: {token.key}")
@@ -0,0 +1,68 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from fk.models.airtime import days_to_roll_up, roll_up_airtime
+from fk.models.asrun import (
+    add_months,
+    asrun_partitions,
+    create_asrun_partition,
+    detach_asrun_partition,
+)
+
+
+class Command(BaseCommand):
+    help = (
+        "Roll the as-run log up into daily airtime, create the coming months' "
+        "partitions and detach the months past retention"
+    )
+    # As for the agenda commands (agenda.management.base): the checks
+    # would import the URLconf, and the web stack with it.
+    requires_system_checks: list[str] = []
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--months-ahead",
+            type=int,
+            default=3,
+            help="Months after this one to have partitions ready for (default: 3).",
+        )
+        parser.add_argument(
+            "--retain-months",
+            type=int,
+            default=settings.ASRUN_RETENTION_MONTHS,
+            help=(
+                "Months of log to keep attached, counting this one; older months are "
+                "detached. Defaults to ASRUN_RETENTION_MONTHS, which keeps everything if unset."
+            ),
+        )
+        parser.add_argument(
+            "--drop",
+            action="store_true",
+            help="Drop the months past retention instead of leaving them as detached tables.",
+        )
+
+    def handle(self, *args, **options):
+        today = timezone.localdate()
+        this_month = today.replace(day=1)
+
+        # Roll up first: a month is only detached once its days are.
+        days = days_to_roll_up(today, settings.ASRUN_ROLLUP_LOOKBACK_DAYS)
+        roll_up_airtime(days)
+        if days:
+            self.stdout.write(f"Rolled up {len(days)} days, {days[0]} to {days[-1]}")
+
+        for ahead in range(options["months_ahead"] + 1):
+            month = add_months(this_month, ahead)
+            if create_asrun_partition(month):
+                self.stdout.write(f"Created the partition for {month:%Y-%m}")
+
+        if options["retain_months"] is None:
+            return
+        oldest_kept = add_months(this_month, 1 - options["retain_months"])
+        for month in asrun_partitions():
+            if month >= oldest_kept:
+                break
+            table = detach_asrun_partition(month, drop=options["drop"])
+            verb = "Dropped" if options["drop"] else "Detached"
+            self.stdout.write(f"{verb} {month:%Y-%m}" + ("" if options["drop"] else f" as {table}"))
@@ -0,0 +1,41 @@
+from datetime import date, timedelta
+
+from django.core.management.base import BaseCommand
+from django.db.models import Max, Min
+from django.utils import timezone
+
+from fk.models import Scheduleitem
+from fk.models.airtime import roll_up_schedule
+
+
+class Command(BaseCommand):
+    help = (
+        "Roll the schedule up into daily scheduled airtime again, for the whole "
+        "schedule or the days given"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--from",
+            dest="first",
+            type=date.fromisoformat,
+            help="The first day to rebuild (default: the first day anything is scheduled).",
+        )
+        parser.add_argument(
+            "--to",
+            dest="last",
+            type=date.fromisoformat,
+            help="The last day to rebuild, inclusive (default: the last day anything is scheduled).",
+        )
+
+    def handle(self, *args, **options):
+        span = Scheduleitem.objects.aggregate(first=Min("starttime"), last=Max("starttime"))
+        if span["first"] is None:
+            self.stdout.write("Nothing is scheduled")
+            return
+        first = options["first"] or timezone.localdate(span["first"])
+        last = options["last"] or timezone.localdate(span["last"])
+        # Every day, not just the ones with items: rollups left over from
+        # items since removed are replaced with nothing.
+        roll_up_schedule(first + timedelta(days=n) for n in range((last - first).days + 1))
+        self.stdout.write(f"Rebuilt {first} to {last}")
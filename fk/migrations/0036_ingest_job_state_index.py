@@ -0,0 +1,18 @@
+# Generated by Django 5.2.17 on 2026-10-19 08:35
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    """Index ingest jobs by state and age, for finding the stuck ones."""
+
+    dependencies = [
+        ("fk", "0035_weekly_slot_source"),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="ingestjob",
+            index=models.Index(fields=["state", "updated_time"], name="ingest_job_state_updated"),
+        ),
+    ]
@@ -0,0 +1,33 @@
+from django.db import migrations, models
+
+# Entries already logged twice are resends that got through; keep the
+# first of each so the constraint can be added.
+DELETE_DUPLICATES = """
+DELETE FROM fk_asrun AS later
+USING fk_asrun AS earlier
+WHERE later.playout = earlier.playout
+  AND later.played_at = earlier.played_at
+  AND later.video_id IS NOT DISTINCT FROM earlier.video_id
+  AND later.program_name = earlier.program_name
+  AND later.id > earlier.id
+"""
+
+
+class Migration(migrations.Migration):
+    """Make an as-run entry unique per playout, time and what was played."""
+
+    dependencies = [
+        ("fk", "0036_ingest_job_state_index"),
+    ]
+
+    operations = [
+        migrations.RunSQL(DELETE_DUPLICATES, reverse_sql=migrations.RunSQL.noop),
+        migrations.AddConstraint(
+            model_name="asrun",
+            constraint=models.UniqueConstraint(
+                fields=("playout", "played_at", "video", "program_name"),
+                name="asrun_unique_entry",
+                nulls_distinct=False,
+            ),
+        ),
+    ]
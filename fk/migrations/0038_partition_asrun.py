@@ -0,0 +1,127 @@
+from datetime import datetime
+from zoneinfo import ZoneInfo
+
+from django.db import migrations
+
+# The model does not change, only how PostgreSQL stores it: fk_asrun
+# becomes a table partitioned by month of played_at. A partitioned table's
+# primary key has to include the partition key, so it is (id, played_at)
+# in the database while Django goes on treating id as the key -- which it
+# still is, as the identity column hands out each value once.
+#
+# Index and constraint names are kept, so later migrations find them.
+
+CREATE_PARTITIONED = """
+CREATE TABLE fk_asrun_partitioned (
+    id integer GENERATED BY DEFAULT AS IDENTITY,
+    created timestamp with time zone NOT NULL,
+    modified timestamp with time zone NOT NULL,
+    program_name varchar(160) NOT NULL,
+    playout varchar(255) NOT NULL,
+    played_at timestamp with time zone NOT NULL,
+    in_ms integer NOT NULL,
+    out_ms integer NULL,
+    video_id integer NULL
+) PARTITION BY RANGE (played_at);
+CREATE TABLE fk_asrun_default PARTITION OF fk_asrun_partitioned DEFAULT;
+"""
+
+SWAP_IN = """
+INSERT INTO fk_asrun_partitioned
+    (id, created, modified, program_name, playout, played_at, in_ms, out_ms, video_id)
+SELECT id, created, modified, program_name, playout, played_at, in_ms, out_ms, video_id
+FROM fk_asrun;
+SELECT setval(
+    pg_get_serial_sequence('fk_asrun_partitioned', 'id'),
+    coalesce((SELECT max(id) FROM fk_asrun_partitioned), 0) + 1,
+    false
+);
+DROP TABLE fk_asrun;
+ALTER TABLE fk_asrun_partitioned RENAME TO fk_asrun;
+ALTER TABLE fk_asrun ADD CONSTRAINT fk_asrun_pkey PRIMARY KEY (id, played_at);
+ALTER TABLE fk_asrun ADD CONSTRAINT asrun_unique_entry
+    UNIQUE NULLS NOT DISTINCT (playout, played_at, video_id, program_name);
+ALTER TABLE fk_asrun ADD CONSTRAINT fk_asrun_video_id_ac707754_fk_fk_video_id
+    FOREIGN KEY (video_id) REFERENCES fk_video (id) DEFERRABLE INITIALLY DEFERRED;
+CREATE INDEX fk_asrun_video_id_ac707754 ON fk_asrun (video_id);
+CREATE INDEX asrun_played_at_desc_idx ON fk_asrun (played_at DESC, id DESC);
+"""
+
+UNPARTITION = """
+CREATE TABLE fk_asrun_unpartitioned (
+    id integer GENERATED BY DEFAULT AS IDENTITY PRIMARY KEY,
+    created timestamp with time zone NOT NULL,
+    modified timestamp with time zone NOT NULL,
+    program_name varchar(160) NOT NULL,
+    playout varchar(255) NOT NULL,
+    played_at timestamp with time zone NOT NULL,
+    in_ms integer NOT NULL,
+    out_ms integer NULL,
+    video_id integer NULL
+);
+INSERT INTO fk_asrun_unpartitioned
+    (id, created, modified, program_name, playout, played_at, in_ms, out_ms, video_id)
+SELECT id, created, modified, program_name, playout, played_at, in_ms, out_ms, video_id
+FROM fk_asrun;
+SELECT setval(
+    pg_get_serial_sequence('fk_asrun_unpartitioned', 'id'),
+    coalesce((SELECT max(id) FROM fk_asrun_unpartitioned), 0) + 1,
+    false
+);
+DROP TABLE fk_asrun;
+ALTER TABLE fk_asrun_unpartitioned RENAME TO fk_asrun;
+ALTER INDEX fk_asrun_unpartitioned_pkey RENAME TO fk_asrun_pkey;
+ALTER TABLE fk_asrun ADD CONSTRAINT asrun_unique_entry
+    UNIQUE NULLS NOT DISTINCT (playout, played_at, video_id, program_name);
+ALTER TABLE fk_asrun ADD CONSTRAINT fk_asrun_video_id_ac707754_fk_fk_video_id
+    FOREIGN KEY (video_id) REFERENCES fk_video (id) DEFERRABLE INITIALLY DEFERRED;
+CREATE INDEX fk_asrun_video_id_ac707754 ON fk_asrun (video_id);
+CREATE INDEX asrun_played_at_desc_idx ON fk_asrun (played_at DESC, id DESC);
+"""
+
+# As far ahead as maintain_asrun keeps ready by default.
+MONTHS_AHEAD = 3
+
+
+def partition(apps, schema_editor):
+    zone = ZoneInfo("Europe/Oslo")
+    with schema_editor.connection.cursor() as cursor:
+        cursor.execute(CREATE_PARTITIONED)
+        cursor.execute("SELECT min(played_at) FROM fk_asrun")
+        (earliest,) = cursor.fetchone()
+        now = datetime.now(zone)
+        first = (earliest or now).astimezone(zone)
+        index = first.year * 12 + first.month - 1
+        last = now.year * 12 + now.month - 1 + MONTHS_AHEAD
+        # A partition for every month already logged, so the copy below
+        # leaves nothing in the default partition.
+        while index <= last:
+            year, month = divmod(index, 12)
+            next_year, next_month = divmod(index + 1, 12)
+            cursor.execute(
+                f"CREATE TABLE fk_asrun_y{year:04d}m{month + 1:02d} "
+                "PARTITION OF fk_asrun_partitioned FOR VALUES FROM (%s) TO (%s)",
+                [
+                    datetime(year, month + 1, 1, tzinfo=zone),
+                    datetime(next_year, next_month + 1, 1, tzinfo=zone),
+                ],
+            )
+            index += 1
+        cursor.execute(SWAP_IN)
+
+
+def unpartition(apps, schema_editor):
+    with schema_editor.connection.cursor() as cursor:
+        cursor.execute(UNPARTITION)
+
+
+class Migration(migrations.Migration):
+    """Partition the as-run log by month of played_at."""
+
+    dependencies = [
+        ("fk", "0037_asrun_unique_entry"),
+    ]
+
+    operations = [
+        migrations.RunPython(partition, unpartition),
+    ]
@@ -0,0 +1,52 @@
+# Generated by Django 5.2.17 on 2026-10-19 09:00
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    """Daily airtime per video and per organization, rolled up from the as-run log."""
+
+    dependencies = [
+        ('fk', '0038_partition_asrun'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='AirtimeRollupDay',
+            fields=[
+                ('day', models.DateField(primary_key=True, serialize=False)),
+                ('rolled_up_at', models.DateTimeField(auto_now=True)),
+            ],
+        ),
+        migrations.CreateModel(
+            name='OrganizationAirtime',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('day', models.DateField(help_text="The day, in the station's time zone.")),
+                ('playout', models.CharField(max_length=255)),
+                ('plays', models.PositiveIntegerField()),
+                ('airtime_ms', models.BigIntegerField(help_text='Time on air, in milliseconds.')),
+                ('organization', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='fk.organization')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['organization', 'day'], name='organization_airtime_org_day')],
+                'constraints': [models.UniqueConstraint(fields=('day', 'playout', 'organization'), name='organization_airtime_unique_day')],
+            },
+        ),
+        migrations.CreateModel(
+            name='VideoAirtime',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('day', models.DateField(help_text="The day, in the station's time zone.")),
+                ('playout', models.CharField(max_length=255)),
+                ('plays', models.PositiveIntegerField()),
+                ('airtime_ms', models.BigIntegerField(help_text='Time on air, in milliseconds. Entries still on air when rolled up count as none.')),
+                ('video', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='fk.video')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['video', 'day'], name='video_airtime_video_day')],
+                'constraints': [models.UniqueConstraint(fields=('day', 'playout', 'video'), name='video_airtime_unique_day')],
+            },
+        ),
+    ]
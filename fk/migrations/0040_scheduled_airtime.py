@@ -0,0 +1,48 @@
+# Generated by Django 5.2.17 on 2026-10-19 09:08
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    """Daily scheduled airtime per organization and per category, by schedule reason.
+
+    Starts out empty; `./manage.py rebuild_schedule_airtime` fills in the
+    schedule that is already there.
+    """
+
+    dependencies = [
+        ('fk', '0039_airtime_rollups'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ScheduledAirtime',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('day', models.DateField(help_text="The day the items start on, in the station's time zone.")),
+                ('schedulereason', models.IntegerField(choices=[(1, 'Legacy'), (2, 'Administrative'), (3, 'User'), (4, 'Automatic'), (5, 'Jukebox')])),
+                ('items', models.PositiveIntegerField()),
+                ('airtime', models.DurationField()),
+                ('organization', models.ForeignKey(help_text="The videos' organization; null for items without a video, such as live ones.", null=True, on_delete=django.db.models.deletion.CASCADE, to='fk.organization')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['organization', 'day'], name='scheduled_airtime_org_day')],
+                'constraints': [models.UniqueConstraint(fields=('day', 'schedulereason', 'organization'), name='scheduled_airtime_unique_day', nulls_distinct=False)],
+            },
+        ),
+        migrations.CreateModel(
+            name='ScheduledCategoryAirtime',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('day', models.DateField(help_text="The day the items start on, in the station's time zone.")),
+                ('schedulereason', models.IntegerField(choices=[(1, 'Legacy'), (2, 'Administrative'), (3, 'User'), (4, 'Automatic'), (5, 'Jukebox')])),
+                ('items', models.PositiveIntegerField()),
+                ('airtime', models.DurationField()),
+                ('category', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='fk.category')),
+            ],
+            options={
+                'constraints': [models.UniqueConstraint(fields=('day', 'schedulereason', 'category'), name='scheduled_category_airtime_unique_day')],
+            },
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.2.17 on 2026-10-19 10:36
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('fk', '0040_scheduled_airtime'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='ingestjob',
+            name='claim',
+            field=models.PositiveIntegerField(default=0, help_text='Which claim on the job is current. Progress reports must carry it; 0 until the job is first claimed.'),
+        ),
+    ]
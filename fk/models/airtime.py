@@ -0,0 +1,344 @@
+import threading
+from collections.abc import Iterable, Iterator
+from datetime import date, datetime, time, timedelta
+from zoneinfo import ZoneInfo
+
+from django.conf import settings
+from django.db import models, transaction
+from django.db.models import Count, F, Q, Sum
+from django.db.models.functions import Coalesce, TruncDate
+
+from .asrun import AsRun
+from .schedule import Scheduleitem
+
+# Days rolled up in one go: a month of log is a few thousand entries, and
+# its rollups a few hundred rows.
+ROLLUP_CHUNK_DAYS = 31
+
+
+class VideoAirtime(models.Model):
+    """How often, and for how long, a video went to air on one day.
+
+    Rolled up from the as-run log by roll_up_airtime(), so that reports
+    over months or years read a row per video and day instead of the log
+    itself -- and go on working once old months of the log are detached.
+    """
+
+    day = models.DateField(help_text="The day, in the station's time zone.")
+    playout = models.CharField(max_length=255)
+    video = models.ForeignKey("Video", on_delete=models.CASCADE)
+    plays = models.PositiveIntegerField()
+    airtime_ms = models.BigIntegerField(
+        help_text="Time on air, in milliseconds. Entries still on air when rolled up count as none."
+    )
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=["day", "playout", "video"], name="video_airtime_unique_day"
+            ),
+        ]
+        indexes = [
+            models.Index(fields=["video", "day"], name="video_airtime_video_day"),
+        ]
+
+    def __str__(self):
+        return f"{self.video_id} on {self.day}: {self.plays} plays"
+
+
+class OrganizationAirtime(models.Model):
+    """VideoAirtime summed over an organization's videos."""
+
+    day = models.DateField(help_text="The day, in the station's time zone.")
+    playout = models.CharField(max_length=255)
+    organization = models.ForeignKey("Organization", on_delete=models.CASCADE)
+    plays = models.PositiveIntegerField()
+    airtime_ms = models.BigIntegerField(help_text="Time on air, in milliseconds.")
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=["day", "playout", "organization"],
+                name="organization_airtime_unique_day",
+            ),
+        ]
+        indexes = [
+            models.Index(fields=["organization", "day"], name="organization_airtime_org_day"),
+        ]
+
+    def __str__(self):
+        return f"{self.organization_id} on {self.day}: {self.plays} plays"
+
+
+class AirtimeRollupDay(models.Model):
+    """A day whose rollups are in place, including the days nothing aired."""
+
+    day = models.DateField(primary_key=True)
+    rolled_up_at = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return str(self.day)
+
+
+class ScheduledAirtime(models.Model):
+    """How much airtime an organization was scheduled for on one day, and why.
+
+    Kept up to date from every schedule write (see schedule_changed()), so
+    statistics over years read a row per organization, reason and day
+    instead of every item. Unlike the as-run rollups these are of what was
+    planned, and cover days still to come.
+    """
+
+    day = models.DateField(help_text="The day the items start on, in the station's time zone.")
+    schedulereason = models.IntegerField(choices=Scheduleitem.SCHEDULE_REASONS)
+    organization = models.ForeignKey(
+        "Organization",
+        null=True,
+        on_delete=models.CASCADE,
+        help_text="The videos' organization; null for items without a video, such as live ones.",
+    )
+    items = models.PositiveIntegerField()
+    airtime = models.DurationField()
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=["day", "schedulereason", "organization"],
+                name="scheduled_airtime_unique_day",
+                nulls_distinct=False,
+            ),
+        ]
+        indexes = [
+            models.Index(fields=["organization", "day"], name="scheduled_airtime_org_day"),
+        ]
+
+    def __str__(self):
+        return f"{self.organization_id} on {self.day}: {self.items} items"
+
+
+class ScheduledCategoryAirtime(models.Model):
+    """ScheduledAirtime by the videos' categories instead.
+
+    A video in two categories counts towards both, so these do not add up
+    to the day's airtime; a video in none counts towards none.
+    """
+
+    day = models.DateField(help_text="The day the items start on, in the station's time zone.")
+    schedulereason = models.IntegerField(choices=Scheduleitem.SCHEDULE_REASONS)
+    category = models.ForeignKey("Category", on_delete=models.CASCADE)
+    items = models.PositiveIntegerField()
+    airtime = models.DurationField()
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=["day", "schedulereason", "category"],
+                name="scheduled_category_airtime_unique_day",
+            ),
+        ]
+
+    def __str__(self):
+        return f"{self.category_id} on {self.day}: {self.items} items"
+
+
+def days_to_roll_up(today: date, lookback: int) -> list[date]:
+    """The finished days whose rollups are missing or may be out of date.
+
+    Every day before today that has never been rolled up, plus the last
+    `lookback` days again: playout backfills the log after an outage (see
+    the bulk append endpoint), and entries for a day can keep arriving for
+    a while after it ends.
+    """
+    zone = ZoneInfo(settings.TIME_ZONE)
+    earliest = AsRun.objects.order_by("played_at").values_list("played_at", flat=True).first()
+    if earliest is None:
+        return []
+    first = earliest.astimezone(zone).date()
+    recent = today - timedelta(days=lookback)
+    done = set(
+        AirtimeRollupDay.objects.filter(day__gte=first, day__lt=recent).values_list(
+            "day", flat=True
+        )
+    )
+    span = (today - first).days
+    days = (first + timedelta(days=n) for n in range(span))
+    return [day for day in days if day >= recent or day not in done]
+
+
+def roll_up_airtime(days: list[date]) -> None:
+    """Recompute the rollups for `days` from the as-run log.
+
+    Contiguous days are aggregated together, a chunk at a time, each
+    chunk replacing its rollups in one transaction.
+    """
+    for first, last in _chunks(days):
+        _roll_up(first, last)
+
+
+def _chunks(days: Iterable[date]) -> Iterator[tuple[date, date]]:
+    """The first and last day of each run of contiguous `days`, a chunk at a time."""
+    chunk: list[date] = []
+    for day in sorted(days):
+        if chunk and (day - chunk[-1] != timedelta(days=1) or len(chunk) == ROLLUP_CHUNK_DAYS):
+            yield chunk[0], chunk[-1]
+            chunk = []
+        chunk.append(day)
+    if chunk:
+        yield chunk[0], chunk[-1]
+
+
+def _bounds(first: date, last: date) -> tuple[datetime, datetime]:
+    zone = ZoneInfo(settings.TIME_ZONE)
+    return (
+        datetime.combine(first, time(), tzinfo=zone),
+        datetime.combine(last + timedelta(days=1), time(), tzinfo=zone),
+    )
+
+
+def _roll_up(first: date, last: date) -> None:
+    zone = ZoneInfo(settings.TIME_ZONE)
+    start, end = _bounds(first, last)
+    entries = AsRun.objects.filter(
+        played_at__gte=start, played_at__lt=end, video__isnull=False
+    ).annotate(day=TruncDate("played_at", tzinfo=zone))
+    totals = {
+        "plays": Count("id"),
+        "airtime_ms": Coalesce(Sum(F("out_ms") - F("in_ms"), filter=Q(out_ms__isnull=False)), 0),
+    }
+    per_video = entries.values("day", "playout", "video_id").annotate(**totals).order_by()
+    per_organization = (
+        entries.values("day", "playout", organization_id=F("video__organization_id"))
+        .annotate(**totals)
+        .order_by()
+    )
+    with transaction.atomic():
+        VideoAirtime.objects.filter(day__range=(first, last)).delete()
+        OrganizationAirtime.objects.filter(day__range=(first, last)).delete()
+        VideoAirtime.objects.bulk_create(VideoAirtime(**row) for row in per_video)
+        OrganizationAirtime.objects.bulk_create(
+            OrganizationAirtime(**row) for row in per_organization
+        )
+        AirtimeRollupDay.objects.filter(day__range=(first, last)).delete()
+        AirtimeRollupDay.objects.bulk_create(
+            AirtimeRollupDay(day=first + timedelta(days=n)) for n in range((last - first).days + 1)
+        )
+
+
+def roll_up_schedule(days: Iterable[date]) -> None:
+    """Recompute the scheduled airtime of `days` from the schedule.
+
+    An item counts towards the day it starts on, whole, as an as-run entry
+    does towards the day it was played on. Items of no length occupy no
+    airtime and are left out.
+    """
+    for first, last in _chunks(days):
+        _roll_up_schedule(first, last)
+
+
+def _roll_up_schedule(first: date, last: date) -> None:
+    start, end = _bounds(first, last)
+    items = Scheduleitem.objects.filter(
+        starttime__gte=start, starttime__lt=end, duration__gt=timedelta(0)
+    ).annotate(day=TruncDate("starttime", tzinfo=ZoneInfo(settings.TIME_ZONE)))
+    totals = {"items": Count("id"), "airtime": Sum("duration")}
+    per_organization = (
+        items.values("day", "schedulereason", organization_id=F("video__organization_id"))
+        .annotate(**totals)
+        .order_by()
+    )
+    per_category = (
+        items.filter(video__categories__isnull=False)
+        .values("day", "schedulereason", category_id=F("video__categories"))
+        .annotate(**totals)
+        .order_by()
+    )
+    with transaction.atomic():
+        ScheduledAirtime.objects.filter(day__range=(first, last)).delete()
+        ScheduledCategoryAirtime.objects.filter(day__range=(first, last)).delete()
+        ScheduledAirtime.objects.bulk_create(ScheduledAirtime(**row) for row in per_organization)
+        ScheduledCategoryAirtime.objects.bulk_create(
+            ScheduledCategoryAirtime(**row) for row in per_category
+        )
+
+
+# What scheduled airtime can be broken down by, besides schedule reason.
+AIRTIME_GROUPINGS = ("organization", "category", "reason")
+
+
+def scheduled_airtime(first: date, last: date, by: str) -> list[dict]:
+    """Scheduled airtime from `first` to `last`, inclusive, per schedule reason.
+
+    Also per organization or per category, as `by` says, with the group's
+    `group_id` and `group_name`. Read from the rollups alone: a row per
+    group, reason and day, however many items those days held.
+    """
+    if by == "category":
+        rows = ScheduledCategoryAirtime.objects.values(
+            "schedulereason", group_id=F("category_id"), group_name=F("category__name")
+        )
+        order = (F("group_name").asc(), "schedulereason")
+    elif by == "organization":
+        rows = ScheduledAirtime.objects.values(
+            "schedulereason", group_id=F("organization_id"), group_name=F("organization__name")
+        )
+        order = (F("group_name").asc(nulls_last=True), "schedulereason")
+    else:
+        rows = ScheduledAirtime.objects.values("schedulereason")
+        order = ("schedulereason",)
+    return list(
+        rows.filter(day__range=(first, last))
+        .annotate(items=Sum("items"), airtime=Sum("airtime"))
+        .order_by(*order)
+    )
+
+
+# The days schedule writes have touched and not yet rolled up, per thread.
+_touched = threading.local()
+
+
+def schedule_changed(*starttimes: datetime) -> None:
+    """Roll up the days of `starttimes` again once the transaction commits.
+
+    Called for every schedule write, with where the items start and, for
+    a move, where they used to. A jukebox run places a week of fillers one
+    at a time in one transaction: each write queues its day, and whichever
+    commit callback runs first rolls all of them up, once, leaving nothing
+    for the rest. Days queued by a transaction that rolls back are rolled
+    up with the next one to commit, which does no harm.
+    """
+    zone = ZoneInfo(settings.TIME_ZONE)
+    _touch(starttime.astimezone(zone).date() for starttime in starttimes)
+
+
+def videos_changed(video_ids: Iterable[int]) -> None:
+    """Roll up the days the videos are scheduled on again, once the
+    transaction commits.
+
+    For a video moved to another organization or given other categories:
+    what it was scheduled for then counts towards the new ones. Its items
+    are looked up now, so the days are those it is scheduled on as the
+    transaction stands.
+    """
+    days = (
+        Scheduleitem.objects.filter(video_id__in=list(video_ids), duration__gt=timedelta(0))
+        .annotate(day=TruncDate("starttime", tzinfo=ZoneInfo(settings.TIME_ZONE)))
+        .values_list("day", flat=True)
+        .distinct()
+        .order_by()
+    )
+    _touch(days)
+
+
+def _touch(touched: Iterable[date]) -> None:
+    days = getattr(_touched, "days", None)
+    if days is None:
+        days = _touched.days = set()
+    days.update(touched)
+    transaction.on_commit(_roll_up_touched)
+
+
+def _roll_up_touched() -> None:
+    days = getattr(_touched, "days", None)
+    _touched.days = set()
+    if days:
+        roll_up_schedule(days)
@@ -1,11 +1,29 @@
-from django.db import models
+import re
+from datetime import date, datetime
+from zoneinfo import ZoneInfo
+
+from django.conf import settings
+from django.db import connection, models, transaction
 from django.utils import timezone
 from model_utils.models import TimeStampedModel
 
+# The log is range-partitioned on played_at, one partition per calendar
+# month in TIME_ZONE (see migration 0038), plus a default partition that
+# catches anything no monthly one covers yet. maintain_asrun creates the
+# months ahead and detaches the old ones.
+PARTITION_NAME = "fk_asrun_y{year:04d}m{month:02d}"
+PARTITION_PATTERN = re.compile(r"^fk_asrun_y(\d{4})m(\d{2})$")
+DEFAULT_PARTITION = "fk_asrun_default"
+
 
 class AsRun(TimeStampedModel):
     """
     AsRun model is a historic log over what was sent through playout.
+
+    Stored partitioned by month of `played_at`, which the database's
+    primary key therefore includes; `id` alone stays unique all the same.
+    Old months are detached by maintain_asrun once they are rolled up
+    into VideoAirtime and OrganizationAirtime.
     """
 
     video = models.ForeignKey(
@@ -60,3 +78,109 @@ class AsRun(TimeStampedModel):
             # index instead of sorting the whole log per request.
             models.Index(fields=["-played_at", "-id"], name="asrun_played_at_desc_idx"),
         ]
+        constraints = [
+            # What makes an entry the same entry, so that playout can resend
+            # a batch it is unsure arrived without logging anything twice.
+            # A programme name is set when the video is not, and the other
+            # way round, so nulls have to count as equal here.
+            models.UniqueConstraint(
+                fields=["playout", "played_at", "video", "program_name"],
+                name="asrun_unique_entry",
+                nulls_distinct=False,
+            ),
+        ]
+
+
+def month_bounds(year: int, month: int) -> tuple[datetime, datetime]:
+    """Where a month of the log starts and ends, as partition bounds."""
+    zone = ZoneInfo(settings.TIME_ZONE)
+    start = datetime(year, month, 1, tzinfo=zone)
+    end = datetime(year + month // 12, month % 12 + 1, 1, tzinfo=zone)
+    return start, end
+
+
+def add_months(day: date, months: int) -> date:
+    """The first of the month `months` after the one `day` is in."""
+    index = day.year * 12 + day.month - 1 + months
+    return date(index // 12, index % 12 + 1, 1)
+
+
+def asrun_partitions() -> list[date]:
+    """The months that have a partition of their own, oldest first."""
+    with connection.cursor() as cursor:
+        cursor.execute(
+            """
+            SELECT child.relname
+            FROM pg_inherits
+            JOIN pg_class child ON child.oid = pg_inherits.inhrelid
+            WHERE pg_inherits.inhparent = 'fk_asrun'::regclass
+            """
+        )
+        names = [name for (name,) in cursor.fetchall()]
+    months = []
+    for name in names:
+        if match := PARTITION_PATTERN.match(name):
+            months.append(date(int(match[1]), int(match[2]), 1))
+    return sorted(months)
+
+
+def create_asrun_partition(month: date) -> bool:
+    """Give `month` a partition of its own, unless it has one. Whether it was created.
+
+    Entries for the month may already sit in the default partition, which
+    would make a plain CREATE ... PARTITION OF fail. So the partition is
+    built as an ordinary table, those entries moved into it, and then
+    attached.
+    """
+    if month in asrun_partitions():
+        return False
+    name = PARTITION_NAME.format(year=month.year, month=month.month)
+    start, end = month_bounds(month.year, month.month)
+    with transaction.atomic(), connection.cursor() as cursor:
+        cursor.execute(
+            f"CREATE TABLE {name} (LIKE fk_asrun INCLUDING DEFAULTS INCLUDING CONSTRAINTS)"
+        )
+        cursor.execute(
+            f"""
+            WITH moved AS (
+                DELETE FROM {DEFAULT_PARTITION}
+                WHERE played_at >= %s AND played_at < %s
+                RETURNING *
+            )
+            INSERT INTO {name} SELECT * FROM moved
+            """,
+            [start, end],
+        )
+        cursor.execute(
+            f"ALTER TABLE fk_asrun ATTACH PARTITION {name} FOR VALUES FROM (%s) TO (%s)",
+            [start, end],
+        )
+    return True
+
+
+def detach_asrun_partition(month: date, drop: bool = False) -> str:
+    """Take `month` out of the log. The name of the table it is left in.
+
+    Detached, the month is an ordinary table, out of every query on the
+    log but still there to be dumped or read; with `drop` it is deleted.
+    A detached month keeps no foreign keys: it would otherwise still
+    reference the videos it aired, which Django's SET_NULL only clears in
+    the log itself, and deleting any of them would fail.
+    """
+    name = PARTITION_NAME.format(year=month.year, month=month.month)
+    with transaction.atomic(), connection.cursor() as cursor:
+        # Django's foreign keys are deferred; checks still pending for the
+        # month's rows would keep its table from being altered.
+        cursor.execute("SET CONSTRAINTS ALL IMMEDIATE")
+        cursor.execute(f"ALTER TABLE fk_asrun DETACH PARTITION {name}")
+        if drop:
+            cursor.execute(f"DROP TABLE {name}")
+        else:
+            cursor.execute(
+                "SELECT conname FROM pg_constraint WHERE conrelid = %s::regclass AND contype = 'f'",
+                [name],
+            )
+            for (constraint,) in cursor.fetchall():
+                cursor.execute(f'ALTER TABLE {name} DROP CONSTRAINT "{constraint}"')
+        cursor.execute("SET CONSTRAINTS ALL DEFERRED")
+    return name
@@ -1,4 +1,11 @@
-from django.db import models
+from django.conf import settings
+from django.core.cache import cache
+from django.db import models, transaction
+from django.db.models import Count
+
+# Every category's public video count, as one dict. Small enough to keep
+# whole, and the category listing wants all of it at once.
+PUBLIC_VIDEO_COUNTS_KEY = "fk.category.public_video_counts"
 
 
 class Category(models.Model):
@@ -35,3 +42,35 @@ class Category(models.Model):
 
     def __str__(self):
         return self.name
+
+    @classmethod
+    def public_video_counts(cls) -> dict[int, int]:
+        """How many public videos each category has, by category id.
+
+        One grouped count over the category link table, restricted by
+        Video.public() so the rule of what counts stays in one place; kept
+        in the cache until something that could change it is saved. Time
+        bounds it too, at the page cache's lifetime, which is as stale as
+        the same listing already gets for anonymous visitors.
+        """
+        counts = cache.get(PUBLIC_VIDEO_COUNTS_KEY)
+        if counts is None:
+            from .video import Video
+
+            links = Video.categories.through.objects.filter(video__in=Video.objects.public())
+            counts = dict(
+                links.values("category_id")
+                .annotate(videos=Count("video_id"))
+                .values_list("category_id", "videos")
+            )
+            cache.set(PUBLIC_VIDEO_COUNTS_KEY, counts, settings.CACHE_MIDDLEWARE_SECONDS)
+        return counts
+
+    @staticmethod
+    def forget_public_video_counts() -> None:
+        """Drop the cached counts once the current transaction commits.
+
+        Not before: a reader recounting between the delete and the commit
+        would cache the old numbers all over again.
+        """
+        transaction.on_commit(lambda: cache.delete(PUBLIC_VIDEO_COUNTS_KEY))
@@ -1,5 +1,32 @@
+import logging
+import os
+import select
+import threading
+from collections import defaultdict
+from collections.abc import Callable, Iterator
+from contextlib import contextmanager
+from datetime import timedelta
+from typing import ClassVar
+
+from django.conf import settings
 from django.core.validators import MaxValueValidator, MinValueValidator
-from django.db import models
+from django.db import connections, models, transaction
+from django.db.models import Case, F, Value, When
+from django.db.models.functions import Coalesce
+from django.utils import timezone
+
+# The Postgres channel every saved report is announced on, with the video's
+# primary key as the payload. NOTIFY is transactional: a report rolled back
+# is never announced, and one committed is announced only once it is
+# visible to whoever wakes up to read it.
+REPORT_CHANNEL = "fk_ingest_job"
+
+# How long a waiter gives the listener to start listening, and how long the
+# listener waits before connecting again when its connection drops.
+LISTEN_TIMEOUT = 5
+RECONNECT_DELAY = 1
+
+logger = logging.getLogger(__name__)
 
 
 class IngestState(models.TextChoices):
@@ -73,9 +100,26 @@ class IngestJob(models.Model):
     # forever. Publishing when it was made is what lets a reader tell a
     # slow job from an abandoned one.
     updated_time = models.DateTimeField(auto_now=True)
+    # Counts the times the job has been handed out, or uploaded to again.
+    # A worker reports with the number it was handed, so one that lost the
+    # job to a reclaim while still alive has its reports turned away
+    # rather than mixed in with its successor's.
+    claim = models.PositiveIntegerField(
+        default=0,
+        help_text=(
+            "Which claim on the job is current. Progress reports must carry it; "
+            "0 until the job is first claimed."
+        ),
+    )
 
     class Meta:
         verbose_name = "ingest job"
+        indexes = [
+            # "Which jobs have been sitting in a non-terminal state since
+            # before X" -- the question a watchdog over ingest asks, and
+            # a range scan per state with this index.
+            models.Index(fields=["state", "updated_time"], name="ingest_job_state_updated"),
+        ]
 
         constraints = [
             models.CheckConstraint(
@@ -110,5 +154,215 @@ class IngestJob(models.Model):
                 return cls(video=video, state=IngestState.DONE, percentage_done=100)
             return cls(video=video, state=IngestState.PENDING)
 
+    @classmethod
+    def annotate_videos(cls, videos):
+        """for_video() for a whole queryset of videos, done by the database.
+
+        Adds `ingest_state`, `ingest_percentage_done`, `ingest_error_code`
+        and `ingest_updated_time` to each video, from its job where it has
+        one and from `proper_import` where it does not -- the same answer
+        for_video() gives, but as columns, so the result can be filtered
+        on the state and read in one query. from_annotated() turns a row
+        back into a job.
+        """
+        has_job = models.Q(ingest_job__isnull=False)
+        return videos.annotate(
+            ingest_state=Coalesce(
+                "ingest_job__state",
+                Case(
+                    When(proper_import=True, then=Value(IngestState.DONE)),
+                    default=Value(IngestState.PENDING),
+                ),
+                output_field=models.CharField(),
+            ),
+            ingest_percentage_done=Case(
+                When(has_job, then=F("ingest_job__percentage_done")),
+                When(proper_import=True, then=Value(100)),
+                default=None,
+                output_field=models.IntegerField(),
+            ),
+            ingest_error_code=Coalesce(
+                "ingest_job__error_code", Value(""), output_field=models.CharField()
+            ),
+            ingest_updated_time=F("ingest_job__updated_time"),
+        )
+
+    @classmethod
+    def from_annotated(cls, video) -> "IngestJob":
+        """The (unsaved) job described by a row of annotate_videos()."""
+        return cls(
+            video=video,
+            state=video.ingest_state,
+            percentage_done=video.ingest_percentage_done,
+            error_code=video.ingest_error_code,
+            updated_time=video.ingest_updated_time,
+        )
+
+    @classmethod
+    def claim_next(cls, lease: timedelta) -> "IngestJob | None":
+        """Hand the oldest unclaimed job to the calling ingest worker.
+
+        Unclaimed means PENDING, or in a working state without a report for
+        longer than `lease`: a worker renews its lease with every progress
+        report, so silence that long means it died holding the job. The
+        claim moves the job to PROBING, which is what keeps the next
+        caller from taking it too, and counts up its `claim`, which fences
+        off the worker that held it before; SKIP LOCKED keeps two callers racing
+        for the same row from queueing behind each other's lock, each
+        taking the next row instead.
+
+        Only saved jobs are candidates. A video with no row is pending
+        only in the sense for_video() describes -- nothing was ever
+        uploaded to it, so there is nothing for a worker to do.
+        """
+        working = set(IngestState) - IngestState.terminal() - {IngestState.PENDING}
+        stale = timezone.now() - lease
+        with transaction.atomic():
+            job = (
+                cls.objects.filter(
+                    models.Q(state=IngestState.PENDING)
+                    | models.Q(state__in=working, updated_time__lt=stale)
+                )
+                .order_by("updated_time", "video_id")
+                .select_for_update(skip_locked=True)
+                .first()
+            )
+            if job is None:
+                return None
+            job.state = IngestState.PROBING
+            job.percentage_done = None
+            job.claim += 1
+            job.save()
+        return job
+
+    def save(self, *args, **kwargs):
+        # Announced from here, so a queryset's update() goes unannounced:
+        # anything that changes a job some reader may be waiting on has to
+        # save() it.
+        super().save(*args, **kwargs)
+        with connections[self._state.db].cursor() as cursor:
+            cursor.execute("SELECT pg_notify(%s, %s)", [REPORT_CHANNEL, str(self.video_id)])
+
     def __str__(self):
         return f"{self.state} ingest of video {self.video_id}"
+
+
+class IngestReportListener:
+    """Hears every saved report once per process, and wakes whoever waits on it.
+
+    One connection per process, in autocommit, LISTENs on REPORT_CHANNEL
+    from a thread of its own: Django's connection may be inside a
+    transaction, and a listener inside one hears nothing until it ends.
+    Waiters register a callback for a video and are called from that
+    thread when a report on it is committed, so a long poll costs the
+    waiter nothing but itself -- no connection of its own, and no polling.
+
+    At most INGEST_REPORT_MAX_WAITERS wait at once per process; the rest
+    are told not to wait, and answer at once. Register before reading the
+    job, so that a report landing between the read and the wait still
+    wakes the waiter rather than falling into the gap. Should the
+    connection drop, every waiter is woken, as reports may have gone by
+    unheard, and the thread connects again.
+    """
+
+    _shared: ClassVar[dict[str, "IngestReportListener"]] = {}
+    _shared_lock = threading.Lock()
+
+    def __init__(self, using: str = "default"):
+        self.using = using
+        self.pid = os.getpid()
+        self.lock = threading.Lock()
+        self.waiters: dict[str, set[Callable[[], None]]] = defaultdict(set)
+        self.waiting_count = 0
+        self.listening = threading.Event()
+        self.stopping = threading.Event()
+        self.thread = threading.Thread(
+            target=self._listen, name=f"ingest-report-listener-{using}", daemon=True
+        )
+        self.thread.start()
+
+    @classmethod
+    def shared(cls, using: str = "default") -> "IngestReportListener":
+        """The process's listener on `using`, started on first use.
+
+        Started lazily, so that gunicorn's preloading master never has
+        one: a thread does not survive a fork.
+        """
+        with cls._shared_lock:
+            listener = cls._shared.get(using)
+            if listener is None or listener.pid != os.getpid():
+                listener = cls._shared[using] = cls(using)
+            return listener
+
+    @classmethod
+    def stop_all(cls) -> None:
+        """Stop the process's listeners and close their connections."""
+        with cls._shared_lock:
+            listeners = list(cls._shared.values())
+            cls._shared.clear()
+        for listener in listeners:
+            listener.stopping.set()
+            listener.thread.join()
+
+    @contextmanager
+    def waiting(self, video_id: int, wake: Callable[[], None]) -> Iterator[bool]:
+        """Have `wake` called, from the listener's thread, for every report on
+        `video_id` committed inside the block once ready(). Whether it will
+        be: not when the process already has as many waiters as it allows.
+
+        `wake` must not block; from a coroutine, have it hand over to the
+        event loop with call_soon_threadsafe().
+        """
+        key = str(video_id)
+        with self.lock:
+            admitted = self.waiting_count < settings.INGEST_REPORT_MAX_WAITERS
+            if admitted:
+                self.waiters[key].add(wake)
+                self.waiting_count += 1
+        try:
+            yield admitted
+        finally:
+            if admitted:
+                with self.lock:
+                    self.waiters[key].discard(wake)
+                    if not self.waiters[key]:
+                        del self.waiters[key]
+                    self.waiting_count -= 1
+
+    def ready(self) -> bool:
+        """Block until the listener is listening, which it may not be yet
+        the first time round; whether it is. Blocks for up to LISTEN_TIMEOUT."""
+        return self.listening.wait(LISTEN_TIMEOUT)
+
+    def _wake(self, keys) -> None:
+        with self.lock:
+            callbacks = [wake for key in keys for wake in self.waiters.get(key, ())]
+        for wake in callbacks:
+            wake()
+
+    def _listen(self) -> None:
+        wrapper = connections[self.using]
+        while not self.stopping.is_set():
+            raw = None
+            try:
+                raw = wrapper.get_new_connection(wrapper.get_connection_params())
+                raw.autocommit = True
+                with raw.cursor() as cursor:
+                    cursor.execute(f"LISTEN {REPORT_CHANNEL}")
+                self.listening.set()
+                while not self.stopping.is_set():
+                    # Woken now and then regardless, to notice stop_all().
+                    readable, _, _ = select.select([raw], [], [], 1)
+                    if readable:
+                        raw.poll()
+                        heard = {notify.payload for notify in raw.notifies}
+                        raw.notifies.clear()
+                        self._wake(heard)
+            except (wrapper.Database.Error, OSError):
+                logger.exception("Lost the ingest report listener's connection")
+                self.listening.clear()
+                self._wake(list(self.waiters))
+                self.stopping.wait(RECONNECT_DELAY)
+            finally:
+                if raw is not None:
+                    raw.close()
@@ -0,0 +1,660 @@
+"""A made-up database shaped like production, for load tests and profiling.
+
+generate() fills an empty database with everything the API serves:
+organizations, some without a responsible editor, and their editors
+and members; tens of thousands of videos, with the files ingest makes,
+program images, categories and series; the weekly slots; and the
+schedule for `history_days` before today through the scheduling
+horizon. Each day of schedule has the weekly slots' placements, some
+member picks, now and then a live broadcast, and jukebox fillers
+packed into the rest, minute-aligned as the jukebox packs them. The
+as-run log mirrors the schedule until today, in the monthly partitions
+maintain_asrun would have made, and both are rolled up into airtime
+the way the nightly jobs do it.
+
+Everything is drawn from one random.Random(seed), in time relative to
+the start of `today` (by default, the day it is run). So the same seed
+and day give the same data -- names, durations and times, though not
+necessarily the same ids.
+
+Everything is written with bulk_create. That skips save() and the
+signals, which is why the rollups are redone at the end.
+"""
+
+import bisect
+import math
+import random
+from collections import Counter
+from dataclasses import dataclass
+from datetime import UTC, date, datetime, time, timedelta
+from zoneinfo import ZoneInfo
+
+from django.conf import settings
+from django.contrib.auth.hashers import UNUSABLE_PASSWORD_PREFIX
+from django.core.management import call_command
+from django.db import transaction
+from django.db.models import F
+from django.utils import timezone
+from rest_framework.authtoken.models import Token
+
+from agenda.scheduling.policy import scheduling_horizon
+from fk.models import (
+    AsRun,
+    Category,
+    IngestJob,
+    IngestState,
+    Organization,
+    ProgramImage,
+    Scheduleitem,
+    Series,
+    SlotSourceStrategy,
+    SlotSourceType,
+    User,
+    Video,
+    VideoFile,
+    VideoFileVariant,
+    WeeklySlot,
+    WeeklySlotSource,
+)
+from fk.models.airtime import days_to_roll_up, roll_up_airtime, roll_up_schedule
+from fk.models.asrun import add_months, create_asrun_partition
+from fk.models.program_image import ImageMediaType, ImageRole
+
+BATCH_SIZE = 2_000
+
+# The staff account made for the load scenario's ingest polling.
+STAFF_EMAIL = "load-staff@synthetic.invalid"
+
+PLACES = (
+    "Oslo", "Bergen", "Trondheim", "Stavanger", "Tromsø", "Drammen", "Kristiansand",
+    "Fredrikstad", "Bodø", "Ålesund", "Hamar", "Lillehammer", "Gjøvik", "Molde",
+    "Harstad", "Alta", "Kirkenes", "Voss", "Arendal", "Skien", "Sandnes", "Halden",
+)  # fmt: skip
+ORGANIZATION_KINDS = (
+    "menighet", "historielag", "pensjonistforening", "idrettslag", "filmklubb",
+    "venstrelag", "arbeiderparti", "kulturhus", "innvandrerforening", "speidergruppe",
+    "sjakklubb", "korps", "naturvernforbund", "bondelag", "studentradio", "moskeé",
+)  # fmt: skip
+SUBJECTS = (
+    "bompenger", "skolemat", "eldreomsorg", "kommunesammenslåing", "fiskeri",
+    "kirkeasyl", "vindkraft", "bibliotek", "kollektivtrafikk", "boligpriser",
+    "integrering", "friluftsliv", "nærmiljø", "ungdomsklubb", "fotball", "sjakk",
+    "korpsmusikk", "lokalhistorie", "kystkultur", "samisk språk", "bærekraft",
+    "frivillighet", "helse", "psykisk helse", "klima", "landbruk", "jakt", "matkultur",
+)  # fmt: skip
+FORMATS = (
+    "Debatt om", "Foredrag:", "Møte om", "Nytt om", "Samtale om", "Dokumentar:",
+    "Kveldsåpent:", "Gudstjeneste med tema", "Magasinet:", "Temakveld:", "Direkte:",
+)  # fmt: skip
+FIRST_NAMES = (
+    "Anne", "Inger", "Kari", "Marit", "Ingrid", "Liv", "Eva", "Berit", "Astrid", "Nora",
+    "Ole", "Jan", "Per", "Bjørn", "Lars", "Kjell", "Knut", "Arne", "Svein", "Amir",
+    "Fatima", "Ali", "Mohammed", "Aisha", "Sara", "Jonas", "Emil", "Elias", "Maja", "Ida",
+)  # fmt: skip
+LAST_NAMES = (
+    "Hansen", "Johansen", "Olsen", "Larsen", "Andersen", "Pedersen", "Nilsen",
+    "Kristiansen", "Jensen", "Karlsen", "Johnsen", "Pettersen", "Eriksen", "Berg",
+    "Haugen", "Hagen", "Ahmed", "Ali", "Khan", "Nguyen", "Sara", "Eira", "Hætta",
+)  # fmt: skip
+LANGUAGES = ("no",) * 30 + ("nn",) * 4 + ("en",) * 3 + ("se", "ar", "so", "pl", "")
+
+# The weekly slots, as (weekday, start, minutes): an evening line-up, a
+# lunchtime repeat, and a long Sunday service.
+SLOT_TIMES = [
+    *((day, time(12), 60) for day in range(7)),
+    *((day, time(18), 60) for day in range(7)),
+    *((day, time(19, 30), 90) for day in range(5)),
+    *((day, time(21), 60) for day in range(7)),
+    (6, time(11), 120),
+]
+
+# The files a properly imported video has, and the ones some have besides.
+IMPORTED_VARIANTS = (
+    VideoFileVariant.ORIGINAL,
+    VideoFileVariant.BROADCAST,
+    VideoFileVariant.THEORA,
+    VideoFileVariant.LARGE_THUMB,
+    VideoFileVariant.MED_THUMB,
+    VideoFileVariant.SMALL_THUMB,
+)
+SOMETIMES_VARIANTS = (VideoFileVariant.SRT, VideoFileVariant.DASH, VideoFileVariant.WEBM_MED)
+
+IMAGE_ROLES = (ImageRole.EPISODE_STILL, ImageRole.KEY_ART_TITLED)
+
+EXTENSIONS = {
+    VideoFileVariant.ORIGINAL: "mov",
+    VideoFileVariant.BROADCAST: "mxf",
+    VideoFileVariant.THEORA: "ogv",
+    VideoFileVariant.LARGE_THUMB: "jpg",
+    VideoFileVariant.MED_THUMB: "jpg",
+    VideoFileVariant.SMALL_THUMB: "jpg",
+    VideoFileVariant.SRT: "srt",
+    VideoFileVariant.DASH: "mpd",
+    VideoFileVariant.WEBM_MED: "webm",
+}
+
+
+@dataclass(frozen=True)
+class Scale:
+    """How much to make. Everything but the schedule follows from `videos`."""
+
+    videos: int = 30_000
+    history_days: int = 3 * 365
+
+    @property
+    def organizations(self) -> int:
+        return max(self.videos // 100, 4)
+
+    @property
+    def series(self) -> int:
+        return self.videos // 25
+
+
+def generate(seed: int, scale: Scale | None = None, today: date | None = None) -> Counter[str]:
+    """Fill an empty database; how many rows of each model were made."""
+    with transaction.atomic():
+        generator = _Generator(random.Random(seed), scale or Scale(), today or timezone.localdate())
+        return generator.run()
+
+
+class _Generator:
+    def __init__(self, rng: random.Random, scale: Scale, today: date) -> None:
+        self.rng = rng
+        self.scale = scale
+        self.zone = ZoneInfo(settings.TIME_ZONE)
+        self.today = today
+        self.now = self._midnight(today)
+        self.first_day = self.today - timedelta(days=scale.history_days)
+        self.made: Counter[str] = Counter()
+
+    def run(self) -> Counter[str]:
+        self.categories()
+        self.users_and_organizations()
+        self.series()
+        self.videos()
+        self.files_images_and_ingest()
+        self.weekly_slots()
+        self.schedule_and_as_run()
+        return self.made
+
+    def _create(self, model, objects: list) -> list:
+        created = model.objects.bulk_create(objects, batch_size=BATCH_SIZE)
+        self.made[str(model._meta.verbose_name_plural)] += len(created)
+        return created
+
+    def _moment(self, days_ago: float) -> datetime:
+        return self.now - timedelta(days=days_ago)
+
+    def _token(self, length: int) -> str:
+        return f"{self.rng.getrandbits(length * 4):0{length}x}"
+
+    def categories(self) -> None:
+        # The ones a fresh install has; they are the production list.
+        if not Category.objects.exists():
+            call_command("loaddata", "frikanalen", verbosity=0)
+        self.category_ids = list(Category.objects.order_by("id").values_list("id", flat=True))
+
+    def users_and_organizations(self) -> None:
+        rng = self.rng
+        users = []
+
+        def user(**fields) -> User:
+            first, last = rng.choice(FIRST_NAMES), rng.choice(LAST_NAMES)
+            made = User(
+                email=f"{first}.{last}.{len(users)}@synthetic.invalid".lower(),
+                first_name=first,
+                last_name=last,
+                password=UNUSABLE_PASSWORD_PREFIX + self._token(40),
+                date_joined=self._moment(rng.uniform(0, 1.5 * self.scale.history_days)),
+                **fields,
+            )
+            users.append(made)
+            return made
+
+        staff = user(is_superuser=True, identity_confirmed=True)
+        staff.email = STAFF_EMAIL
+        organizations = []
+        members: list[tuple[Organization, User]] = []
+        names: set[str] = set()
+        for _ in range(self.scale.organizations):
+            name = f"{rng.choice(PLACES)} {rng.choice(ORGANIZATION_KINDS)}"
+            while name in names:
+                name = f"{name} {rng.randint(2, 9)}"
+            names.add(name)
+            draw = rng.random()
+            # Most answer for their programmes; some have lost their
+            # editor, or never had one, and must stay out of public view.
+            editor = user(identity_confirmed=True) if draw < 0.9 else None
+            if editor is not None and draw > 0.85:
+                editor.is_active = False
+            organization = Organization(
+                name=name,
+                description=f"{name} lager TV om {rng.choice(SUBJECTS)}.",
+                fkmember=rng.random() < 0.7,
+                orgnr=str(rng.randint(800_000_000, 999_999_999)) if rng.random() < 0.6 else "",
+                homepage=f"https://{name.split()[0].lower()}.example/{len(names)}",
+                editor=editor,
+            )
+            organizations.append(organization)
+            if editor is not None:
+                members.append((organization, editor))
+            for _ in range(rng.choice((0, 1, 1, 2, 3, 5))):
+                members.append((organization, user()))
+
+        self._create(User, users)
+        Token.objects.create(user=staff, key=self._token(40))
+        self.staff = staff
+        self.organizations = self._create(Organization, organizations)
+        Membership = Organization.members.through
+        self._create(
+            Membership,
+            [Membership(organization_id=org.pk, user_id=member.pk) for org, member in members],
+        )
+        self.members = {}
+        for organization, member in members:
+            self.members.setdefault(organization.pk, []).append(member)
+        # Zipf-like: a few organizations upload most of the catalogue.
+        self.organization_weights = list(
+            _cumulative(1 / (rank + 1) ** 0.9 for rank in range(len(self.organizations)))
+        )
+
+    def _organization(self) -> Organization:
+        return self.rng.choices(self.organizations, cum_weights=self.organization_weights)[0]
+
+    def series(self) -> None:
+        series = []
+        taken: set[tuple[int, str]] = set()
+        for _ in range(self.scale.series):
+            organization = self._organization()
+            name = f"{self.rng.choice(FORMATS)} {self.rng.choice(SUBJECTS)}"
+            if (organization.pk, name) in taken:
+                continue
+            taken.add((organization.pk, name))
+            series.append(
+                Series(
+                    organization=organization,
+                    name=name,
+                    synopsis=f"En serie fra {organization.name}.",
+                    image_url=(
+                        f"https://images.synthetic.invalid/series/{len(series)}.jpg"
+                        if self.rng.random() < 0.3
+                        else ""
+                    ),
+                )
+            )
+        self.series_list = self._create(Series, series)
+        self.series_by_organization: dict[int, list[Series]] = {}
+        for one in self.series_list:
+            self.series_by_organization.setdefault(one.organization_id, []).append(one)
+        # Most series number their episodes; the rest are loose strands.
+        self.numbered = {one.pk for one in self.series_list if self.rng.random() < 0.7}
+
+    def videos(self) -> None:
+        rng = self.rng
+        history = self.scale.history_days
+        videos = []
+        links = []
+        episodes: Counter[int] = Counter()
+        for _ in range(self.scale.videos):
+            organization = self._organization()
+            is_filler = rng.random() < 0.3
+            # Fillers run short; programmes around twenty minutes, with a
+            # long tail of meetings and services.
+            median = 12 if is_filler else 20
+            minutes = min(max(rng.lognormvariate(math.log(median), 0.8), 0.5), 180)
+            # Weighted towards now, with some from before the schedule
+            # history begins.
+            uploaded = self._moment(1.5 * history * rng.random() ** 2)
+            own_series = self.series_by_organization.get(organization.pk)
+            series = rng.choice(own_series) if own_series and rng.random() < 0.5 else None
+            episode = None
+            if series is not None and series.pk in self.numbered:
+                episodes[series.pk] += 1
+                episode = episodes[series.pk]
+            subject = rng.choice(SUBJECTS)
+            videos.append(
+                Video(
+                    name=f"{rng.choice(FORMATS)} {subject}",
+                    header=f"{organization.name} om {subject}.",
+                    description=(
+                        f"Opptak fra {rng.choice(PLACES)}, om {subject} og {rng.choice(SUBJECTS)}."
+                        if rng.random() < 0.8
+                        else None
+                    ),
+                    creator=rng.choice(self.members.get(organization.pk) or [self.staff]),
+                    organization=organization,
+                    series=series,
+                    episode_number=episode,
+                    is_filler=is_filler,
+                    has_tono_records=rng.random() < 0.05,
+                    publish_on_web=rng.random() < 0.95,
+                    proper_import=rng.random() < 0.97,
+                    played_count_web=min(int(rng.paretovariate(1.2)) - 1, 100_000),
+                    uploaded_time=uploaded,
+                    duration=timedelta(milliseconds=round(minutes * 60_000)),
+                    spoken_language=rng.choice(LANGUAGES),
+                    minimum_age=rng.choice((None,) * 12 + (0, 6, 12, 15)),
+                    upload_token=self._token(32),
+                )
+            )
+        self.videos_list = self._create(Video, videos)
+        # created_time is auto_now_add, so the insert stamped everything
+        # now; uploads happened over years.
+        first, last = self.videos_list[0].pk, self.videos_list[-1].pk
+        Video.objects.filter(pk__range=(first, last)).update(
+            created_time=F("uploaded_time"), updated_time=F("uploaded_time")
+        )
+        for video in self.videos_list:
+            video.created_time = video.updated_time = video.uploaded_time
+            for category_id in rng.sample(self.category_ids, rng.choice((1, 1, 1, 2, 3))):
+                links.append(Video.categories.through(video_id=video.pk, category_id=category_id))
+        self._create(Video.categories.through, links)
+
+    def files_images_and_ingest(self) -> None:
+        rng = self.rng
+        files = []
+        images = []
+        jobs = []
+        recent = self._moment(30)
+        for video in self.videos_list:
+            variants = (
+                list(IMPORTED_VARIANTS) if video.proper_import else [VideoFileVariant.ORIGINAL]
+            )
+            if video.proper_import:
+                variants += [variant for variant in SOMETIMES_VARIANTS if rng.random() < 0.2]
+            for variant in variants:
+                files.append(
+                    VideoFile(
+                        video=video,
+                        variant=variant,
+                        filename=f"{video.pk}.{EXTENSIONS[variant]}",
+                        integrated_lufs=(
+                            round(rng.gauss(-23, 2), 1)
+                            if variant == VideoFileVariant.BROADCAST
+                            else None
+                        ),
+                        truepeak_lufs=(
+                            round(rng.uniform(-6, -1), 1)
+                            if variant == VideoFileVariant.BROADCAST
+                            else None
+                        ),
+                    )
+                )
+            if rng.random() < 0.3:
+                for role in rng.sample(IMAGE_ROLES, rng.choice((1, 2))):
+                    images.append(
+                        ProgramImage(
+                            video=video,
+                            role=role,
+                            filename=f"{video.pk}/{role}.jpg",
+                            media_type=ImageMediaType.JPEG,
+                            width=1920,
+                            height=1080,
+                        )
+                    )
+            # Ingest reports only exist for the uploads since it started
+            # reporting; what is still in hand is not properly imported.
+            if video.uploaded_time >= recent:
+                if video.proper_import:
+                    jobs.append(IngestJob(video=video, state=IngestState.DONE))
+                elif rng.random() < 0.3:
+                    jobs.append(
+                        IngestJob(video=video, state=IngestState.FAILED, error_code="unreadable")
+                    )
+                else:
+                    jobs.append(
+                        IngestJob(
+                            video=video,
+                            state=IngestState.TRANSCODING,
+                            percentage_done=rng.randint(0, 99),
+                        )
+                    )
+        self._create(VideoFile, files)
+        self._create(ProgramImage, images)
+        self._create(IngestJob, jobs)
+
+    def weekly_slots(self) -> None:
+        rng = self.rng
+        accountable = [
+            organization
+            for organization in self.organizations
+            if organization.editor is not None and organization.editor.is_active
+        ]
+        sources = []
+        picks = []
+        for _ in range(len(SLOT_TIMES) // 2):
+            if rng.random() < 0.7:
+                organization = rng.choice(accountable)
+                sources.append(
+                    WeeklySlotSource(
+                        name=f"Det nyeste fra {organization.name}",
+                        type=SlotSourceType.ORGANIZATION,
+                        strategy=rng.choice(list(SlotSourceStrategy)),
+                        organization=organization,
+                    )
+                )
+                picks.append([])
+            else:
+                chosen = rng.sample(self.videos_list, min(8, len(self.videos_list)))
+                sources.append(
+                    WeeklySlotSource(
+                        name=f"Utvalgt: {rng.choice(SUBJECTS)}",
+                        type=SlotSourceType.VIDEOS,
+                        strategy=rng.choice(list(SlotSourceStrategy)),
+                    )
+                )
+                picks.append(chosen)
+        sources = self._create(WeeklySlotSource, sources)
+        Pick = WeeklySlotSource.direct_videos.through
+        self._create(
+            Pick,
+            [
+                Pick(weeklyslotsource_id=source.pk, video_id=video.pk)
+                for source, chosen in zip(sources, picks, strict=True)
+                for video in chosen
+            ],
+        )
+        slots = [
+            WeeklySlot(
+                source=rng.choice(sources),
+                day=day,
+                start_time=start,
+                duration=timedelta(minutes=minutes),
+            )
+            for day, start, minutes in SLOT_TIMES
+        ]
+        self.slots = self._create(WeeklySlot, slots)
+        self.slot_candidates = {
+            source.pk: self._candidates(source, chosen)
+            for source, chosen in zip(sources, picks, strict=True)
+        }
+
+    def _candidates(self, source: WeeklySlotSource, chosen: list[Video]) -> "_ByUpload":
+        """What the source could have drawn from, as its videos_queryset() sees it."""
+        if source.type == SlotSourceType.ORGANIZATION:
+            pool = [
+                video for video in self.videos_list if video.organization == source.organization
+            ]
+        else:
+            pool = [
+                video
+                for video in chosen
+                if video.organization.editor is not None and video.organization.editor.is_active
+            ]
+        return _ByUpload(video for video in pool if video.proper_import and video.duration)
+
+    def schedule_and_as_run(self) -> None:
+        rng = self.rng
+        playable = [
+            video
+            for video in self.videos_list
+            if video.proper_import
+            and video.duration
+            and video.organization.editor is not None
+            and video.organization.editor.is_active
+        ]
+        fillers = _ByUpload(
+            video
+            for video in playable
+            if video.is_filler and not video.has_tono_records and video.organization.fkmember
+        )
+        picks = _ByUpload(playable)
+        horizon = scheduling_horizon(self.now)
+        items: list[Scheduleitem] = []
+        day = self.first_day
+        while (start := self._midnight(day)) < horizon:
+            end = min(self._midnight(day + timedelta(days=1)), horizon)
+            items.extend(self._day(day, start, end, fillers, picks))
+            day += timedelta(days=1)
+        self._create(Scheduleitem, items)
+
+        # The log, as playout would have kept it: what was scheduled,
+        # with the odd gap where playout was down.
+        entries = [
+            AsRun(
+                video=item.video,
+                program_name="" if item.video else item.default_name,
+                played_at=item.starttime,
+                out_ms=item.duration // timedelta(milliseconds=1),
+            )
+            for item in items
+            if item.starttime + item.duration <= self.now and rng.random() > 0.005
+        ]
+        month = self.first_day.replace(day=1)
+        while month <= self.today:
+            create_asrun_partition(month)
+            month = add_months(month, 1)
+        self._create(AsRun, entries)
+
+        # What the nightly jobs and the schedule's signals keep up to date.
+        roll_up_airtime(days_to_roll_up(self.today, settings.ASRUN_ROLLUP_LOOKBACK_DAYS))
+        last_day = timezone.localdate(horizon)
+        roll_up_schedule(
+            self.first_day + timedelta(days=n) for n in range((last_day - self.first_day).days + 1)
+        )
+
+    def _midnight(self, day: date) -> datetime:
+        return datetime.combine(day, time(), tzinfo=self.zone).astimezone(UTC)
+
+    def _day(
+        self,
+        day: date,
+        start: datetime,
+        end: datetime,
+        fillers: "_ByUpload",
+        picks: "_ByUpload",
+    ) -> list[Scheduleitem]:
+        """One day of schedule: the slots, member picks and a live broadcast, then fillers."""
+        rng = self.rng
+        fixed: list[Scheduleitem] = []
+
+        def place(item: Scheduleitem) -> None:
+            item_end = item.starttime + item.duration
+            if item_end > end or any(
+                item.starttime < other.starttime + other.duration and other.starttime < item_end
+                for other in fixed
+            ):
+                return
+            fixed.append(item)
+
+        for slot in self.slots:
+            if slot.day != day.weekday():
+                continue
+            at = datetime.combine(day, slot.start_time, tzinfo=self.zone).astimezone(UTC)
+            video = self.slot_candidates[slot.source_id].draw(
+                rng, at, slot.duration, latest=slot.source.strategy == SlotSourceStrategy.LATEST
+            )
+            if video is not None:
+                place(
+                    Scheduleitem(
+                        video=video,
+                        schedulereason=Scheduleitem.REASON_AUTO,
+                        starttime=at,
+                        duration=video.duration,
+                        weekly_slot=slot,
+                    )
+                )
+        for _ in range(rng.choice((0, 1, 1, 2, 3))):
+            at = _whole_minute(start + timedelta(minutes=rng.randrange(6 * 60, 23 * 60)))
+            video = picks.draw(rng, at, timedelta(hours=3))
+            if video is not None:
+                place(
+                    Scheduleitem(
+                        video=video,
+                        schedulereason=Scheduleitem.REASON_USER,
+                        starttime=at,
+                        duration=video.duration,
+                    )
+                )
+        if rng.random() < 0.1:
+            place(
+                Scheduleitem(
+                    default_name=f"Direkte: {rng.choice(SUBJECTS)}",
+                    schedulereason=Scheduleitem.REASON_ADMIN,
+                    starttime=start + timedelta(hours=rng.randrange(10, 21)),
+                    duration=timedelta(minutes=rng.choice((30, 60, 90))),
+                    is_live=True,
+                )
+            )
+
+        fixed.sort(key=lambda item: item.starttime)
+        items = list(fixed)
+        at = _whole_minute(start)
+        for boundary in [*fixed, None]:
+            gap_end = end if boundary is None else boundary.starttime
+            while at < gap_end:
+                video = fillers.draw(rng, at, gap_end - at)
+                if video is None:
+                    break
+                items.append(
+                    Scheduleitem(
+                        video=video,
+                        schedulereason=Scheduleitem.REASON_JUKEBOX,
+                        starttime=at,
+                        duration=video.duration,
+                    )
+                )
+                at = _whole_minute(at + video.duration)
+            if boundary is not None:
+                at = max(at, _whole_minute(boundary.starttime + boundary.duration))
+        return items
+
+
+class _ByUpload:
+    """Videos in upload order, to draw from those uploaded by a given moment."""
+
+    def __init__(self, videos) -> None:
+        self.videos = sorted(videos, key=lambda video: (video.uploaded_time, video.pk))
+        self.uploaded = [video.uploaded_time for video in self.videos]
+
+    def draw(
+        self, rng: random.Random, at: datetime, longest: timedelta, latest: bool = False
+    ) -> Video | None:
+        """One uploaded before `at` and no longer than `longest`, or None."""
+        available = bisect.bisect(self.uploaded, at)
+        if latest:
+            # A slot chasing the newest upload: the newest that fits.
+            for video in reversed(self.videos[max(available - 20, 0) : available]):
+                if video.duration <= longest:
+                    return video
+            return None
+        for _ in range(5):
+            if not available:
+                return None
+            video = self.videos[rng.randrange(available)]
+            if video.duration <= longest:
+                return video
+        return None
+
+
+def _whole_minute(moment: datetime) -> datetime:
+    """`moment`, or the whole minute after it."""
+    floor = moment.replace(second=0, microsecond=0)
+    return floor if floor == moment else floor + timedelta(minutes=1)
+
+
+def _cumulative(weights):
+    total = 0.0
+    for weight in weights:
+        total += weight
+        yield total
@@ -0,0 +1,130 @@
+"""
+The as-run log's monthly partitions, and the airtime rolled up from it.
+
+The log is partitioned by month of played_at. maintain_asrun rolls the
+finished days up into per-video and per-organization airtime, keeps
+partitions ready for the months ahead, and detaches the months past
+retention -- after which the rollups still answer for them.
+"""
+
+from datetime import date, datetime, timedelta
+from io import StringIO
+from zoneinfo import ZoneInfo
+
+import pytest
+from django.core.management import call_command
+from django.db import connection
+from django.utils import timezone
+
+from fk.models import AsRun, Organization, OrganizationAirtime, User, Video, VideoAirtime
+from fk.models.airtime import days_to_roll_up, roll_up_airtime
+from fk.models.asrun import asrun_partitions, create_asrun_partition, detach_asrun_partition
+
+pytestmark = pytest.mark.django_db
+
+OSLO = ZoneInfo("Europe/Oslo")
+JANUARY = date(2015, 1, 1)
+
+
+@pytest.fixture
+def video() -> Video:
+    editor = User.objects.create(email="asrun-partitions@example.test")
+    organization = Organization.objects.create(name="Partitioned", editor=editor)
+    return Video.objects.create(name="Aired", creator=editor, organization=organization)
+
+
+def aired(video: Video, at: datetime, seconds: int | None = 60) -> AsRun:
+    return AsRun.objects.create(
+        video=video, played_at=at, out_ms=None if seconds is None else seconds * 1000
+    )
+
+
+def rows_in(table: str) -> int:
+    with connection.cursor() as cursor:
+        cursor.execute(f"SELECT count(*) FROM {table}")
+        return cursor.fetchone()[0]
+
+
+def test_the_coming_months_have_partitions() -> None:
+    this_month = timezone.localdate().replace(day=1)
+
+    assert this_month in asrun_partitions()
+
+
+def test_a_new_partition_takes_over_its_month_from_the_default(video: Video) -> None:
+    entry = aired(video, datetime(2015, 1, 1, 18, tzinfo=OSLO))
+    assert rows_in("fk_asrun_default") == 1
+
+    assert create_asrun_partition(JANUARY)
+
+    assert rows_in("fk_asrun_default") == 0
+    assert rows_in("fk_asrun_y2015m01") == 1
+    assert AsRun.objects.get() == entry
+    assert not create_asrun_partition(JANUARY)
+
+
+def test_a_detached_month_leaves_the_log(video: Video) -> None:
+    create_asrun_partition(JANUARY)
+    aired(video, datetime(2015, 1, 1, 18, tzinfo=OSLO))
+
+    assert detach_asrun_partition(JANUARY) == "fk_asrun_y2015m01"
+
+    assert not AsRun.objects.exists()
+    assert rows_in("fk_asrun_y2015m01") == 1
+
+
+def test_a_video_that_aired_in_a_detached_month_can_be_deleted(video: Video) -> None:
+    create_asrun_partition(JANUARY)
+    aired(video, datetime(2015, 1, 1, 18, tzinfo=OSLO))
+    detach_asrun_partition(JANUARY)
+
+    video.delete()
+
+    assert not Video.objects.exists()
+    assert rows_in("fk_asrun_y2015m01") == 1
+
+
+def test_airtime_is_rolled_up_per_local_day(video: Video) -> None:
+    # 00:30 in Oslo is still the previous day in UTC; it belongs to the 2nd.
+    aired(video, datetime(2015, 1, 1, 18, tzinfo=OSLO), seconds=60)
+    aired(video, datetime(2015, 1, 1, 20, tzinfo=OSLO), seconds=30)
+    aired(video, datetime(2015, 1, 2, 0, 30, tzinfo=OSLO), seconds=45)
+    aired(video, datetime(2015, 1, 2, 18, tzinfo=OSLO), seconds=None)
+
+    roll_up_airtime([date(2015, 1, 1), date(2015, 1, 2)])
+
+    by_day = {row.day: (row.plays, row.airtime_ms) for row in VideoAirtime.objects.all()}
+    assert by_day == {date(2015, 1, 1): (2, 90_000), date(2015, 1, 2): (2, 45_000)}
+    organization = OrganizationAirtime.objects.get(day=date(2015, 1, 1))
+    assert (organization.organization_id, organization.plays) == (video.organization_id, 2)
+
+
+def test_rolling_up_again_replaces_rather_than_adds(video: Video) -> None:
+    aired(video, datetime(2015, 1, 1, 18, tzinfo=OSLO))
+    roll_up_airtime([JANUARY])
+    aired(video, datetime(2015, 1, 1, 19, tzinfo=OSLO))
+
+    roll_up_airtime([JANUARY])
+
+    assert VideoAirtime.objects.get().plays == 2
+
+
+def test_only_missing_and_recent_days_are_rolled_up_again(video: Video) -> None:
+    aired(video, datetime(2015, 1, 1, 18, tzinfo=OSLO))
+    today = date(2015, 1, 20)
+    roll_up_airtime(days_to_roll_up(today, lookback=3))
+
+    assert days_to_roll_up(today, lookback=3) == [today - timedelta(days=n) for n in (3, 2, 1)]
+
+
+def test_maintenance_detaches_past_retention_after_rolling_up(video: Video) -> None:
+    create_asrun_partition(JANUARY)
+    aired(video, datetime(2015, 1, 1, 18, tzinfo=OSLO))
+
+    output = StringIO()
+    call_command("maintain_asrun", retain_months=1, stdout=output)
+
+    assert not AsRun.objects.exists()
+    assert JANUARY not in asrun_partitions()
+    assert VideoAirtime.objects.get(day=JANUARY).plays == 1
+    assert "Detached 2015-01 as fk_asrun_y2015m01" in output.getvalue()
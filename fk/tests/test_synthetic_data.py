@@ -0,0 +1,80 @@
+"""
+The synthetic data generator, at a scale small enough for the test suite.
+
+generate_synthetic_data fills an empty database with made-up data shaped
+like production. The same seed on the same day makes the same data, and
+the schedule it makes is one the scheduler could have made.
+"""
+
+from datetime import date
+from io import StringIO
+from itertools import pairwise
+
+import pytest
+from django.core.management import CommandError, call_command
+from django.db import transaction
+
+from fk.models import AsRun, Organization, Scheduleitem, Video, WeeklySlot
+from fk.synthetic import Scale, generate
+
+pytestmark = pytest.mark.django_db
+
+SMALL = Scale(videos=300, history_days=10)
+TODAY = date(2026, 3, 18)
+
+
+class RolledBack(Exception):
+    pass
+
+
+def made_with(seed: int) -> tuple[list, list]:
+    """What `seed` makes, rolled back afterwards: the videos and the schedule."""
+    try:
+        with transaction.atomic():
+            generate(seed, SMALL, TODAY)
+            videos = list(
+                Video.objects.order_by("name", "duration").values_list("name", "duration")
+            )
+            schedule = list(
+                Scheduleitem.objects.order_by("starttime").values_list(
+                    "starttime", "video__name", "duration"
+                )
+            )
+            raise RolledBack
+    except RolledBack:
+        return videos, schedule
+
+
+def test_a_small_scale_makes_everything() -> None:
+    made = generate(1, SMALL, TODAY)
+
+    assert Video.objects.count() == SMALL.videos
+    assert Organization.objects.count() == made["organizations"] == SMALL.organizations
+    assert Organization.objects.filter(editor=None).exists()
+    assert Organization.objects.exclude(editor=None).exists()
+    assert WeeklySlot.objects.exists()
+    assert AsRun.objects.exists()
+    assert not AsRun.objects.filter(played_at__date__gte=TODAY).exists()
+
+
+def test_the_schedule_has_no_overlaps() -> None:
+    generate(1, SMALL, TODAY)
+
+    items = list(Scheduleitem.objects.order_by("starttime"))
+    assert items
+    for before, after in pairwise(items):
+        assert before.starttime + before.duration <= after.starttime
+
+
+def test_the_same_seed_makes_the_same_data() -> None:
+    first = made_with(1)
+
+    assert made_with(1) == first
+    assert made_with(2) != first
+
+
+def test_the_command_refuses_a_database_with_data_in_it() -> None:
+    generate(1, SMALL, TODAY)
+
+    with pytest.raises(CommandError):
+        call_command("generate_synthetic_data", videos=300, history_days=10, stdout=StringIO())
@@ -1,13 +1,56 @@
 from django.apps import AppConfig
 from django.contrib.auth import get_user_model
-from django.db.models.signals import post_save
+from django.db.backends.signals import connection_created
+from django.db.models.signals import m2m_changed, post_delete, post_save, pre_save
 
-from fkweb.signals import create_auth_token
+from fkweb import instrumentation, slow_queries
+from fkweb.signals import (
+    create_auth_token,
+    forget_category_counts,
+    forget_deleted_token,
+    forget_latest_bulletins,
+    forget_memberships,
+    forget_public_directory,
+    forget_user_tokens,
+    note_former_airtime,
+    note_former_organization,
+    roll_up_recategorized_videos,
+    roll_up_schedule_change,
+    roll_up_video_move,
+)
 
 
 class FrikanalenAppConfig(AppConfig):
     name = "fkweb"
 
     def ready(self):
+        from rest_framework.authtoken.models import Token
+
+        from fk.models import Organization, Scheduleitem, Video
+        from news.models import Bulletin
+
         # register signal receivers
         post_save.connect(create_auth_token, get_user_model())
+        for model in (Video, Organization, get_user_model()):
+            post_save.connect(forget_category_counts, model)
+            post_delete.connect(forget_category_counts, model)
+        m2m_changed.connect(forget_category_counts, Video.categories.through)
+        for signal in (post_save, post_delete):
+            signal.connect(forget_memberships, Organization)
+        m2m_changed.connect(forget_memberships, Organization.members.through)
+        for model in (Organization, get_user_model()):
+            post_save.connect(forget_public_directory, model)
+            post_delete.connect(forget_public_directory, model)
+        post_save.connect(forget_user_tokens, get_user_model())
+        post_delete.connect(forget_deleted_token, Token)
+        post_save.connect(forget_latest_bulletins, Bulletin)
+        post_delete.connect(forget_latest_bulletins, Bulletin)
+        pre_save.connect(note_former_airtime, Scheduleitem)
+        post_save.connect(roll_up_schedule_change, Scheduleitem)
+        post_delete.connect(roll_up_schedule_change, Scheduleitem)
+        pre_save.connect(note_former_organization, Video)
+        post_save.connect(roll_up_video_move, Video)
+        m2m_changed.connect(roll_up_recategorized_videos, Video.categories.through)
+
+        connection_created.connect(instrumentation.install_query_recorder)
+        connection_created.connect(slow_queries.install_capture)
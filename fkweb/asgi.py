@@ -0,0 +1,53 @@
+"""
+ASGI config for fkweb project.
+
+Served by gunicorn's uvicorn worker (GUNICORN_WORKER_CLASS=uvicorn, see
+gunicorn.conf.py). The public feeds that pollers hit -- XMLTV and the
+bulletin feed -- are async views and wait on the database without holding
+a thread, and the ingest long poll waits for a report the same way (see
+VideoIngestJobDetail.as_view). Everything else, DRF included, runs on
+Django's thread pool as it does under WSGI: TV-Anytime and the schedule
+listing spend their time building and serializing, not waiting, and an
+async view would only move that work back onto a thread.
+"""
+
+import asyncio
+import os
+from importlib import import_module
+
+os.environ.setdefault("DJANGO_SETTINGS_MODULE", "fkweb.settings.production")
+# A connection is per thread, and under ASGI the threads are the pool's
+# and the async ORM's, which come and go; a connection kept open would
+# outlive the request that opened it without anything closing it again.
+# Django asks for persistent connections to be off under ASGI.
+os.environ.setdefault("DATABASE_CONN_MAX_AGE", "0")
+
+from django.conf import settings
+from django.core.asgi import get_asgi_application
+
+# Requests let into Django at once, per worker process. Under WSGI the
+# threads bound how many connections a worker opens; here every request in
+# flight opens one of its own, and a burst of pollers would otherwise run
+# Postgres out of connections ("sorry, too many clients already"). Those
+# over the limit wait their turn. Idle keep-alive connections don't count,
+# so a worker still holds any number of pollers between their polls.
+CONCURRENCY = int(os.environ.get("ASGI_CONCURRENCY", "16"))
+
+
+class ConcurrencyLimit:
+    """ASGI middleware letting at most `limit` HTTP requests through at once."""
+
+    def __init__(self, app, limit: int):
+        self.app = app
+        self.semaphore = asyncio.Semaphore(limit)
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            return await self.app(scope, receive, send)
+        async with self.semaphore:
+            return await self.app(scope, receive, send)
+
+
+application = ConcurrencyLimit(get_asgi_application(), CONCURRENCY)
+# As in fkweb.wsgi: the views are imported before gunicorn forks.
+import_module(settings.ROOT_URLCONF)
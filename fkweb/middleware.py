@@ -1,15 +1,98 @@
+import copy
 import datetime
+import enum
 
+from asgiref.sync import iscoroutinefunction
 from django.conf import settings
-from django.middleware.cache import FetchFromCacheMiddleware
+from django.middleware.cache import FetchFromCacheMiddleware, UpdateCacheMiddleware
+from django.urls import Resolver404, resolve
 from django.utils import timezone
+from django.utils.cache import patch_cache_control, patch_vary_headers
+from django.utils.decorators import sync_and_async_middleware
+from rest_framework.exceptions import APIException
+from rest_framework.request import Request
+from rest_framework.settings import api_settings
 
+from api.auth.membership import request_scope
+from fkweb import instrumentation
+from fkweb.slow_queries import stage
 
+
+# Both function middlewares come in a sync and an async flavour: Django
+# adapts around one that is only sync by running everything inside it on a
+# thread, which would leave the async views nothing to be async about.
+def _where(request) -> str:
+    return f"{request.method} {request.path}"
+
+
+@sync_and_async_middleware
+def instrumentation_middleware(get_response):
+    """Time each request and count its queries, for /metrics and Server-Timing.
+
+    Outermost, so that the time is the whole request's and the page cache
+    has stored the response before the header goes on it. Also tags the
+    request's slow queries with where they came from (fkweb.slow_queries).
+
+    Puts the timing on DRF's serializers too: here, when the handler is
+    built, rather than at start-up, which would import DRF into every
+    management command.
+    """
+    instrumentation.time_serializers()
+
+    if iscoroutinefunction(get_response):
+
+        async def middleware(request):
+            with instrumentation.measuring() as stats, stage(_where(request)):
+                response = await get_response(request)
+            instrumentation.record(request, response, stats)
+            return response
+
+    else:
+
+        def middleware(request):
+            with instrumentation.measuring() as stats, stage(_where(request)):
+                response = get_response(request)
+            instrumentation.record(request, response, stats)
+            return response
+
+    return middleware
+
+
+@sync_and_async_middleware
 def api_utc_middleware(get_response):
-    def middleware(request):
-        is_api = request.path.startswith("/api/")
-        with timezone.override(datetime.UTC if is_api else None):
-            return get_response(request)
+    def timezone_for(request):
+        return datetime.UTC if request.path.startswith("/api/") else None
+
+    if iscoroutinefunction(get_response):
+
+        async def middleware(request):
+            with timezone.override(timezone_for(request)):
+                return await get_response(request)
+
+    else:
+
+        def middleware(request):
+            with timezone.override(timezone_for(request)):
+                return get_response(request)
+
+    return middleware
+
+
+@sync_and_async_middleware
+def membership_snapshot_middleware(get_response):
+    """Scope api.auth.membership's per-request memo to this request."""
+
+    if iscoroutinefunction(get_response):
+
+        async def middleware(request):
+            with request_scope():
+                return await get_response(request)
+
+    else:
+
+        def middleware(request):
+            with request_scope():
+                return get_response(request)
 
     return middleware
 
@@ -27,26 +110,171 @@ def _carries_credentials(request) -> bool:
     )
 
 
-class AnonymousOnlyFetchFromCacheMiddleware(FetchFromCacheMiddleware):
-    """FetchFromCacheMiddleware that ignores the cache for logged-in callers.
+class CacheVisibility(enum.Enum):
+    """Who a view's GET responses differ between, as far as the page cache is concerned.
+
+    Views declare it as `cache_visibility`; anything that doesn't is taken
+    to be PRIVATE, so forgetting the declaration costs a cache hit rather
+    than leaking someone's response to someone else.
+    """
+
+    # The same for every caller: the schedule, the categories.
+    PUBLIC = "public"
+    # The same for everyone but staff, because it goes through visible_to().
+    STAFF = "staff"
+    # Depends on who is asking; never shared.
+    PRIVATE = "private"
+
+
+# Where staff responses to STAFF views are kept, apart from everyone else's.
+STAFF_KEY_PREFIX = "staff."
+
+
+def _cache_visibility(request) -> CacheVisibility:
+    try:
+        match = resolve(request.path_info)
+    except Resolver404:
+        return CacheVisibility.PRIVATE
+    # DRF's as_view() hangs the view class off the function it returns.
+    view_class = getattr(match.func, "cls", None)
+    return getattr(view_class, "cache_visibility", CacheVisibility.PRIVATE)
+
+
+def _wants_browsable_api(request) -> bool:
+    # The browsable API greets the user by name, so no HTML page is shared
+    # -- and JSON and HTML would otherwise share a key, as nothing varies
+    # on Accept.
+    return "text/html" in request.META.get("HTTP_ACCEPT", "") or request.GET.get("format") == "api"
+
+
+def _caller(request):
+    """Whom DRF will take the request to be from, or None if it will refuse it.
+
+    Authenticates a copy, so that the request the view gets is untouched.
+    """
+    drf_request = Request(
+        copy.copy(request),
+        authenticators=[
+            authenticator() for authenticator in api_settings.DEFAULT_AUTHENTICATION_CLASSES
+        ],
+    )
+    try:
+        return drf_request.user
+    except APIException:
+        return None
+
+
+def _shared_key_prefix(request) -> str | None:
+    """Which shared entry a credentialed request may be answered from, if any.
+
+    Whatever is not None here is added in front of the cache key prefix:
+    "" for the entry anonymous callers get, STAFF_KEY_PREFIX for the one
+    kept for staff.
+    """
+    visibility = _cache_visibility(request)
+    if visibility is CacheVisibility.PRIVATE or _wants_browsable_api(request):
+        return None
+    user = _caller(request)
+    if user is None:
+        # A bad token: let the view say so rather than hand out a page.
+        return None
+    if visibility is CacheVisibility.STAFF and user.is_staff:
+        return STAFF_KEY_PREFIX
+    return ""
+
+
+def _without_credentials(request):
+    """A copy of the request as an anonymous caller would have made it.
+
+    The cache key folds in the headers a response varies on, Cookie among
+    them, so a credentialed request looks up -- and stores under -- the
+    key its anonymous twin would.
+    """
+    stripped = copy.copy(request)
+    stripped.META = {
+        name: value
+        for name, value in request.META.items()
+        if name not in ("HTTP_AUTHORIZATION", "HTTP_COOKIE")
+    }
+    stripped.COOKIES = {}
+    # A cached_property over META, and copied along with it if already read.
+    stripped.__dict__.pop("headers", None)
+    return stripped
+
+
+class SharedFetchFromCacheMiddleware(FetchFromCacheMiddleware):
+    """FetchFromCacheMiddleware that looks past the caller's credentials where it may.
 
     The site-wide page cache keys on the URL plus the response's Vary
     headers, and nothing in either identifies the caller: a token lives in
     the Authorization header, which no response here varies on. Responses
-    are user-dependent all the same -- VideoList filters through
-    `Video.objects.visible_to(request.user)` -- so a shared entry would
-    hand one user another's view of the catalogue, including videos that
-    are meant to stay staff-only.
-
-    Rather than teach every response to vary on its credentials, keep the
-    cache for the anonymous public traffic it was meant for and let
-    authenticated requests through untouched. Clearing the flag here also
-    stops UpdateCacheMiddleware from *storing* the response, because that
-    is what it keys its own decision off.
+    can be user-dependent all the same -- VideoList filters through
+    `Video.objects.visible_to(request.user)` -- so an entry shared
+    carelessly would hand one user another's view of the catalogue,
+    including videos that are meant to stay staff-only.
+
+    So a credentialed request is answered from the cache according to the
+    view's CacheVisibility. PUBLIC views, and STAFF views asked by anyone
+    but staff, share the entry anonymous callers get; staff asking a STAFF
+    view get an entry of their own; PRIVATE views are never served from
+    the cache nor stored in it. SharedUpdateCacheMiddleware stores under
+    the same key the lookup here used.
     """
 
+    def __init__(self, get_response):
+        super().__init__(get_response)
+        self._for_staff = FetchFromCacheMiddleware(get_response)
+        self._for_staff.key_prefix = STAFF_KEY_PREFIX + self.key_prefix
+
     def process_request(self, request):
-        if _carries_credentials(request):
-            request._cache_update_cache = False
+        response = self._fetch(request)
+        if response is not None:
+            instrumentation.note_page_cache("hit")
+        elif request._cache_update_cache:
+            instrumentation.note_page_cache("miss")
+        return response
+
+    def _fetch(self, request):
+        if not _carries_credentials(request):
+            return super().process_request(request)
+        # Unless a shared entry is found to apply, neither serve nor store.
+        request._cache_update_cache = False
+        if request.method not in ("GET", "HEAD"):
             return None
-        return super().process_request(request)
+        prefix = _shared_key_prefix(request)
+        if prefix is None:
+            return None
+        request._shared_cache_prefix = prefix
+        stripped = _without_credentials(request)
+        fetch = self._for_staff if prefix == STAFF_KEY_PREFIX else super()
+        response = fetch.process_request(stripped)
+        request._cache_update_cache = stripped._cache_update_cache
+        return response
+
+
+class SharedUpdateCacheMiddleware(UpdateCacheMiddleware):
+    """The storing half of SharedFetchFromCacheMiddleware."""
+
+    def __init__(self, get_response):
+        super().__init__(get_response)
+        self._for_staff = UpdateCacheMiddleware(get_response)
+        self._for_staff.key_prefix = STAFF_KEY_PREFIX + self.key_prefix
+
+    def process_response(self, request, response):
+        prefix = getattr(request, "_shared_cache_prefix", None)
+        if prefix is None:
+            return super().process_response(request, response)
+        if not response.cookies:
+            # A cookie set for this caller (a rotated session, a CSRF
+            # token) is theirs alone; such a response is not stored.
+            stripped = _without_credentials(request)
+            stripped._cache_update_cache = request._cache_update_cache
+            update = self._for_staff if prefix == STAFF_KEY_PREFIX else super()
+            response = update.process_response(stripped, response)
+        if prefix == STAFF_KEY_PREFIX:
+            # Applied on the way out rather than stored: Django refuses to
+            # cache a private response at all. Keeps shared proxies from
+            # replaying the staff view to anyone else.
+            patch_cache_control(response, private=True)
+            patch_vary_headers(response, ("Authorization",))
+        return response
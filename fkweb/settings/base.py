@@ -211,7 +211,10 @@ TEMPLATES = [
 ########## MIDDLEWARE CONFIGURATION
 # See: https://docs.djangoproject.com/en/dev/ref/settings/#middleware-classes
 MIDDLEWARE = (
-    "django.middleware.cache.UpdateCacheMiddleware",
+    # Outside the cache, so that what it times and counts includes the
+    # cache's answers, and its header is not stored along with them.
+    "fkweb.middleware.instrumentation_middleware",
+    "fkweb.middleware.SharedUpdateCacheMiddleware",
     "corsheaders.middleware.CorsMiddleware",
     # Default Django middleware.
     "django.middleware.common.CommonMiddleware",
@@ -221,12 +224,13 @@ MIDDLEWARE = (
     "django.contrib.messages.middleware.MessageMiddleware",
     "django.middleware.clickjacking.XFrameOptionsMiddleware",
     # "djangorestframework_camel_case.middleware.CamelCaseMiddleWare",
-    "fkweb.middleware.AnonymousOnlyFetchFromCacheMiddleware",
+    "fkweb.middleware.SharedFetchFromCacheMiddleware",
     # Must stay *inside* both cache middlewares. Django's cache key includes
     # the active timezone, so with this in between them the pair wrote keys
     # under TIME_ZONE and read them back under UTC, and no /api/ response was
     # ever served from the cache.
     "fkweb.middleware.api_utc_middleware",
+    "fkweb.middleware.membership_snapshot_middleware",
 )
 ########## END MIDDLEWARE CONFIGURATION
 
@@ -328,6 +332,7 @@ LOGGING = {
 ########## WSGI CONFIGURATION
 # See: https://docs.djangoproject.com/en/dev/ref/settings/#wsgi-application
 WSGI_APPLICATION = f"{SITE_NAME}.wsgi.application"
+ASGI_APPLICATION = f"{SITE_NAME}.asgi.application"
 ########## END WSGI CONFIGURATION
 
 ########## REST FRAMEWORK CONFIGURATION
@@ -338,7 +343,7 @@ REST_FRAMEWORK = {
     ),
     "DEFAULT_PARSER_CLASSES": ("djangorestframework_camel_case.parser.CamelCaseJSONParser",),
     "DEFAULT_AUTHENTICATION_CLASSES": (
-        "rest_framework.authentication.TokenAuthentication",
+        "api.auth.authentication.CachingTokenAuthentication",
         "rest_framework.authentication.SessionAuthentication",
     ),
     "DEFAULT_PERMISSION_CLASSES": ("rest_framework.permissions.IsAuthenticatedOrReadOnly",),
@@ -403,6 +408,11 @@ SPECTACULAR_SETTINGS = {
     },
 }
 
+# Where `manage.py openapi_schema` writes the schema, and /api/schema/
+# serves it from unless DEBUG is on (see api.schema). start.sh writes it.
+# Empty, each process generates the schema once for itself.
+OPENAPI_SCHEMA_FILE = env.str("OPENAPI_SCHEMA_FILE", default=join(SITE_ROOT, "openapi.json"))
+
 # Everything with the API should be okay, since we don't share
 # the login cookie it's all safe.
 CORS_ALLOW_ALL_ORIGINS = True
@@ -413,6 +423,21 @@ DEFAULT_FROM_EMAIL = "Frikanalen <noreply@frikanalen.no>"
 SECRET_KEY = env.str("SECRET_KEY")
 ALLOWED_HOSTS = env.str("ALLOWED_HOSTS").split(",")
 DATABASES = {"default": env.db()}
+# Keep a worker's connection open between requests instead of paying for a
+# new one -- TCP, TLS and authentication -- on every request. Connections
+# are per thread, so the database sees one for every gunicorn worker thread
+# (see gunicorn.conf.py), which is what sizes max_connections. Health
+# checks ping a connection that has sat idle before reusing it, so a
+# database restart costs one failed ping, not one failed request per
+# worker. DATABASE_CONN_MAX_AGE=0 goes back to a connection per request,
+# which is what fkweb.asgi defaults to. (Django's own connection pool would
+# need psycopg 3; we run on psycopg2.)
+DATABASES["default"]["CONN_MAX_AGE"] = env.int("DATABASE_CONN_MAX_AGE", default=60)
+DATABASES["default"]["CONN_HEALTH_CHECKS"] = env.bool("DATABASE_CONN_HEALTH_CHECKS", default=True)
+# A read replica, for nothing but EXPLAIN ANALYZE of slow queries (see
+# SLOW_QUERY_MS below); nothing is routed to it.
+if env.str("DATABASE_REPLICA_URL", default=""):
+    DATABASES["replica"] = env.db("DATABASE_REPLICA_URL")
 CSRF_TRUSTED_ORIGINS = env.str("CSRF_TRUSTED_ORIGINS").split(",")
 try:
     cache_from_env_or_memory = env.cache()
@@ -421,10 +446,69 @@ except ImproperlyConfigured:
     cache_from_env_or_memory = {"BACKEND": "django.core.cache.backends.locmem.LocMemCache"}
 
 CACHES = {"default": cache_from_env_or_memory}
+# Whether every process sees the same cache, so that one deleting an entry
+# deletes it for all of them. The local-memory fallback is per process.
+cache_is_shared = not CACHES["default"]["BACKEND"].endswith(".LocMemCache")
 
-# How stale an anonymous page may get. This is Django's own default, but it
+# How stale a cached page may get. This is Django's own default, but it
 # only started to mean anything once the page cache actually began serving
-# responses, so state it here where the cost is visible: a video published
-# now can take this long to appear for logged-out visitors. Authenticated
-# callers bypass the cache entirely and always see current data.
+# responses, so state it here where the cost is visible. Who shares which
+# entry follows the view's cache_visibility (see fkweb.middleware):
+# - PUBLIC views: every caller, logged in or not, shares one entry, so a
+#   video published now can take this long to appear for anyone.
+# - STAFF views: members and other non-staff callers share the anonymous
+#   entry, staff share one of their own; either may be this stale,
+#   including a video staff just hid or unhid.
+# - PRIVATE views, the default: never cached, always current.
 CACHE_MIDDLEWARE_SECONDS = 600
+
+# How long a long-polling read of an ingest job is held before answering
+# with the unchanged state. Proxies in front of us tend to give up on
+# silent responses at 30 seconds or so, so stay well under that.
+INGEST_REPORT_WAIT_SECONDS = 25
+
+# How many long-polling reads one process holds at once; any more are
+# answered at once. Under gthread each held read occupies a thread, so
+# keep this under GUNICORN_THREADS to leave the rest for other requests.
+# They share the process's one listening connection (IngestReportListener).
+INGEST_REPORT_MAX_WAITERS = env.int("INGEST_REPORT_MAX_WAITERS", default=2)
+
+# How many months of the as-run log maintain_asrun keeps attached; older
+# months are detached once rolled up, and the airtime statistics go on
+# from the rollups. None keeps everything.
+ASRUN_RETENTION_MONTHS = None
+
+# Days maintain_asrun rolls up again each run, for entries that playout
+# logs after the fact.
+ASRUN_ROLLUP_LOOKBACK_DAYS = 7
+
+# How long an ingest worker may go without reporting progress before the
+# job it claimed is handed to another. Every report renews it, so this
+# bounds the quietest stretch of a healthy ingest -- archiving a large
+# original says nothing until it is done -- not the length of the job.
+INGEST_LEASE_SECONDS = 600
+
+# How long a user's organization memberships may be kept in the cache
+# between requests; 0 loads them afresh for every request. Only worth
+# turning on with a cache shared by every process -- see
+# api.auth.membership for why the local-memory fallback is unsafe.
+MEMBERSHIP_CACHE_SECONDS = 0
+
+# How long the owner of an API token is remembered between requests; see
+# api.auth.authentication. Every invalidation it relies on is a delete
+# from the shared cache, so with the local-memory fallback a deleted token
+# or a deactivated user would go on working through the other workers
+# until this runs out; there it is off, as MEMBERSHIP_CACHE_SECONDS is.
+TOKEN_AUTH_CACHE_SECONDS = 60 if cache_is_shared else 0
+
+# Queries taking longer than this many milliseconds are kept, with where
+# they came from and their plan, for the admin's Slow queries page; see
+# fkweb.slow_queries. 0 leaves every connection as it is.
+SLOW_QUERY_MS = env.int("SLOW_QUERY_MS", default=0)
+# How many of them are kept, newest first.
+SLOW_QUERY_BUFFER = 100
+# How often each worker runs EXPLAIN ANALYZE for the same statement.
+SLOW_QUERY_EXPLAIN_INTERVAL = 300
+# The database to run EXPLAIN ANALYZE on; "" for the connection the query
+# was slow on, in a savepoint.
+SLOW_QUERY_EXPLAIN_USING = "replica" if "replica" in DATABASES else ""
@@ -0,0 +1,14 @@
+"""Production settings for the CronJobs' management commands.
+
+The same as production without the apps only the web side uses: the
+admin, whose autodiscovery imports every admin module and form, the
+OpenAPI schema, CORS and the API's filters. The commands run with
+it skip the system checks, which would import the URLconf, and with it
+the admin these settings leave out.
+"""
+
+from .production import *
+
+WEB_ONLY_APPS = ("django.contrib.admin", "drf_spectacular", "corsheaders", "django_filters")
+
+INSTALLED_APPS = tuple(app for app in INSTALLED_APPS if app not in WEB_ONLY_APPS)
@@ -14,3 +14,8 @@ from .local import *
 # request.user share a single cache key. DummyCache keeps the middleware
 # in the request path but never stores anything.
 CACHES = {"default": {"BACKEND": "django.core.cache.backends.dummy.DummyCache"}}
+
+########## OPENAPI SCHEMA
+# Generated by the process under test, so that a schema file left behind
+# by a `manage.py openapi_schema` run is never what the tests look at.
+OPENAPI_SCHEMA_FILE = ""
@@ -4,3 +4,121 @@ def create_auth_token(sender=None, instance=None, created=False, **_kwargs):
     """Create a new token for every new user, this is needed for auth to the API"""
     if created:
         Token.objects.create(user=instance)
+
+
+def _is_a_login(update_fields) -> bool:
+    # A login saves the user for last_login alone, which nothing cached
+    # from a user depends on.
+    return update_fields is not None and set(update_fields) == {"last_login"}
+
+
+def forget_category_counts(sender=None, update_fields=None, **_kwargs):
+    """Whatever decides a video's publicness changed: the video itself,
+    its categories, its organization, or that organization's editor."""
+    from fk.models import Category
+
+    if _is_a_login(update_fields):
+        return
+    Category.forget_public_video_counts()
+
+
+def forget_public_directory(sender=None, update_fields=None, **_kwargs):
+    """An organization, or a user who may be the editor listed for one."""
+    from api.organization.views import forget_public_directory
+
+    if _is_a_login(update_fields):
+        return
+    forget_public_directory()
+
+
+def forget_latest_bulletins(sender=None, **_kwargs):
+    from news.views import forget_latest_bulletins
+
+    forget_latest_bulletins()
+
+
+def forget_memberships(sender=None, update_fields=None, **_kwargs):
+    """Someone joined or left an organization, or it changed editor."""
+    from api.auth.membership import forget_memberships
+
+    if update_fields is not None and "editor" not in update_fields:
+        return
+    forget_memberships()
+
+
+def forget_user_tokens(sender=None, instance=None, update_fields=None, **_kwargs):
+    """Deactivated, anonymized or otherwise changed: re-read on next use."""
+    from api.auth.authentication import forget_tokens_of
+
+    if _is_a_login(update_fields):
+        return
+    forget_tokens_of(instance)
+
+
+def forget_deleted_token(sender=None, instance=None, **_kwargs):
+    from api.auth.authentication import forget_tokens
+
+    forget_tokens(instance.key)
+
+
+def note_former_airtime(sender=None, instance=None, **_kwargs):
+    """Remember where an item aired before this save, for a move.
+
+    The airtime an instance was loaded with is the stored one until the
+    save re-reads it; a new item has none.
+    """
+    airtime = None if instance._state.adding else instance.airtime
+    instance._former_start = airtime.lower if airtime else None
+
+
+def roll_up_schedule_change(sender=None, instance=None, **_kwargs):
+    """An item was placed, moved, changed or removed: its days are stale."""
+    from fk.models.airtime import schedule_changed
+
+    former = getattr(instance, "_former_start", None)
+    schedule_changed(instance.starttime, *([former] if former else []))
+
+
+def note_former_organization(sender=None, instance=None, update_fields=None, **_kwargs):
+    """Remember whose a video was before this save, for a move.
+
+    Unlike an item's airtime, the organization the instance carries may
+    already be the new one, so the stored one is read.
+    """
+    if instance._state.adding or (
+        update_fields is not None and "organization" not in update_fields
+    ):
+        instance._former_organization_id = instance.organization_id
+        return
+    instance._former_organization_id = (
+        sender.objects.filter(pk=instance.pk).values_list("organization_id", flat=True).first()
+    )
+
+
+def roll_up_video_move(sender=None, instance=None, **_kwargs):
+    """A video changed organization: the days it is scheduled on are stale."""
+    from fk.models.airtime import videos_changed
+
+    former = getattr(instance, "_former_organization_id", instance.organization_id)
+    if former != instance.organization_id:
+        videos_changed([instance.pk])
+
+
+def roll_up_recategorized_videos(
+    sender=None, instance=None, action=None, reverse=False, pk_set=None, **_kwargs
+):
+    """Videos gained or lost categories: the days they are scheduled on are stale.
+
+    From the category's side the videos are in `pk_set`, except when it is
+    cleared, when they are looked up before they go.
+    """
+    from fk.models.airtime import videos_changed
+
+    if action in ("post_add", "post_remove"):
+        videos_changed(pk_set if reverse else [instance.pk])
+    elif action == "pre_clear":
+        videos_changed(
+            sender.objects.filter(category=instance).values_list("video_id", flat=True)
+            if reverse
+            else [instance.pk]
+        )
@@ -0,0 +1,178 @@
+"""Queries slower than SLOW_QUERY_MS, where they came from, and how Postgres ran them.
+
+Off unless SLOW_QUERY_MS is set. Then every database connection gets an
+execute wrapper that times each query, and one over the threshold is
+kept, with:
+
+* where it was run from: the request ("GET /api/scheduleitems/"), the
+  management command, and any stage inside them tagged with stage() --
+  the schedule draft's fill_next_weeks_agenda and fill_agenda_with_jukebox,
+  the feed builders;
+* for a plain SELECT, its plan as `EXPLAIN (ANALYZE, BUFFERS)` found it,
+  which runs the query once more: on SLOW_QUERY_EXPLAIN_USING if that
+  names a replica, or else where it ran, in a savepoint so that a failing
+  EXPLAIN leaves the transaction as it was. INSERT, UPDATE, DELETE and
+  WITH get a plain EXPLAIN, as running them again would do them twice,
+  and anything else -- savepoints, SET, DDL -- can't be explained and is
+  kept without a plan. A worker takes one
+  plan per statement per SLOW_QUERY_EXPLAIN_INTERVAL, so a slow query
+  in a loop doesn't run twice each time round.
+
+The newest SLOW_QUERY_BUFFER of them, as many as fit in LONGEST_BUFFER,
+are kept in the cache, shared by every worker, and listed on the admin's Slow queries page. Parameters are
+not kept; the plans show what the filters compared against.
+"""
+
+import re
+import threading
+import time
+from collections.abc import Iterator
+from contextlib import contextmanager
+from contextvars import ContextVar
+from dataclasses import asdict, dataclass
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import DatabaseError, connections, transaction
+from django.utils import timezone
+
+BUFFER_KEY = "fkweb.slow_queries"
+
+# Enough of a statement or a plan to recognise it by.
+LONGEST_SQL = 4_000
+LONGEST_PLAN = 8_000
+# What the buffer may take up, in bytes of text, leaving room under
+# memcached's 1 MB item size for the pickling. A set over it fails, and
+# Django's memcached backends then delete the key: the buffer would empty
+# itself just as it filled up.
+LONGEST_BUFFER = 800_000
+
+# What EXPLAIN takes; SELECT is the only one it is safe to run again.
+EXPLAINABLE = {"SELECT", "INSERT", "UPDATE", "DELETE", "WITH"}
+FIRST_KEYWORD = re.compile(r"\s*(\w+)")
+
+_where: ContextVar[tuple[str, ...]] = ContextVar("slow_query_where", default=())
+# Set while a slow query is being explained or stored, whose own queries
+# are not to be timed.
+_capturing: ContextVar[bool] = ContextVar("slow_query_capturing", default=False)
+
+# statement -> when this worker last explained it.
+_explained: dict[str, float] = {}
+_explained_lock = threading.Lock()
+
+
+@dataclass(frozen=True)
+class SlowQuery:
+    at: str
+    milliseconds: float
+    where: str
+    sql: str
+    plan: str
+
+
+@contextmanager
+def stage(name: str) -> Iterator[None]:
+    """Tag the queries run inside as coming from `name`, within any enclosing stage.
+
+    Also a decorator, for a sync function; a coroutine opens it inside.
+    """
+    token = _where.set((*_where.get(), name))
+    try:
+        yield
+    finally:
+        _where.reset(token)
+
+
+def install_capture(sender, connection, **kwargs) -> None:
+    """connection_created receiver putting the slow-query wrapper on a new connection.
+
+    Reads SLOW_QUERY_MS then, so with it unset nothing is installed and
+    nothing is paid.
+    """
+    if settings.SLOW_QUERY_MS and capture not in connection.execute_wrappers:
+        connection.execute_wrappers.append(capture)
+
+
+def capture(execute, sql, params, many, context):
+    """A database execute wrapper keeping queries slower than SLOW_QUERY_MS."""
+    if _capturing.get():
+        return execute(sql, params, many, context)
+    started = time.perf_counter()
+    result = execute(sql, params, many, context)
+    elapsed = time.perf_counter() - started
+    if elapsed * 1000 >= settings.SLOW_QUERY_MS and not many:
+        token = _capturing.set(True)
+        try:
+            _keep(context["connection"], sql, params, elapsed)
+        finally:
+            _capturing.reset(token)
+    return result
+
+
+def _keep(connection, sql: str, params, elapsed: float) -> None:
+    explainable = _first_keyword(sql) in EXPLAINABLE
+    plan = _plan(connection, sql, params) if explainable and _due_for_explain(sql) else ""
+    entry = SlowQuery(
+        at=timezone.now().isoformat(timespec="seconds"),
+        milliseconds=round(elapsed * 1000, 1),
+        where=" > ".join(_where.get()) or "unknown",
+        sql=sql[:LONGEST_SQL],
+        plan=plan[:LONGEST_PLAN],
+    )
+    # Read, add, write back: two workers at once can lose one of their
+    # entries, which for a sample of slow queries is no loss.
+    kept = cache.get(BUFFER_KEY, [])
+    cache.set(BUFFER_KEY, _fitting([asdict(entry), *kept]), None)
+
+
+def _fitting(entries: list[dict]) -> list[dict]:
+    """The newest of `entries` that fit in the buffer."""
+    size = 0
+    for count, entry in enumerate(entries[: settings.SLOW_QUERY_BUFFER]):
+        size += sum(len(str(value).encode()) for value in entry.values())
+        if size > LONGEST_BUFFER:
+            return entries[:count]
+    return entries[: settings.SLOW_QUERY_BUFFER]
+
+
+def _first_keyword(sql: str) -> str:
+    match = FIRST_KEYWORD.match(sql)
+    return match[1].upper() if match else ""
+
+
+def _due_for_explain(sql: str) -> bool:
+    now = time.monotonic()
+    with _explained_lock:
+        last = _explained.get(sql)
+        if last is not None and now - last < settings.SLOW_QUERY_EXPLAIN_INTERVAL:
+            return False
+        _explained[sql] = now
+        if len(_explained) > 10 * settings.SLOW_QUERY_BUFFER:
+            # Forget the statements explained longest ago.
+            for stale in sorted(_explained, key=_explained.__getitem__)[: len(_explained) // 2]:
+                del _explained[stale]
+    return True
+
+
+def _plan(connection, sql: str, params) -> str:
+    analyze = _first_keyword(sql) == "SELECT"
+    explain = "EXPLAIN (ANALYZE, BUFFERS) " if analyze else "EXPLAIN "
+    if analyze and settings.SLOW_QUERY_EXPLAIN_USING:
+        connection = connections[settings.SLOW_QUERY_EXPLAIN_USING]
+    if connection.needs_rollback:
+        return "(not explained: the transaction it ran in had already failed)"
+    try:
+        with transaction.atomic(using=connection.alias), connection.cursor() as cursor:
+            cursor.execute(explain + sql, params)
+            return "\n".join(row[0] for row in cursor.fetchall())
+    except DatabaseError as error:
+        return f"(EXPLAIN failed: {error})"
+
+
+def slow_queries() -> list[SlowQuery]:
+    """The queries kept, newest first."""
+    return [SlowQuery(**entry) for entry in cache.get(BUFFER_KEY, [])]
+
+
+def forget_slow_queries() -> None:
+    cache.delete(BUFFER_KEY)
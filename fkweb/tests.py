@@ -1,7 +1,24 @@
+import logging
+import os
+import re
+import subprocess
+import sys
+from pathlib import Path
+
 import pytest
+from asgiref.sync import async_to_sync
 from django.conf import settings
-from django.test import Client, override_settings
-from django.urls import Resolver404, resolve
+from django.core.cache import cache
+from django.core.handlers.asgi import ASGIHandler
+from django.db import connection, transaction
+from django.test import AsyncClient, Client, override_settings
+from django.urls import Resolver404, resolve, reverse
+from prometheus_client import REGISTRY
+
+from agenda.scheduling.weekly_slots import fill_next_weeks_agenda
+from fk.models import User
+from fkweb import instrumentation, slow_queries
+from news.models import Bulletin
 
 
 @pytest.mark.parametrize(
@@ -56,3 +73,249 @@ def test_csrf_endpoint_mints_a_token_and_sets_the_cookie() -> None:
     assert response.status_code == 200
     assert response.json()["csrfToken"]
     assert "csrftoken" in response.cookies
+
+
+@override_settings(DEBUG=True)
+def test_the_middleware_stack_runs_async_under_asgi(caplog: pytest.LogCaptureFixture) -> None:
+    # One sync-only middleware would put every request back on a thread.
+    # Django only says so with DEBUG on.
+    with caplog.at_level(logging.DEBUG, logger="django.request"):
+        ASGIHandler()
+
+    assert [record.getMessage() for record in caplog.records if "adapted" in record.msg] == []
+
+
+@pytest.mark.django_db
+@pytest.mark.parametrize(
+    ("path", "content_type"),
+    [
+        ("/xmltv/upcoming/", "application/xml"),
+        ("/api/news/feed.atom", "application/atom+xml; charset=utf-8"),
+    ],
+)
+def test_the_async_feeds_are_served_asynchronously(path: str, content_type: str) -> None:
+    response = async_to_sync(AsyncClient().get)(path)
+
+    assert response.status_code == 200
+    assert response["Content-Type"] == content_type
+
+
+def counted(name: str, **labels: str) -> float:
+    return REGISTRY.get_sample_value(name, labels) or 0
+
+
+@pytest.mark.django_db
+def test_requests_are_timed_and_their_queries_counted() -> None:
+    Bulletin.objects.create(heading="Timed", text="", is_published=True)
+    route = "news:bulletin-list"
+    before = counted("fkweb_db_queries_total", route=route)
+
+    response = Client().get(reverse(route))
+
+    timing = response["Server-Timing"]
+    db = re.search(r'db;dur=[\d.]+;desc="(\d+) queries"', timing)
+    assert db is not None, timing
+    queries = int(db.group(1))
+    assert queries > 0
+    assert "serializer;dur=" in timing
+    assert "cache;desc=miss" in timing
+    assert counted("fkweb_db_queries_total", route=route) - before == queries
+    assert counted("fkweb_requests_total", route=route, method="GET", status="200") > 0
+
+
+@pytest.mark.django_db
+def test_page_cache_answers_are_counted_as_hits(settings) -> None:
+    settings.CACHES = {
+        "default": {
+            "BACKEND": "django.core.cache.backends.locmem.LocMemCache",
+            "LOCATION": "instrumentation-tests",
+        }
+    }
+    cache.clear()
+    route = "api-scheduling-policy"
+    before = counted("fkweb_page_cache_total", route=route, result="hit")
+
+    Client().get(reverse(route), {"instrumented": 1})
+    response = Client().get(reverse(route), {"instrumented": 1})
+
+    cache.clear()
+    assert "cache;desc=hit" in response["Server-Timing"]
+    assert 'desc="0 queries"' in response["Server-Timing"]
+    assert counted("fkweb_page_cache_total", route=route, result="hit") - before == 1
+
+
+def test_metrics_are_exposed_for_prometheus() -> None:
+    Client().get("/xmltv/")
+
+    response = Client().get("/metrics")
+
+    assert response.status_code == 200
+    assert response["Content-Type"].startswith("text/plain")
+    assert 'fkweb_requests_total{method="GET",route="xmltv-home",status="200"}' in (
+        response.content.decode()
+    )
+    # Never from the page cache: it would hold the counts still.
+    assert "no-cache" in response["Cache-Control"]
+
+
+def test_queries_outside_a_request_are_not_recorded() -> None:
+    assert instrumentation.record_query(lambda *args: "ran", "SELECT 1", None, False, {}) == "ran"
+
+
+@pytest.fixture
+def every_query_is_slow(settings, monkeypatch: pytest.MonkeyPatch):
+    """Keep every query, in a real cache, through the wrapper on the test's connection."""
+    settings.CACHES = {
+        "default": {
+            "BACKEND": "django.core.cache.backends.locmem.LocMemCache",
+            "LOCATION": "slow-query-tests",
+        }
+    }
+    settings.SLOW_QUERY_MS = 0
+    monkeypatch.setattr(slow_queries, "_explained", {})
+    cache.clear()
+    with connection.execute_wrapper(slow_queries.capture):
+        yield
+    cache.clear()
+
+
+@pytest.mark.django_db
+@pytest.mark.usefixtures("every_query_is_slow")
+def test_slow_queries_are_kept_with_the_request_and_their_plan() -> None:
+    Bulletin.objects.create(heading="Slow", text="", is_published=True)
+    slow_queries.forget_slow_queries()
+
+    Client().get(reverse("news:bulletin-list"), {"slow": 1})
+
+    kept = slow_queries.slow_queries()
+    assert kept
+    assert {query.where for query in kept} == {"GET /api/news/bulletins/"}
+    selects = [query for query in kept if "news_bulletin" in query.sql]
+    assert "actual time=" in selects[0].plan
+
+
+@pytest.mark.django_db
+@pytest.mark.usefixtures("every_query_is_slow")
+def test_a_write_is_explained_without_being_run_again() -> None:
+    Bulletin.objects.create(heading="Once", text="", is_published=True)
+
+    (insert,) = slow_queries.slow_queries()
+    assert insert.sql.startswith("INSERT")
+    assert insert.plan.startswith("Insert on news_bulletin")
+    assert "actual time=" not in insert.plan
+    assert Bulletin.objects.filter(heading="Once").count() == 1
+
+
+@pytest.mark.django_db
+@pytest.mark.usefixtures("every_query_is_slow")
+def test_what_cannot_be_explained_is_kept_without_a_plan() -> None:
+    with transaction.atomic():
+        list(Bulletin.objects.all())
+
+    release, select, savepoint = slow_queries.slow_queries()
+    assert savepoint.sql.startswith("SAVEPOINT")
+    assert release.sql.startswith("RELEASE SAVEPOINT")
+    assert savepoint.plan == release.plan == ""
+    assert "news_bulletin" in select.plan
+
+
+@pytest.mark.django_db
+@pytest.mark.usefixtures("every_query_is_slow")
+def test_the_buffer_keeps_as_many_as_fit(monkeypatch: pytest.MonkeyPatch) -> None:
+    monkeypatch.setattr(slow_queries, "LONGEST_BUFFER", 1_000)
+    for heading in range(20):
+        list(Bulletin.objects.filter(heading=str(heading)))
+
+    kept = slow_queries.slow_queries()
+    assert 0 < len(kept) < 20
+    assert sum(len(query.sql) + len(query.plan) for query in kept) <= 1_000
+
+
+@pytest.mark.django_db
+@pytest.mark.usefixtures("every_query_is_slow")
+def test_a_statement_is_explained_once_in_a_while() -> None:
+    list(Bulletin.objects.all())
+    list(Bulletin.objects.all())
+
+    again, first = slow_queries.slow_queries()
+    assert first.plan
+    assert again.plan == ""
+
+
+@pytest.mark.django_db
+@pytest.mark.usefixtures("every_query_is_slow")
+def test_scheduler_stages_are_tagged() -> None:
+    with slow_queries.stage("manage.py fill_agenda"):
+        fill_next_weeks_agenda()
+
+    assert [query.where for query in slow_queries.slow_queries()] == [
+        "manage.py fill_agenda > fill_next_weeks_agenda"
+    ]
+
+
+@pytest.mark.django_db
+@pytest.mark.usefixtures("every_query_is_slow")
+def test_the_slow_queries_are_listed_in_the_admin() -> None:
+    list(Bulletin.objects.filter(heading="Listed"))
+    url = reverse("admin-slow-queries")
+    assert Client().get(url).status_code == 302
+
+    client = Client()
+    client.force_login(User.objects.create(email="dba@example.test", is_superuser=True))
+    response = client.get(url)
+
+    assert response.status_code == 200
+    assert "news_bulletin" in response.content.decode()
+    client.post(url)
+    assert slow_queries.slow_queries() == []
+
+
+PROJECT_ROOT = Path(__file__).resolve().parents[1]
+
+# A CronJob's command, as far as manage.py takes it before handle().
+COMMAND_START = """
+import django
+django.setup()
+from django.core.management import load_command_class
+command = load_command_class("agenda", "draft_broadcast_schedule")
+if command.requires_system_checks:
+    command.check()
+"""
+
+
+def imported_by(code: str, settings_module: str) -> list[str]:
+    """The modules a fresh interpreter imports running `code`, by -X importtime."""
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", code],
+        cwd=PROJECT_ROOT,
+        env=dict(os.environ, DJANGO_SETTINGS_MODULE=settings_module),
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    return re.findall(r"^import time:\s+\d+ \|\s+\d+ \| +(\S+)$", result.stderr, re.MULTILINE)
+
+
+def test_the_cronjobs_start_without_the_web_stack() -> None:
+    modules = imported_by(COMMAND_START, "fkweb.settings.batch")
+
+    for web_only in (
+        "api.urls",
+        "rest_framework.serializers",
+        "drf_spectacular",
+        "django.contrib.admin.sites",
+        "markdown",
+    ):
+        assert web_only not in modules
+    # Some 700 modules: Django, the models and the scheduler. The URLconf
+    # brings in another 300, which is what this is here to notice.
+    assert len(modules) < 800
+
+
+def test_the_wsgi_application_is_ready_before_the_workers_fork() -> None:
+    # Set up, with the URLconf and the views, but not yet connected.
+    code = "import fkweb.wsgi; from django.db import connection; assert not connection.connection"
+    modules = imported_by(code, "fkweb.settings.production")
+
+    assert "api.urls" in modules
+    assert "agenda.tvanytime.views" in modules
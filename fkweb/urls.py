@@ -9,11 +9,14 @@ from django.urls import re_path as url
 
 import agenda.urls
 import api.urls
+from fkweb import views
 
 admin.autodiscover()
 
 urlpatterns: list[URLPattern | URLResolver] = [
+    url(r"^admin/slow-queries/$", views.slow_queries_view, name="admin-slow-queries"),
     url(r"^admin/", admin.site.urls),
+    url(r"^metrics$", views.metrics, name="metrics"),
 ]
 
 urlpatterns += agenda.urls.urlpatterns
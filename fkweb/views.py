@@ -1,9 +1,16 @@
+from django.conf import settings
+from django.contrib import admin
+from django.http import HttpResponse
 from django.middleware.csrf import get_token
+from django.template.response import TemplateResponse
+from django.views.decorators.cache import never_cache
 from rest_framework import serializers
 from rest_framework.generics import RetrieveAPIView
 from rest_framework.permissions import AllowAny
 from rest_framework.response import Response
 
+from fkweb import instrumentation, slow_queries
+
 
 class CsrfSerializer(serializers.Serializer):
     csrfToken = serializers.CharField()
@@ -18,3 +25,31 @@ class CsrfView(RetrieveAPIView):
         # This ensures the csrftoken cookie is set on the response
         serializer = self.get_serializer({"csrfToken": get_token(request)})
         return Response(serializer.data)
+
+
+@never_cache
+def metrics(request):
+    """Per-route request metrics, in Prometheus' text format; see fkweb.instrumentation.
+
+    Not routed by the ingress: it is for Prometheus, scraping the pods
+    from inside the cluster.
+    """
+    body, content_type = instrumentation.exposition()
+    return HttpResponse(body, content_type=content_type)
+
+
+@admin.site.admin_view
+def slow_queries_view(request):
+    """The slow queries kept, and a button to forget them; see fkweb.slow_queries."""
+    if request.method == "POST":
+        slow_queries.forget_slow_queries()
+    return TemplateResponse(
+        request,
+        "admin/slow_queries.html",
+        {
+            **admin.site.each_context(request),
+            "title": "Slow queries",
+            "threshold": settings.SLOW_QUERY_MS,
+            "queries": slow_queries.slow_queries(),
+        },
+    )
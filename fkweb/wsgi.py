@@ -15,10 +15,7 @@ framework.
 """
 
 import os
-import sys
-from os.path import abspath, dirname
-
-SITE_ROOT = dirname(dirname(abspath(__file__)))
+from importlib import import_module
 
 # We defer to a DJANGO_SETTINGS_MODULE already in the environment. This breaks
 # if running multiple sites in the same mod_wsgi process. To fix this, use
@@ -26,21 +23,14 @@ SITE_ROOT = dirname(dirname(abspath(__file__)))
 # os.environ["DJANGO_SETTINGS_MODULE"] = "jajaja.settings"
 os.environ.setdefault("DJANGO_SETTINGS_MODULE", "fkweb.settings.production")
 
-
-def application(environ, start_response):
-    # pass the WSGI environment variables on through to os.environ
-    for var in ["SECRET_KEY"]:
-        if var in environ:
-            os.environ[var] = environ[var]
-    if "EXTRA_SITE_DIR" in environ:
-        import site
-
-        site.addsitedir(environ["EXTRA_SITE_DIR"])
-    # Avoid repeatedly adding the when debugging
-    if not SITE_ROOT in sys.path:
-        sys.path.append(SITE_ROOT)
-
-    from django.core.wsgi import get_wsgi_application
-
-    _application = get_wsgi_application()
-    return _application(environ, start_response)
+from django.conf import settings
+from django.core.wsgi import get_wsgi_application
+
+# Set up once, at import. gunicorn preloads this module (preload_app, see
+# gunicorn.conf.py), so Django's set-up, the URLconf and every view are
+# imported in the master, and each worker forks with them in place
+# instead of importing them on its first request. Settings are read here,
+# before any request, so they come from the process environment alone;
+# nothing is taken from a request's WSGI environ.
+application = get_wsgi_application()
+import_module(settings.ROOT_URLCONF)
@@ -0,0 +1,95 @@
+"""gunicorn's configuration, read from the environment.
+
+gunicorn loads this file from the working directory by itself, so
+`start.sh` runs plain `gunicorn`. Every value can be overridden with an
+environment variable, and, as ever, on the command line.
+
+The default worker is gthread: a few processes of a few threads each. The
+API spends most of a request waiting on Postgres, and a thread waiting
+lets the next request in, where a sync worker would sit on it -- one slow
+TV-Anytime render used to hold up the whole pod. Each thread keeps a
+database connection of its own (see DATABASE_CONN_MAX_AGE), so a pod
+holds up to workers x threads of them. benchmarks/gunicorn_workers.py
+compares the worker models; the README has its numbers.
+"""
+
+import os
+import shutil
+from pathlib import Path
+
+
+def cpu_quota() -> int:
+    """The CPUs this container may use, rounded up; the host's if unlimited.
+
+    os.cpu_count() reports the node's cores, which in a pod limited to one
+    CPU would start a dozen workers to share it.
+    """
+    try:
+        quota, period = Path("/sys/fs/cgroup/cpu.max").read_text().split()
+    except (OSError, ValueError):
+        quota = "max"
+    if quota != "max":
+        return max(1, -(-int(quota) // int(period)))
+    return os.cpu_count() or 1
+
+
+wsgi_app = "fkweb.wsgi:application"
+
+worker_class = os.environ.get("GUNICORN_WORKER_CLASS", "gthread")
+if worker_class == "uvicorn":
+    # fkweb.asgi under an event loop per process. The async feeds wait on
+    # the database without holding anything; the rest of the API runs on
+    # Django's thread pool. Connections are not kept open under ASGI (see
+    # fkweb.asgi), which a pgbouncer in front of Postgres would make up for.
+    worker_class = "uvicorn_worker.UvicornWorker"
+    wsgi_app = "fkweb.asgi:application"
+    workers = int(os.environ.get("WEB_CONCURRENCY", str(cpu_quota())))
+    threads = 1
+elif worker_class == "sync":
+    # A process per request in flight: the usual 2 x CPUs + 1.
+    workers = int(os.environ.get("WEB_CONCURRENCY", str(2 * cpu_quota() + 1)))
+    threads = 1
+else:
+    workers = int(os.environ.get("WEB_CONCURRENCY", str(cpu_quota())))
+    threads = int(os.environ.get("GUNICORN_THREADS", "4"))
+
+bind = os.environ.get("GUNICORN_BIND", "0.0.0.0:8080")
+
+# Import the application once, before forking, so the workers share its
+# memory copy-on-write and a broken deploy fails at start-up rather than
+# in every worker. Nothing connects to the database at import.
+preload_app = os.environ.get("GUNICORN_PRELOAD", "true").lower() == "true"
+
+# Above INGEST_REPORT_WAIT_SECONDS, which a long-polling ingest read is
+# held for by design.
+timeout = int(os.environ.get("GUNICORN_TIMEOUT", "60"))
+graceful_timeout = int(os.environ.get("GUNICORN_GRACEFUL_TIMEOUT", "30"))
+# Traefik keeps connections to us open; don't close them under it.
+keepalive = int(os.environ.get("GUNICORN_KEEPALIVE", "75"))
+
+# Recycle workers now and then, so slow growth in memory is bounded; the
+# jitter keeps them from all restarting at once.
+max_requests = int(os.environ.get("GUNICORN_MAX_REQUESTS", "2000"))
+max_requests_jitter = int(os.environ.get("GUNICORN_MAX_REQUESTS_JITTER", "200"))
+
+accesslog = os.environ.get("GUNICORN_ACCESSLOG") or None
+
+# Each worker keeps its metrics in files here, and /metrics adds them up
+# (see fkweb.instrumentation). Emptied when gunicorn starts rather than
+# when this file is read, which a reload (HUP) does again.
+prometheus_dir = os.environ.get("PROMETHEUS_MULTIPROC_DIR")
+if prometheus_dir:
+    os.makedirs(prometheus_dir, exist_ok=True)
+
+
+def on_starting(server):
+    if prometheus_dir:
+        shutil.rmtree(prometheus_dir, ignore_errors=True)
+        os.makedirs(prometheus_dir)
+
+
+def child_exit(server, worker):
+    if prometheus_dir:
+        from prometheus_client import multiprocess
+
+        multiprocess.mark_process_dead(worker.pid)
@@ -11,4 +11,7 @@ if __name__ == "__main__":
 
     from django.core.management import execute_from_command_line
 
-    execute_from_command_line(sys.argv)
+    from fkweb.slow_queries import stage
+
+    with stage(" ".join(["manage.py", *sys.argv[1:2]])):
+        execute_from_command_line(sys.argv)
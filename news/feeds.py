@@ -0,0 +1,62 @@
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.contrib.syndication.views import Feed
+from django.core.cache import cache
+from django.http import HttpResponse
+from django.urls import reverse
+from django.utils.feedgenerator import Atom1Feed
+
+from fkweb.slow_queries import stage
+
+from .models import Bulletin
+from .views import BULLETIN_FEED_KEY, LATEST_BULLETINS_MAX
+
+
+class BulletinFeed(Feed):
+    """The newest published bulletins, as Atom.
+
+    Every URL in it is absolute against SITE_URL rather than the host the
+    request came in on, so one rendering serves everybody.
+    """
+
+    feed_type = Atom1Feed
+    title = "Frikanalen"
+    subtitle = "News from Frikanalen"
+    link = f"{settings.SITE_URL}/"
+
+    def feed_url(self):
+        return settings.SITE_URL + reverse("news:bulletin-feed")
+
+    def items(self):
+        return Bulletin.objects.published()[:LATEST_BULLETINS_MAX]
+
+    def item_title(self, item: Bulletin):
+        return item.heading
+
+    def item_description(self, item: Bulletin):
+        return item.text
+
+    def item_link(self, item: Bulletin):
+        # Bulletins have no page of their own; they are read on the front page.
+        return f"{settings.SITE_URL}/"
+
+    def item_guid(self, item: Bulletin):
+        return settings.SITE_URL + reverse("news:bulletin-detail", args=[item.pk])
+
+    def item_pubdate(self, item: Bulletin):
+        return item.created
+
+
+async def bulletin_feed(request):
+    """The Atom feed, rendered once per change to the bulletins.
+
+    Async, like the XMLTV feeds, for the readers polling it: a hit is a
+    cache read that holds no thread under ASGI. A miss renders through
+    the syndication framework, which is sync.
+    """
+    body = await cache.aget(BULLETIN_FEED_KEY)
+    if body is None:
+        with stage("bulletin feed"):
+            body = (await sync_to_async(BulletinFeed())(request)).content
+        await cache.aset(BULLETIN_FEED_KEY, body, settings.CACHE_MIDDLEWARE_SECONDS)
+    return HttpResponse(body, content_type="application/atom+xml; charset=utf-8")
@@ -0,0 +1,17 @@
+# Generated by Django 5.2.17 on 2026-10-19 09:12
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('news', '0002_auto_20210103_1527'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='bulletin',
+            index=models.Index(condition=models.Q(('is_published', True)), fields=['-created', '-id'], name='bulletin_published_created'),
+        ),
+    ]
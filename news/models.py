@@ -2,11 +2,30 @@ from django.db import models
 from django.utils.translation import gettext as _
 
 
+class BulletinManager(models.Manager):
+    def published(self):
+        """What the public sees, newest first; answered by the partial index."""
+        return self.filter(is_published=True).order_by("-created", "-id")
+
+
 class Bulletin(models.Model):
     heading = models.CharField(_("Heading"), max_length=80)
     text = models.TextField(_("Text"))
     created = models.DateTimeField(auto_now_add=True)
     is_published = models.BooleanField(default=False)
 
+    objects = BulletinManager()
+
+    class Meta:
+        indexes = [
+            # What everyone but staff reads, newest first. Drafts are few and
+            # only staff list them, so they are left out of the index.
+            models.Index(
+                fields=["-created", "-id"],
+                condition=models.Q(is_published=True),
+                name="bulletin_published_created",
+            ),
+        ]
+
     def __str__(self):
         return f'[Bulletin "{self.heading}"]'
@@ -5,16 +5,23 @@ The previous version of this file generated bulletins with a home-grown
 random-prose engine (unseeded) whose output no test ever inspected.
 These tests use fixed data and assert the actual contract: payload
 shape, ordering, and who gets to write.
+
+The listing pages by cursor. The front page reads `latest` instead, and
+feed readers the Atom feed; both are kept in the cache until a bulletin
+next changes.
 """
 
 from datetime import UTC, datetime, timedelta
 
 import pytest
+from asgiref.sync import async_to_sync
+from django.test import RequestFactory
 from django.urls import reverse
 from rest_framework import status
 from rest_framework.test import APIClient
 
 from fk.models import User
+from news.feeds import bulletin_feed
 from news.models import Bulletin
 
 pytestmark = pytest.mark.django_db
@@ -38,15 +45,15 @@ def staff_client() -> APIClient:
     return client
 
 
-def test_bulletins_are_listed_newest_first_without_pagination() -> None:
+def test_bulletins_are_listed_newest_first() -> None:
     older = make_bulletin("Older", CREATED)
     newer = make_bulletin("Newer", CREATED + timedelta(days=1))
 
     response = APIClient().get(reverse("news:bulletin-list"))
 
     assert response.status_code == status.HTTP_200_OK
-    # A plain list: this endpoint has pagination disabled.
-    assert response.json() == [
+    assert response.json()["next"] is None
+    assert response.json()["results"] == [
         {
             "id": newer.pk,
             "heading": "Newer",
@@ -73,14 +80,14 @@ def test_drafts_are_hidden_from_the_public_but_visible_to_staff() -> None:
     draft = make_bulletin("Draft", CREATED + timedelta(days=1), is_published=False)
 
     public_list = APIClient().get(reverse("news:bulletin-list"))
-    assert [item["heading"] for item in public_list.json()] == ["Published"]
+    assert [item["heading"] for item in public_list.json()["results"]] == ["Published"]
 
     draft_url = reverse("news:bulletin-detail", args=[draft.pk])
     assert APIClient().get(draft_url).status_code == status.HTTP_404_NOT_FOUND
 
     staff = staff_client()
     staff_list = staff.get(reverse("news:bulletin-list"))
-    assert [(item["heading"], item["isPublished"]) for item in staff_list.json()] == [
+    assert [(item["heading"], item["isPublished"]) for item in staff_list.json()["results"]] == [
         ("Draft", False),
         ("Published", True),
     ]
@@ -146,3 +153,82 @@ def test_staff_can_update_and_delete() -> None:
     delete_response = client.delete(url)
     assert delete_response.status_code == status.HTTP_204_NO_CONTENT
     assert not Bulletin.objects.exists()
+
+
+def test_the_listing_pages_by_cursor() -> None:
+    for day in range(5):
+        make_bulletin(f"Day {day}", CREATED + timedelta(days=day))
+    # Created in the same instant as Day 4; the id decides.
+    make_bulletin("Also day 4", CREATED + timedelta(days=4))
+
+    seen = []
+    url = reverse("news:bulletin-list") + "?page_size=4"
+    while url:
+        page = APIClient().get(url).json()
+        seen += [item["heading"] for item in page["results"]]
+        url = page["next"]
+
+    assert seen == ["Also day 4", "Day 4", "Day 3", "Day 2", "Day 1", "Day 0"]
+
+
+@pytest.mark.usefixtures("real_cache")
+def test_the_latest_bulletins_are_cached_until_one_changes(
+    django_assert_num_queries, django_capture_on_commit_callbacks
+) -> None:
+    make_bulletin("First")
+    make_bulletin("Draft", CREATED + timedelta(days=2), is_published=False)
+    url = reverse("news:bulletin-latest")
+
+    assert [item["heading"] for item in APIClient().get(url).json()] == ["First"]
+    with django_assert_num_queries(0):
+        APIClient().get(url, {"count": 1})
+
+    with django_capture_on_commit_callbacks(execute=True):
+        Bulletin.objects.create(heading="Second", text="More", is_published=True)
+
+    # A count not asked for before, as the page cache in front of the view
+    # still holds the exact URLs above.
+    response = APIClient().get(url, {"count": 2})
+    assert [item["heading"] for item in response.json()] == ["Second", "First"]
+
+
+def test_latest_refuses_a_count_past_what_it_keeps() -> None:
+    response = APIClient().get(reverse("news:bulletin-latest"), {"count": 21})
+
+    assert response.status_code == status.HTTP_400_BAD_REQUEST
+    assert response.json()["errors"][0]["attr"] == "count"
+
+
+@pytest.mark.usefixtures("real_cache")
+def test_the_atom_feed_is_rendered_once_per_change(
+    django_assert_num_queries, django_capture_on_commit_callbacks
+) -> None:
+    make_bulletin("On air")
+    make_bulletin("Draft", is_published=False)
+    request = RequestFactory().get(reverse("news:bulletin-feed"))
+    feed = async_to_sync(bulletin_feed)
+
+    response = feed(request)
+
+    assert response["Content-Type"] == "application/atom+xml; charset=utf-8"
+    body = response.content.decode()
+    assert "<title>On air</title>" in body
+    assert "Draft" not in body
+    assert '<link href="https://frikanalen.no/api/news/feed.atom" rel="self"' in body
+    with django_assert_num_queries(0):
+        assert feed(request).content == response.content
+
+    with django_capture_on_commit_callbacks(execute=True):
+        Bulletin.objects.filter(heading="Draft").get().delete()
+        Bulletin.objects.create(heading="Later", text="Still news", is_published=True)
+
+    assert "<title>Later</title>" in feed(request).content.decode()
+
+
+def test_the_atom_feed_is_served() -> None:
+    make_bulletin("On air")
+
+    response = APIClient().get(reverse("news:bulletin-feed"))
+
+    assert response.status_code == status.HTTP_200_OK
+    assert "<title>On air</title>" in response.content.decode()
@@ -1,11 +1,13 @@
 from django.urls import include, path
 from rest_framework import routers
 
+from .feeds import bulletin_feed
 from .views import BulletinViewSet
 
 router = routers.DefaultRouter()
 router.register(r"bulletins", BulletinViewSet)
 
 urlpatterns = [
+    path("feed.atom", bulletin_feed, name="bulletin-feed"),
     path("", include(router.urls)),
 ]
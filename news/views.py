@@ -1,19 +1,76 @@
-from rest_framework import viewsets
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from drf_spectacular.utils import extend_schema
+from rest_framework import serializers, viewsets
+from rest_framework.decorators import action
+from rest_framework.response import Response
 
 from api.auth.permissions import IsStaffOrReadOnly
+from api.pagination import FkFeedPagination
+from fkweb.middleware import CacheVisibility
 
 from .models import Bulletin
 from .serializers import BulletinSerializer
 
+# The newest published bulletins, serialized, and the Atom feed of them.
+# Every front-page load asks for the first; both only change when a
+# bulletin does.
+LATEST_BULLETINS_KEY = "news.bulletins.latest"
+BULLETIN_FEED_KEY = "news.bulletins.feed"
+
+# The most bulletins `latest` serves, and so the most that are cached.
+LATEST_BULLETINS_MAX = 20
+
+
+def forget_latest_bulletins() -> None:
+    """Drop the cached bulletins and feed once the current transaction commits."""
+    transaction.on_commit(lambda: cache.delete_many([LATEST_BULLETINS_KEY, BULLETIN_FEED_KEY]))
+
+
+class LatestBulletinsQuerySerializer(serializers.Serializer):
+    count = serializers.IntegerField(
+        min_value=1,
+        max_value=LATEST_BULLETINS_MAX,
+        default=5,
+        help_text="How many bulletins to return.",
+    )
+
 
 class BulletinViewSet(viewsets.ModelViewSet):
-    queryset = Bulletin.objects.all().order_by("-created")
+    queryset = Bulletin.objects.all().order_by("-created", "-id")
     serializer_class = BulletinSerializer
     permission_classes = (IsStaffOrReadOnly,)
-    pagination_class = None
+    cache_visibility = CacheVisibility.STAFF
+    pagination_class = FkFeedPagination
+    ordering = ("-created", "-id")
 
     def get_queryset(self):
         queryset = super().get_queryset()
         if self.request.user.is_staff:
             return queryset
         return queryset.filter(is_published=True)
+
+    @extend_schema(
+        summary="The newest published bulletins",
+        description=(
+            "What the front page shows: the newest published bulletins, newest first, "
+            "as a plain list. Drafts are left out, for staff too. Served from a cache "
+            "that is dropped whenever a bulletin changes."
+        ),
+        parameters=[LatestBulletinsQuerySerializer],
+        responses=BulletinSerializer(many=True),
+    )
+    @action(detail=False, pagination_class=None)
+    def latest(self, request):
+        query = LatestBulletinsQuerySerializer(data=request.query_params)
+        query.is_valid(raise_exception=True)
+        bulletins = cache.get(LATEST_BULLETINS_KEY)
+        if bulletins is None:
+            bulletins = list(
+                self.get_serializer(
+                    Bulletin.objects.published()[:LATEST_BULLETINS_MAX], many=True
+                ).data
+            )
+            cache.set(LATEST_BULLETINS_KEY, bulletins, settings.CACHE_MIDDLEWARE_SECONDS)
+        return Response(bulletins[: query.validated_data["count"]])
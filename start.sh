@@ -2,6 +2,9 @@
 
 ./manage.py collectstatic --noinput
 ./manage.py migrate
+# Generated here rather than in the image: the schema shows settings from
+# the environment, FK_UPLOAD_URL among them. /api/schema/ serves this file.
+./manage.py openapi_schema
 
 # Create superuser if environment variables are set (and skip if already exists)
 if [ -n "$DJANGO_SUPERUSER_EMAIL" ] && [ -n "$DJANGO_SUPERUSER_PASSWORD" ]; then
@@ -12,4 +15,8 @@ if [ "$DJANGO_LOAD_FIXTURES" = "true" ]; then
   ./manage.py loaddata frikanalen || true
 fi
 
-gunicorn fkweb.wsgi:application --bind 0.0.0.0:8080
+# Workers, threads, timeouts and the rest are in gunicorn.conf.py, which
+# gunicorn reads from here, and each can be set from the environment. exec,
+# so that gunicorn gets the TERM on shutdown and closes its database
+# connections cleanly.
+exec gunicorn